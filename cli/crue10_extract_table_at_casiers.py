@@ -32,11 +32,9 @@ def crue10_extract_table_at_casiers(args):
     else:
         run = scenario.get_run(args.run_id)
     resultats = run.get_resultats_calcul()
-    res_trans = resultats.get_data_trans(args.calc_trans)
 
     emh_names = resultats.emh['Casier']
     variables = resultats.variables['Casier']
-    res = res_trans['Casier']
 
     # Check if variables exist at Casiers
     try:
@@ -47,19 +45,27 @@ def crue10_extract_table_at_casiers(args):
         logger.critical("Au moins une variable aux casiers est manquante : %s" % e)
         sys.exit(2)
 
-    # Select time range
-    time = resultats.get_res_calc_trans(args.calc_trans).time_serie()
-    res = res[np.logical_and(args.start_time <= time, time <= args.end_time), :, :]
-
-    # Compute Vol/Splan (except when Splan=0 to avoid division by zero) and extract the max over the time
-    hmoy = np.max(np.divide(res[:, :, pos_Vol], res[:, :, pos_Splan],
-                            out=np.zeros_like(res[:, :, pos_Vol]), where=res[:, :, pos_Splan] != 0),
-                  axis=0)
+    # Compute Vol/Splan (except when Splan=0 to avoid division by zero) and extract the max over the time range
+    # (in a single pass over the frames of the time range)
+    zmax = np.full(len(emh_names), -np.inf)
+    hmoy = np.full(len(emh_names), -np.inf)
+    nb_frames = 0
+    for time, res in resultats.iter_frames_trans(args.calc_trans, emh_types=['Casier'],
+                                                 start_time=args.start_time, end_time=args.end_time):
+        res = res['Casier']
+        zmax = np.maximum(zmax, np.max(res[:, :, pos_Z], axis=0))
+        hmoy = np.maximum(hmoy, np.max(np.divide(res[:, :, pos_Vol], res[:, :, pos_Splan],
+                                                 out=np.zeros_like(res[:, :, pos_Vol]),
+                                                 where=res[:, :, pos_Splan] != 0), axis=0))
+        nb_frames += len(res)
+    if nb_frames == 0:
+        raise ExceptionCrue10("Aucun temps du calcul `%s` n'est compris entre %s et %s"
+                              % (args.calc_trans, args.start_time, args.end_time))
 
     df = pd.DataFrame({
         'emh_name': emh_names,
         'zfond': [scenario.modele.get_casier(ca_name).get_min_z() for ca_name in emh_names],
-        'zmax': np.max(res[:, :, pos_Z], axis=0),
+        'zmax': zmax,
         'hmoy': hmoy,
         # 'Volmax': np.max(res[:, :, pos_Vol], axis=0),
         # 'Splanmax': np.max(res[:, :, pos_Splan], axis=0),
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Suivre les résultats d'un Run pendant que Crue10 calcule : la variable demandée aux EMHs souhaitées est affichée
+(et éventuellement tracée) pour chaque nouvel enregistrement écrit dans les fichiers RBIN.
+
+Les enregistrements sont numérotés (les temps ne sont connus qu'à la fin du calcul).
+"""
+import sys
+
+from crue10.etude import Etude
+from crue10.utils import ExceptionCrue10, logger
+from crue10.utils.cli_parser import MyArgParse
+
+
+def crue10_follow_run(args):
+    etude = Etude(args.etu_path)
+    if args.sc_name is None:
+        scenario = etude.get_scenario_courant()
+    else:
+        scenario = etude.get_scenario(args.sc_name)
+    if args.run_id is None:
+        run = scenario.get_dernier_run()
+    else:
+        run = scenario.get_run(args.run_id)
+    resultats = run.get_resultats_live(poll_interval=args.poll_interval)
+
+    selection = []
+    for emh_name in args.emh_names:
+        emh_type = resultats.emh_type(emh_name)
+        selection.append((emh_type, resultats.get_emh_position(emh_type, emh_name),
+                          resultats.get_variable_position(emh_type, args.var_name)))
+    emh_types = sorted(set(emh_type for emh_type, _, _ in selection))
+
+    if args.plot:
+        try:
+            import matplotlib.pyplot as plt
+        except ImportError:  # ModuleNotFoundError not available in Python2
+            raise ExceptionCrue10("Le module matplotlib ne fonctionne pas !")
+        plt.ion()
+        fig, ax = plt.subplots()
+        ax.set_xlabel("Numéro de l'enregistrement")
+        ax.set_ylabel(args.var_name)
+        lines = [ax.plot([], [], label=emh_name)[0] for emh_name in args.emh_names]
+        ax.legend()
+
+    logger.info("Suivi de %s (%i EMHs)" % (resultats, len(selection)))
+    for calc_type, i_frame, res in resultats.iter_new_frames(emh_types=emh_types, timeout=args.timeout):
+        values = [res[emh_type][emh_pos, var_pos] for emh_type, emh_pos, var_pos in selection]
+        logger.info("%s #%i : %s" % (calc_type, i_frame, ', '.join('%s=%f' % (emh_name, value)
+                                                                  for emh_name, value in zip(args.emh_names, values))))
+        if args.plot and calc_type == 'trans':
+            for line, value in zip(lines, values):
+                line.set_data(list(line.get_xdata()) + [i_frame], list(line.get_ydata()) + [value])
+            ax.relim()
+            ax.autoscale_view()
+            plt.pause(0.01)
+    logger.info("Fin du suivi : %s" % resultats)
+
+
+parser = MyArgParse(description=__doc__)
+parser.add_argument('etu_path', help="chemin vers l'étude Crue10 à lire (fichier etu.xml)")
+parser.add_argument('--sc_name', help="nom du scénario (avec le preffixe Sc_) (si absent alors le scénario courant est pris)")
+parser.add_argument('--run_id', help="identifiant du Run à exploiter (si absent alors le dernier Run est pris)")
+parser.add_argument('--poll_interval', help="durée d'attente (en secondes) entre deux vérifications des fichiers",
+                    type=float, default=1.0)
+parser.add_argument('--timeout', help="durée (en secondes) sans nouvel enregistrement avant d'arrêter le suivi",
+                    type=float, default=60.0)
+parser.add_argument('--plot', help="tracer les valeurs des enregistrements transitoires", action='store_true')
+parser.add_argument('var_name', help="nom de la variable à suivre")
+parser.add_argument('emh_names', help="liste des noms d'EMHs", nargs='+')
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    try:
+        crue10_follow_run(args)
+    except ExceptionCrue10 as e:
+        logger.critical(e)
+        sys.exit(1)
@@ -2,10 +2,9 @@
 # coding: utf-8
 """
 Générer un fichier (.csv) permettant de connaître sur quelle section et à quel moment (temps en secondes)
-le niveau d'eau dépasse le cavalier
+le niveau d'eau dépasse le cavalier (avec la durée de dépassement et la marge maximale)
 """
 import pandas as pd
-import numpy as np
 import sys
 
 from crue10.etude import Etude
@@ -29,17 +28,20 @@ def get_time_reaching_dyke(args):
         run = scenario.get_run(args.run_id)
     resultats = run.get_resultats_calcul()
 
-    time = resultats.res_calc_trans[args.calc_trans].time_serie()
-
-    export = []
-    for section_id, z_digue, cavalier in zip(df_digues["Section"], df_digues["Digue"], df_digues["Cavalier"]):
-        z_resultat = resultats.get_trans_var_at_emhs_as_array(args.calc_trans, 'Z', [section_id])
-        time_above = np.where(z_resultat + cavalier > z_digue)[0]
-        if len(time_above) != 0:
-            first_time_above = time_above[0]
-            export.append([section_id, z_resultat[first_time_above][0], z_digue, time[first_time_above]])
-
-    df_export = pd.DataFrame(export, columns=["Section", "Cote_surface_libre", "Cote_digue", "Time_[s]"])
+    # Exceedance at all sections in a single pass over the frames
+    df_exceedance = resultats.extract_dyke_exceedance_as_dataframe(
+        args.calc_trans, df_digues["Section"].tolist(), df_digues["Digue"].values, df_digues["Cavalier"].values)
+    df_exceedance = df_exceedance[df_exceedance['time_first_above'].notna()]
+    time_dtype = resultats.get_res_calc_trans(args.calc_trans).time_serie().dtype
+
+    df_export = pd.DataFrame({
+        "Section": df_exceedance['section'],
+        "Cote_surface_libre": df_exceedance['z_first_above'],
+        "Cote_digue": df_exceedance['crest_level'],
+        "Time_[s]": df_exceedance['time_first_above'].astype(time_dtype),
+        "Duree_depassement_[s]": df_exceedance['time_above'],
+        "Marge_max": df_exceedance['margin_max'],
+    })
     df_export.to_csv(args.out_csv, sep=CSV_DELIMITER, index=False)
 
 
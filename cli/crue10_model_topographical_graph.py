@@ -30,7 +30,7 @@ from crue10.etude import Etude
 def crue10_model_topographical_graph(args):
     etude = Etude(args.etu_path)
     modele = etude.get_modele(args.mo_name)
-    modele.read_all()
+    modele.read_all(lazy=True)
 
     logger.info(modele)
     modele.write_topological_graph(args.out_files, nodesep=args.sep, prog=args.prog)
@@ -2,11 +2,13 @@
 import abc
 from copy import deepcopy
 from io import open  # Python2 fix
+from lxml import etree
 import os.path
 import xml.etree.ElementTree as ET
 
 from crue10.utils import add_default_missing_metadata, check_xml_file, DATA_FOLDER_ABSPATH, ExceptionCrue10, \
-    ExceptionCrue10Grammar, JINJA_ENV, get_xml_root_from_file, logger, PREFIX, XSI_SCHEMA_LOCATION
+    ExceptionCrue10Grammar, JINJA_ENV, get_xml_root_from_file, get_xml_root_from_file_lxml, logger, PREFIX, \
+    XSI_SCHEMA_LOCATION
 from crue10.utils.settings import VERSION_GRAMMAIRE_COURANTE, VERSION_GRAMMAIRE_PRECEDENTE, XML_ENCODING
 
 
@@ -151,13 +153,21 @@ class EnsembleFichiersXML(ABC):
         """Définir le commentaire"""
         self.metadata['Commentaire'] = comment
 
-    def _get_xml_root_set_version_grammaire_and_comment(self, xml):
-        try:
-            root = ET.parse(self.files[xml]).getroot()
-        except FileNotFoundError:
-            raise ExceptionCrue10("Fichier introuvable: %s" % self.files[xml])
-        except ET.ParseError as e:
-            raise ExceptionCrue10("Erreur syntaxe XML dans `%s`:\n%s" % (self.files[xml], e))
+    def _get_xml_root_set_version_grammaire_and_comment(self, xml, xml_parser='etree'):
+        if xml_parser == 'lxml':
+            if not os.path.exists(self.files[xml]):
+                raise ExceptionCrue10("Fichier introuvable: %s" % self.files[xml])
+            try:
+                root = get_xml_root_from_file_lxml(self.files[xml])
+            except etree.XMLSyntaxError as e:
+                raise ExceptionCrue10("Erreur syntaxe XML dans `%s`:\n%s" % (self.files[xml], e))
+        else:
+            try:
+                root = ET.parse(self.files[xml]).getroot()
+            except FileNotFoundError:
+                raise ExceptionCrue10("Fichier introuvable: %s" % self.files[xml])
+            except ET.ParseError as e:
+                raise ExceptionCrue10("Erreur syntaxe XML dans `%s`:\n%s" % (self.files[xml], e))
 
         # Set version_grammaire
         version_grammaire = root.get(XSI_SCHEMA_LOCATION)[-7:-4]
@@ -29,6 +29,7 @@ from .noeud import Noeud
 from .section import Section, SectionIdem, SectionInterpolee, SectionProfil, SectionSansGeometrie
 from crue10.utils import check_2d_array_shape, check_isinstance, check_preffix, \
     ExceptionCrue10, ExceptionCrue10GeometryNotFound, logger
+from crue10.utils.design_patterns import LazyAttributes
 
 
 # ABC below is compatible with Python 2 and 3
@@ -54,7 +55,7 @@ DEFAULT_QLIMINF = -1.0E30  # m3/s
 DEFAULT_QLIMSUP = 1.0E30  # m3/s
 
 
-class Branche(ABC):
+class Branche(LazyAttributes, ABC):
     """
     Méthode abstraite pour les branches
 
@@ -13,6 +13,7 @@ from shapely.geometry import LinearRing
 from crue10.emh.noeud import Noeud
 from crue10.utils import check_strictly_increasing, check_2d_array_shape, check_isinstance, check_preffix, \
     ExceptionCrue10, logger
+from crue10.utils.design_patterns import LazyAttributes
 
 
 DX = 1e-3
@@ -45,7 +46,7 @@ def get_negative_area(x_array, y_array):
     return negative_area
 
 
-class BatiCasier:
+class BatiCasier(LazyAttributes):
     """
     BatiCasier
 
@@ -86,7 +87,7 @@ class BatiCasier:
         return "BatiCasier #%s"
 
 
-class ProfilCasier:
+class ProfilCasier(LazyAttributes):
     """
     ProfilCasier = données permettant de calculer une loi de volume fonction d'une cote à partir d'un profil
     en travers à appliquer sur une certaine distance
@@ -211,7 +212,7 @@ class ProfilCasier:
                % (self.id, self.longueur, self.xz[:, 1].min(), self.xz[:, 1].max())
 
 
-class Casier:
+class Casier(LazyAttributes):
     """
     Casier ou zone de stockage, réservoir
 
@@ -2,9 +2,10 @@
 from shapely.geometry import Point
 
 from crue10.utils import check_isinstance, check_preffix, ExceptionCrue10
+from crue10.utils.design_patterns import LazyAttributes
 
 
-class Noeud:
+class Noeud(LazyAttributes):
     """
     Noeud = extrémité des branches
 
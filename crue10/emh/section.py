@@ -21,6 +21,7 @@ from shapely.geometry import LineString, Point
 
 from crue10.utils import check_strictly_increasing, check_2d_array_shape, check_isinstance, check_preffix, \
     ExceptionCrue10, logger
+from crue10.utils.design_patterns import LazyAttributes
 
 
 # ABC below is compatible with Python 2 and 3
@@ -227,7 +228,7 @@ class LimiteGeom:
         return 'Limite #%s (%f)' % (self.id, self.xt)
 
 
-class Section(ABC):
+class Section(LazyAttributes, ABC):
     """
     Méthode abstraite pour les sections
 
@@ -361,13 +362,9 @@ class SectionProfil(Section):
         """
         check_isinstance(array, np.ndarray)
         check_2d_array_shape(array, 2, 2)
-        new_array = array[0, :]
-        duplicated_xt = []
-        for (xt1, z1), (xt2, z2) in zip(array, array[1:]):
-            if xt1 == xt2:
-                duplicated_xt.append(xt2)
-            else:
-                new_array = np.vstack((new_array, [xt2, z2]))
+        is_duplicated = array[1:, 0] == array[:-1, 0]
+        duplicated_xt = list(array[1:, 0][is_duplicated])
+        new_array = np.vstack((array[:1, :], array[1:, :][~is_duplicated]))
         self.xz = new_array
         check_strictly_increasing(new_array[:, 0], 'xt')
         if duplicated_xt:
@@ -2,17 +2,28 @@
 from builtins import super  # Python2 fix
 from collections import OrderedDict
 from copy import deepcopy
+import hashlib
+import io
 import os.path
+import pickle
+import re
 from shutil import copyfile, rmtree
 import time
+import zlib
 
+from crue10 import VERSION
 from crue10.base import EnsembleFichiersXML
 from crue10.modele import Modele
 from crue10.run import Run
 from crue10.scenario import Scenario
-from crue10.sous_modele import SousModele
-from crue10.utils import check_isinstance, ExceptionCrue10, logger, PREFIX
+from crue10.sous_modele import read_all_sous_modeles, SousModele
+from crue10.utils import check_isinstance, ExceptionCrue10, get_files_signature, logger, PREFIX
 from crue10.utils.design_patterns import factory_define, factory_make
+from crue10.utils.settings import ETUDE_SNAPSHOT_FOLDER
+
+
+#: Version du format des instantanés (à incrémenter si les classes sérialisées changent de structure)
+SNAPSHOT_VERSION = 1
 
 
 def read_metadata(elt, keys):
@@ -42,15 +53,21 @@ class Etude(EnsembleFichiersXML):
     :vartype modeles: OrderedDict(Modele)
     :ivar sous_modeles: dictionnaire avec le nom du sous-modèle et l'instance SousModele associée
     :vartype sous_modeles: OrderedDict(SousModele)
+    :ivar xml_parser: analyseur XML transmis aux sous-modèles (une valeur de `SousModele.XML_PARSERS`)
+    :vartype xml_parser: str
     """
 
     FOLDERS = OrderedDict([('CONFIG', 'Config'), ('FICHETUDES', '.'),
                            ('RAPPORTS', 'Rapports'), ('RUNS', 'Runs')])
+
+    #: Dossier des instantanés (voir `read_all`)
+    SNAPSHOT_FOLDER = ETUDE_SNAPSHOT_FOLDER
     FILES_XML = ['etu']
     SUB_FILES_XML = Scenario.FILES_XML + Modele.FILES_XML + SousModele.FILES_XML
     METADATA_FIELDS = ['Commentaire', 'AuteurCreation', 'DateCreation', 'AuteurDerniereModif', 'DateDerniereModif']
 
-    def __init__(self, etu_path, folders=None, mode='r', metadata=None, version_grammaire=None, comment=''):
+    def __init__(self, etu_path, folders=None, mode='r', metadata=None, version_grammaire=None, comment='',
+                 xml_parser='etree'):
         """
         :param etu_path: Fichier étude Crue10 (etu.xml)
         :type etu_path: str
@@ -64,7 +81,13 @@ class Etude(EnsembleFichiersXML):
         :type version_grammaire: str
         :param comment: commentaire optionnel
         :type comment: str
+        :param xml_parser: analyseur XML pour la lecture des sous-modèles ('etree' ou 'lxml')
+        :type xml_parser: str, optional
         """
+        if xml_parser not in SousModele.XML_PARSERS:
+            raise ExceptionCrue10("L'analyseur XML `%s` n'est pas supporté (valeurs possibles : %s)"
+                                  % (xml_parser, SousModele.XML_PARSERS))
+        self.xml_parser = xml_parser
         files = {'etu': etu_path} if mode == 'r' else None
         super().__init__(mode, files, metadata, version_grammaire=version_grammaire)
         self.files['etu'] = etu_path  # FIXME: hack to overwrite the special key 'etu'
@@ -188,7 +211,7 @@ class Etude(EnsembleFichiersXML):
                                                nom_sous_modele.upper(), shp_name + '.shp')
 
             sous_modele = SousModele(nom_sous_modele, files=files, metadata=metadata,
-                                     version_grammaire=self.version_grammaire)
+                                     version_grammaire=self.version_grammaire, xml_parser=self.xml_parser)
             self.ajouter_sous_modele(sous_modele)
         if not self.sous_modeles:
             raise ExceptionCrue10("Il faut au moins un sous-modèle !")
@@ -274,17 +297,125 @@ class Etude(EnsembleFichiersXML):
         if not self.scenarios:
             raise ExceptionCrue10("Il faut au moins un scénario !")
 
-    def read_all(self, ignore_shp=False):
-        """Lire tous les fichiers de l'étude"""
+    def get_input_files(self, ignore_shp=False):
+        """
+        Obtenir la liste de tous les fichiers lus par `read_all` (y compris le fichier etu.xml)
+
+        :param ignore_shp: True pour ne pas inclure les fichiers shp
+        :type ignore_shp: bool, optional
+        :rtype: list(str)
+        """
+        file_paths = set([self.etu_path])
+        for ensemble in self.get_liste_scenarios() + self.get_liste_modeles() + self.get_liste_sous_modeles():
+            for file_type, file_path in ensemble.files.items():
+                if file_type in SousModele.FILES_SHP:
+                    if not ignore_shp:
+                        # A shapefile is read from several files
+                        file_paths.update(file_path[:-len('.shp')] + ext for ext in ('.shp', '.shx', '.dbf', '.prj'))
+                else:
+                    file_paths.add(file_path)
+        return sorted(file_paths)
+
+    def get_snapshot_path(self):
+        """
+        Obtenir le chemin vers le fichier de l'instantané de l'étude
+
+        :rtype: str
+        """
+        etu_path = self.etu_path[:-len('.etu.xml')] if self.etu_path.endswith('.etu.xml') else self.etu_path
+        if Etude.SNAPSHOT_FOLDER is None:
+            return etu_path + '.snapshot.pkl'
+        # Flatten the absolute path to get a unique file name in the snapshot folder
+        flat_path = re.sub(r'[^0-9A-Za-z_.-]', '_', os.path.abspath(etu_path))
+        return os.path.join(Etude.SNAPSHOT_FOLDER, flat_path + '.snapshot.pkl')
+
+    def get_snapshot_key(self, ignore_shp=False):
+        """
+        Obtenir la clé de l'instantané : empreinte des chemins, tailles et dates de modification de tous les fichiers
+        lus (les fichiers absents sont également pris en compte) et des versions de Crue10_tools et du format
+
+        :param ignore_shp: True si les fichiers shp ne sont pas lus
+        :type ignore_shp: bool, optional
+        :rtype: str
+        """
+        signature = get_files_signature(self.get_input_files(ignore_shp=ignore_shp), ignore_missing=True)
+        key = repr((SNAPSHOT_VERSION, VERSION, ignore_shp, sorted(signature.items())))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _read_snapshot(self, ignore_shp):
+        """
+        Restaurer l'étude depuis son instantané s'il est à jour
+
+        :return: l'instantané a été lu
+        :rtype: bool
+        """
+        snapshot_path = self.get_snapshot_path()
+        if not os.path.exists(snapshot_path):
+            return False
+        try:
+            with io.open(snapshot_path, 'rb') as in_pickle:
+                # The header is read first to avoid loading an outdated object graph
+                header = pickle.load(in_pickle)
+                if header['key'] != self.get_snapshot_key(ignore_shp=ignore_shp):
+                    logger.debug("L'instantané `%s` n'est pas à jour" % snapshot_path)
+                    return False
+                etude = pickle.loads(zlib.decompress(in_pickle.read()))
+        except (OSError, IOError, EOFError, KeyError, AttributeError, ImportError, zlib.error,
+                pickle.UnpicklingError) as e:
+            logger.warning("L'instantané `%s` est illisible : %s" % (snapshot_path, e))
+            return False
+        self.__dict__.update(etude.__dict__)
+        return True
+
+    def _write_snapshot(self, ignore_shp):
+        """Écrire l'instantané de l'étude (graphe des objets sérialisé et compressé)"""
+        snapshot_path = self.get_snapshot_path()
+        header = {'key': self.get_snapshot_key(ignore_shp=ignore_shp), 'etu_path': os.path.abspath(self.etu_path)}
+        try:
+            data = zlib.compress(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL), 1)
+            with io.open(snapshot_path, 'wb') as out_pickle:
+                pickle.dump(header, out_pickle, protocol=pickle.HIGHEST_PROTOCOL)
+                out_pickle.write(data)
+        except (OSError, IOError, pickle.PicklingError) as e:
+            logger.warning("L'instantané `%s` n'a pas pu être écrit : %s" % (snapshot_path, e))
+
+    def read_all(self, ignore_shp=False, use_snapshot=False, ncsize=1, lazy=False):
+        """
+        Lire tous les fichiers de l'étude
+
+        Avec `use_snapshot`, l'étude est restaurée depuis son instantané (voir `get_snapshot_path`) s'il est à jour,
+        sinon les fichiers sont lus et l'instantané est (ré)écrit. Toute modification (date ou taille), ajout ou
+        suppression d'un fichier lu invalide l'instantané.
+
+        Avec `ncsize` > 1, les sous-modèles sont lus en parallèle dans des processus fils, puis les modèles et
+        scénarios (qui référencent les EMH des sous-modèles) sont lus dans le processus courant.
+        L'instantané d'une étude lue avec `lazy` contient tous les composants (ils sont lus avant l'écriture).
+
+        :param ignore_shp: True pour ne pas lire les fichiers shp
+        :type ignore_shp: bool, optional
+        :param use_snapshot: True pour utiliser l'instantané de l'étude
+        :type use_snapshot: bool, optional
+        :param ncsize: nombre de processus pour lire les sous-modèles en parallèle
+        :type ncsize: int, optional
+        :param lazy: True pour différer la lecture des composants des sous-modèles (voir `SousModele.read_all`)
+        :type lazy: bool, optional
+        """
+        if use_snapshot and not self.was_read:
+            if self._read_snapshot(ignore_shp):
+                logger.debug("%s restaurée depuis son instantané" % self)
+                return
+
         # self._read_etu() is done in `__init__` method
-        for sous_modele in self.get_liste_sous_modeles():
-            sous_modele.read_all(ignore_shp=ignore_shp)
+        read_all_sous_modeles(self.get_liste_sous_modeles(), ignore_shp=ignore_shp, ncsize=ncsize, lazy=lazy)
         for modele in self.get_liste_modeles():
             modele.read_all(ignore_shp=ignore_shp)
         for scenario in self.get_liste_scenarios():
             scenario.read_all(ignore_shp=ignore_shp)
         self.was_read = True
 
+        if use_snapshot:
+            self._write_snapshot(ignore_shp)
+
     def move(self, folder):
         self.files['etu'] = os.path.join(folder, os.path.basename(self.etu_path))
 
@@ -17,7 +17,7 @@ from crue10.utils import check_isinstance, check_preffix, DATA_FOLDER_ABSPATH, d
     PREFIX, write_default_xml_file, write_xml_from_tree
 from crue10.utils.crueconfigmetier import CCM
 from crue10.utils.graph_1d_model import *
-from crue10.sous_modele import SousModele
+from crue10.sous_modele import read_all_sous_modeles, SousModele
 
 
 class Modele(EnsembleFichiersXML):
@@ -693,13 +693,19 @@ class Modele(EnsembleFichiersXML):
                         self.branches_ic[branche_id]['type'] = 20
                         self.branches_ic[branche_id]['values']['Qruis'] = float(emh_ci.find(PREFIX + 'Qruis').text)
 
-    def read_all(self, ignore_shp=False):
+    def read_all(self, ignore_shp=False, ncsize=1, lazy=False):
         """
         Lire tous les fichiers du modèle
+
+        :param ignore_shp: True pour ne pas lire les fichiers shp
+        :type ignore_shp: bool, optional
+        :param ncsize: nombre de processus pour lire les sous-modèles en parallèle
+        :type ncsize: int, optional
+        :param lazy: True pour différer la lecture des composants des sous-modèles (voir `SousModele.read_all`)
+        :type lazy: bool, optional
         """
         if not self.was_read:
-            for sous_modele in self.liste_sous_modeles:
-                sous_modele.read_all(ignore_shp=ignore_shp)
+            read_all_sous_modeles(self.liste_sous_modeles, ignore_shp=ignore_shp, ncsize=ncsize, lazy=lazy)
 
             self._read_dpti()
             self._set_xml_trees()  # should be after read_dpi to set version_grammaire and check if dreg is expected
@@ -8,6 +8,8 @@ import os.path
 import subprocess
 
 from crue10.run.resultats_calcul import ResultatsCalcul
+from crue10.run.resultats_live import ResultatsLive
+from crue10.run.resultats_store import get_store_path, is_store_up_to_date, ResultatsStore, write_resultats_store
 from crue10.utils.settings import CRUE10_EXE_PATH
 from crue10.run.trace import Trace
 from crue10.utils import add_default_missing_metadata, check_xml_file, ExceptionCrue10, logger
@@ -358,11 +360,12 @@ class Run:
         file_path = get_path_file_unique_matching(self.run_mo_path, '*.rcal.xml')
         return check_xml_file(file_path, version_grammaire)
 
-    def get_resultats_calcul(self):
+    def get_resultats_calcul(self, **kwargs):
         """
         Obtenir une instance ResultatsCalcul pour post-traiter les résultats de calcul du Run.
         Il faut que le Run contiennent des résultats (même partiels) du service de calcul.
 
+        :param kwargs: options de lecture transmises à ResultatsCalcul (par ex. `use_memmap`)
         :return: résultats du calcul
         :rtype: ResultatsCalcul
         """
@@ -380,7 +383,37 @@ class Run:
 
         # Get file and returns results
         rcal_path = get_path_file_unique_matching(self.run_mo_path, '*.rcal.xml')
-        return ResultatsCalcul(rcal_path)
+        return ResultatsCalcul(rcal_path, **kwargs)
+
+    def get_resultats_live(self, **kwargs):
+        """
+        Obtenir une instance ResultatsLive pour suivre les résultats de calcul du Run pendant que Crue10 calcule.
+        Il faut que le fichier rcal contienne au moins la structure des résultats.
+
+        :param kwargs: options transmises à ResultatsLive (par ex. `poll_interval`)
+        :return: résultats du calcul en cours
+        :rtype: ResultatsLive
+        """
+        rcal_path = get_path_file_unique_matching(self.run_mo_path, '*.rcal.xml')
+        return ResultatsLive(rcal_path, **kwargs)
+
+    def get_resultats_store(self, store_path=None):
+        """
+        Obtenir une instance ResultatsStore pour post-traiter les résultats de calcul du Run à partir d'un stockage
+        en colonnes. Le stockage est (re)créé s'il n'existe pas ou si les fichiers rcal et RBIN ont changé.
+
+        :param store_path: chemin vers le dossier de stockage (à côté du fichier rcal si absent)
+        :type store_path: str
+        :return: résultats du calcul
+        :rtype: ResultatsStore
+        """
+        resultats = self.get_resultats_calcul()
+        if store_path is None:
+            store_path = get_store_path(resultats.rcal_path)
+        if not is_store_up_to_date(store_path, resultats):
+            logger.debug("Écriture du stockage des résultats du run #%s dans `%s`" % (self.id, store_path))
+            write_resultats_store(resultats, store_path)
+        return ResultatsStore(store_path)
 
     def set_comment(self, comment):
         """Définir le commentaire"""
@@ -1,18 +1,25 @@
 # coding: utf-8
 from collections import OrderedDict
-import csv
+from concurrent.futures import ThreadPoolExecutor
+import gzip
 import io  # Python2 fix
 import numpy as np
 import os.path
 import pandas as pd
+import pickle
 import re
-from sys import version_info
+from tempfile import TemporaryFile
+from time import perf_counter
 import xml.etree.ElementTree as ET
+import zlib
 
-from crue10.utils import ExceptionCrue10, PREFIX
-from crue10.utils.settings import CSV_DELIMITER, FMT_FLOAT_CSV
+from crue10.utils import ExceptionCrue10, get_files_signature, logger, PREFIX
+from crue10.utils.settings import CSV_DELIMITER, FMT_FLOAT_CSV, RESULTS_CACHE_FOLDER
 
 
+#: Version du format du cache des métadonnées des résultats
+METADATA_CACHE_VERSION = 1
+
 #: Regex pour le format des durées de Crue10
 TIME_REGEX = re.compile(r'P(?P<days>[0-9]+)DT(?P<hours>[0-9]+)H(?P<mins>[0-9]+)M(?P<secs>[0-9]+)S')
 
@@ -30,6 +37,20 @@ def get_time_in_seconds(time_str):
     return ((values['days'] * 24 + values['hours']) * 60 + values['mins']) * 60 + values['secs']
 
 
+def get_times_in_seconds(time_str_list):
+    """
+    Convertir une liste de durées au format Crue10 en secondes (de manière vectorisée)
+
+    :param time_str_list: liste de durées au format Crue10
+    :type time_str_list: list(str)
+    :rtype: np.ndarray
+    """
+    values = np.array(TIME_REGEX.findall(' '.join(time_str_list)), dtype=np.int64).reshape((-1, 4))
+    if len(values) != len(time_str_list):
+        raise ExceptionCrue10("Au moins une durée n'est pas au format Crue10")
+    return ((values[:, 0] * 24 + values[:, 1]) * 60 + values[:, 2]) * 60 + values[:, 3]
+
+
 class FilePosition:
     """
     Fichier binaire est en "little endian" avec des valeurs sur 8 bytes
@@ -49,6 +70,9 @@ class FilePosition:
     #: Précision des flottants (double précision)
     FLOAT_TYPE = np.float64
 
+    #: Écart maximal (en nombre de mots) entre deux valeurs pour les lire en une seule fois
+    MAX_GAP_WORDS = 512
+
     def __init__(self, rbin_path, byte_offset):
         """
         :param rbin_path: chemin complet vers le fichier RBIN
@@ -97,6 +121,439 @@ class FilePosition:
         return res
 
 
+def get_values_at_positions(file_pos_list, positions, is_pseudoperm):
+    """
+    Lire uniquement les valeurs demandées de plusieurs enregistrements.
+    Chaque fichier RBIN n'est ouvert qu'une seule fois et seules les plages d'octets contenant les valeurs
+    demandées sont lues (les positions proches sont regroupées en une seule lecture).
+
+    :param file_pos_list: liste des positions des enregistrements
+    :type file_pos_list: list(FilePosition)
+    :param positions: positions des valeurs dans un enregistrement (en nombre de mots)
+    :type positions: list(int)
+    :param is_pseudoperm: les données correspondent à un calcul pseudo-permanent
+        (pour vérifier la cohérence d'un délimiteur)
+    :type is_pseudoperm: bool
+    :return: tableau de valeurs (shape=(nb_frames, nb_positions))
+    :rtype: np.ndarray
+    """
+    dtype = np.dtype(FilePosition.FLOAT_TYPE).newbyteorder('<')
+    positions = np.asarray(positions, dtype=np.int64)
+    values = np.empty((len(file_pos_list), len(positions)), dtype=FilePosition.FLOAT_TYPE)
+
+    # Group positions (including the calc delimiter) into ranges to read
+    unique_positions = np.unique(np.append(positions, 0))
+    split_indices = np.where(np.diff(unique_positions) > FilePosition.MAX_GAP_WORDS)[0] + 1
+    ranges = []
+    for range_positions in np.split(unique_positions, split_indices):
+        start, end = int(range_positions[0]), int(range_positions[-1]) + 1
+        mask = np.logical_and(start <= positions, positions < end)
+        ranges.append((start, end, np.where(mask)[0], positions[mask] - start))
+
+    # Group frames by RBIN file and read them in the order of the file
+    groups = OrderedDict()
+    for i, file_pos in enumerate(file_pos_list):
+        groups.setdefault(file_pos.rbin_path, []).append((file_pos.byte_offset, i))
+    for rbin_path, frames in groups.items():
+        with io.open(rbin_path, 'rb') as resin:
+            for byte_offset, i in sorted(frames):
+                for start, end, idx_values, idx_in_range in ranges:
+                    resin.seek((byte_offset + start) * FilePosition.FLOAT_SIZE)
+                    buffer = resin.read((end - start) * FilePosition.FLOAT_SIZE)
+                    if len(buffer) != (end - start) * FilePosition.FLOAT_SIZE:
+                        raise ExceptionCrue10("L'enregistrement à la position %i du fichier `%s` est incomplet"
+                                              % (byte_offset, rbin_path))
+                    if start == 0:
+                        calc_delimiter = buffer[:FilePosition.FLOAT_SIZE].decode(FilePosition.ENCODING).strip()
+                        if is_pseudoperm:
+                            if calc_delimiter != 'RcalPp':
+                                raise ExceptionCrue10("Le calcul n'est pas permanent !")
+                        else:
+                            if calc_delimiter != 'RcalPdt':
+                                raise ExceptionCrue10("Le calcul n'est pas transitoire !")
+                    values[i, idx_values] = np.frombuffer(buffer, dtype=dtype)[idx_in_range]
+    return values
+
+
+def read_frames(file_pos_list, res_layout, is_pseudoperm, res_all, indices=None):
+    """
+    Lire des enregistrements complets dans des tableaux préalloués.
+    Chaque fichier RBIN n'est ouvert qu'une seule fois et les enregistrements sont lus dans l'ordre du fichier
+    (en une seule lecture par enregistrement).
+
+    :param file_pos_list: liste des positions des enregistrements
+    :type file_pos_list: list(FilePosition)
+    :param res_layout: positions des délimiteurs et des blocs de données (voir `get_res_layout`)
+    :type res_layout: tuple
+    :param is_pseudoperm: les données correspondent à un calcul pseudo-permanent
+        (pour vérifier la cohérence d'un délimiteur)
+    :type is_pseudoperm: bool
+    :param res_all: dictionnaire avec les types d'EMH secondaires et les tableaux à remplir
+        (shape=(nb_frames, nb_emh, nb_var))
+    :type res_all: dict(np.ndarray)
+    :param indices: indices des enregistrements à lire (si absent alors tous sont lus)
+    :type indices: list(int)
+    """
+    delimiters, blocks, frame_nb_words = res_layout
+    dtype = np.dtype(FilePosition.FLOAT_TYPE).newbyteorder('<')
+    if indices is None:
+        indices = range(len(file_pos_list))
+
+    groups = OrderedDict()
+    for i in indices:
+        groups.setdefault(file_pos_list[i].rbin_path, []).append((file_pos_list[i].byte_offset, i))
+    for rbin_path, frames in groups.items():
+        with io.open(rbin_path, 'rb') as resin:
+            for byte_offset, i in sorted(frames):
+                resin.seek(byte_offset * FilePosition.FLOAT_SIZE)
+                buffer = resin.read(frame_nb_words * FilePosition.FLOAT_SIZE)
+                if len(buffer) != frame_nb_words * FilePosition.FLOAT_SIZE:
+                    raise ExceptionCrue10("L'enregistrement à la position %i du fichier `%s` est incomplet"
+                                          % (byte_offset, rbin_path))
+
+                # Check delimiters
+                calc_delimiter = buffer[:FilePosition.FLOAT_SIZE].decode(FilePosition.ENCODING).strip()
+                if is_pseudoperm:
+                    if calc_delimiter != 'RcalPp':
+                        raise ExceptionCrue10("Le calcul n'est pas permanent !")
+                else:
+                    if calc_delimiter != 'RcalPdt':
+                        raise ExceptionCrue10("Le calcul n'est pas transitoire !")
+                for delimiter_offset, emh_type in delimiters:
+                    emh_delimiter = buffer[delimiter_offset * FilePosition.FLOAT_SIZE:
+                                           (delimiter_offset + 1) * FilePosition.FLOAT_SIZE]
+                    emh_delimiter = emh_delimiter.decode(FilePosition.ENCODING).strip()
+                    if emh_delimiter not in emh_type:
+                        raise ExceptionCrue10("Les EMH attendus sont %s (au lieu de %s)" % (emh_type, emh_delimiter))
+
+                values = np.frombuffer(buffer, dtype=dtype)
+                for emh_type, res in res_all.items():
+                    block_offset, (nb_emh, nb_var) = blocks[emh_type]
+                    res[i, :, :] = values[block_offset:block_offset + nb_emh * nb_var].reshape((nb_emh, nb_var))
+
+
+def get_res_layout(res_pattern, emh_type_first_branche):
+    """
+    Calculer la position (en nombre de mots par rapport au début d'un enregistrement) des délimiteurs et des blocs de
+    données de chaque type d'EMH à partir du schéma d'organisation des résultats
+
+    :param res_pattern: schéma d'organisation des résultats (voir `FilePosition.get_data`)
+    :type res_pattern: list(tuple(str, (int, int)))
+    :param emh_type_first_branche: premier type d'EMH secondaire pour Branche (pa ex. 'BrancheBarrageFilEau')
+    :type emh_type_first_branche: str
+    :return: positions des délimiteurs d'EMH (avec le type d'EMH attendu),
+        positions des blocs de données (avec leur shape) et nombre total de mots d'un enregistrement
+    :rtype: (list(tuple(int, str)), OrderedDict(tuple(int, (int, int))), int)
+    """
+    delimiters = []
+    blocks = OrderedDict()
+    offset = 1  # délimiteur du type de calcul
+    for emh_type, (nb_emh, nb_var) in res_pattern:
+        if (emh_type == 'Branche') or \
+                (not emh_type.startswith('Branche') or emh_type == emh_type_first_branche):
+            delimiters.append((offset, emh_type))
+            offset += 1
+        blocks[emh_type] = (offset, (nb_emh, nb_var))
+        offset += nb_emh * nb_var
+    return delimiters, blocks, offset
+
+
+class RbinMemmap:
+    """
+    Lecture des fichiers RBIN par projection en mémoire (`np.memmap`) : chaque fichier n'est ouvert qu'une seule
+    fois et les enregistrements sont obtenus par des vues (sans copie si possible) sur les fichiers
+
+    :ivar delimiters: positions des délimiteurs d'EMH (voir `get_res_layout`)
+    :vartype delimiters: list(tuple(int, str))
+    :ivar blocks: positions des blocs de données (voir `get_res_layout`)
+    :vartype blocks: OrderedDict(tuple(int, (int, int)))
+    :ivar frame_nb_words: taille d'un enregistrement (en nombre de mots)
+    :vartype frame_nb_words: int
+    :ivar memmaps: dictionnaire avec les projections en mémoire de chaque fichier RBIN
+    :vartype memmaps: dict(np.memmap)
+    """
+
+    def __init__(self, res_pattern, emh_type_first_branche):
+        """
+        :param res_pattern: schéma d'organisation des résultats (voir `FilePosition.get_data`)
+        :type res_pattern: list(tuple(str, (int, int)))
+        :param emh_type_first_branche: premier type d'EMH secondaire pour Branche (pa ex. 'BrancheBarrageFilEau')
+        :type emh_type_first_branche: str
+        """
+        self.delimiters, self.blocks, self.frame_nb_words = get_res_layout(res_pattern, emh_type_first_branche)
+        self.memmaps = {}
+
+    def get_memmap(self, rbin_path):
+        """
+        Obtenir la projection en mémoire du fichier RBIN (ouvert lors du premier appel uniquement)
+
+        :param rbin_path: chemin complet vers le fichier RBIN
+        :type rbin_path: str
+        :rtype: np.memmap
+        """
+        if rbin_path not in self.memmaps:
+            dtype = np.dtype(FilePosition.FLOAT_TYPE).newbyteorder('<')
+            self.memmaps[rbin_path] = np.memmap(rbin_path, dtype=dtype, mode='r')
+        return self.memmaps[rbin_path]
+
+    def close(self):
+        """Libérer les projections en mémoire des fichiers RBIN"""
+        self.memmaps.clear()
+
+    @staticmethod
+    def _get_delimiters(mm, offsets):
+        """Obtenir les délimiteurs distincts lus aux positions demandées"""
+        words = mm.view(np.dtype('S%i' % FilePosition.FLOAT_SIZE))[offsets]
+        return [word.decode(FilePosition.ENCODING).strip() for word in np.unique(words)]
+
+    def check_delimiters(self, rbin_path, offsets, is_pseudoperm):
+        """
+        Vérifier que tous les enregistrements sont complets puis vérifier en une seule passe vectorisée leurs
+        délimiteurs de calcul et d'EMH
+
+        :param rbin_path: chemin complet vers le fichier RBIN
+        :type rbin_path: str
+        :param offsets: positions des enregistrements dans le fichier (en nombre de mots)
+        :type offsets: np.ndarray
+        :param is_pseudoperm: les données correspondent à un calcul pseudo-permanent
+        :type is_pseudoperm: bool
+        """
+        mm = self.get_memmap(rbin_path)
+        is_incomplete = offsets + self.frame_nb_words > mm.size
+        if np.any(is_incomplete):
+            raise ExceptionCrue10("L'enregistrement à la position %i du fichier `%s` est incomplet"
+                                  % (offsets[is_incomplete][0], rbin_path))
+        for calc_delimiter in RbinMemmap._get_delimiters(mm, offsets):
+            if is_pseudoperm:
+                if calc_delimiter != 'RcalPp':
+                    raise ExceptionCrue10("Le calcul n'est pas permanent !")
+            else:
+                if calc_delimiter != 'RcalPdt':
+                    raise ExceptionCrue10("Le calcul n'est pas transitoire !")
+        for delimiter_offset, emh_type in self.delimiters:
+            for emh_delimiter in RbinMemmap._get_delimiters(mm, offsets + delimiter_offset):
+                if emh_delimiter not in emh_type:
+                    raise ExceptionCrue10("Les EMH attendus sont %s (au lieu de %s)" % (emh_type, emh_delimiter))
+
+    def get_values(self, file_pos_list, positions, is_pseudoperm):
+        """
+        Obtenir uniquement les valeurs demandées de plusieurs enregistrements
+
+        :param file_pos_list: liste des positions des enregistrements
+        :type file_pos_list: list(FilePosition)
+        :param positions: positions des valeurs dans un enregistrement (en nombre de mots)
+        :type positions: list(int)
+        :param is_pseudoperm: les données correspondent à un calcul pseudo-permanent
+        :type is_pseudoperm: bool
+        :return: tableau de valeurs (shape=(nb_frames, nb_positions))
+        :rtype: np.ndarray
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        values = np.empty((len(file_pos_list), len(positions)), dtype=FilePosition.FLOAT_TYPE)
+        groups = OrderedDict()
+        for i, file_pos in enumerate(file_pos_list):
+            groups.setdefault(file_pos.rbin_path, []).append((i, file_pos.byte_offset))
+        for rbin_path, frames in groups.items():
+            indices = np.array([i for i, _ in frames], dtype=np.int64)
+            offsets = np.array([offset for _, offset in frames], dtype=np.int64)
+            self.check_delimiters(rbin_path, offsets, is_pseudoperm)
+            values[indices, :] = self.get_memmap(rbin_path)[offsets[:, np.newaxis] + positions]
+        return values
+
+    def get_data(self, file_pos_list, is_pseudoperm, emh_types):
+        """
+        Obtenir les tableaux de résultats de plusieurs enregistrements.
+        Si les enregistrements sont régulièrement espacés dans un seul fichier RBIN, les tableaux sont des vues
+        (en lecture seule) sur le fichier, sinon ce sont des copies.
+
+        :param file_pos_list: liste des positions des enregistrements
+        :type file_pos_list: list(FilePosition)
+        :param is_pseudoperm: les données correspondent à un calcul pseudo-permanent
+        :type is_pseudoperm: bool
+        :param emh_types: liste des types d'EMH secondaires à extraire
+        :type emh_types: list(str)
+        :return: dictionnaire avec les types d'EMH secondaires et le tableau de données
+            (shape=(nb_frames, nb_emh, nb_var))
+        :rtype: dict(np.ndarray)
+        """
+        # Group frames by RBIN file (keeping the order of the frames)
+        groups = OrderedDict()
+        for i, file_pos in enumerate(file_pos_list):
+            groups.setdefault(file_pos.rbin_path, []).append((i, file_pos.byte_offset))
+
+        res_by_group = []
+        for rbin_path, frames in groups.items():
+            indices = np.array([i for i, _ in frames], dtype=np.int64)
+            offsets = np.array([offset for _, offset in frames], dtype=np.int64)
+            self.check_delimiters(rbin_path, offsets, is_pseudoperm)
+            mm = self.get_memmap(rbin_path)
+            steps = np.diff(offsets)
+            is_regular = len(offsets) == 1 or (steps[0] > 0 and np.all(steps == steps[0]))
+
+            res = {}
+            for emh_type in emh_types:
+                block_offset, (nb_emh, nb_var) = self.blocks[emh_type]
+                if is_regular:
+                    step = steps[0] if len(offsets) > 1 else nb_emh * nb_var
+                    start = offsets[0] + block_offset
+                    res[emh_type] = np.lib.stride_tricks.as_strided(
+                        mm[start:], shape=(len(offsets), nb_emh, nb_var),
+                        strides=(step * mm.itemsize, nb_var * mm.itemsize, mm.itemsize), writeable=False)
+                else:
+                    positions = (offsets + block_offset)[:, np.newaxis] + np.arange(nb_emh * nb_var)
+                    res[emh_type] = mm[positions].reshape((len(offsets), nb_emh, nb_var))
+            res_by_group.append((indices, res))
+
+        if len(res_by_group) == 1:
+            return res_by_group[0][1]
+
+        # Gather frames from several RBIN files
+        res_all = {}
+        for emh_type in emh_types:
+            _, (nb_emh, nb_var) = self.blocks[emh_type]
+            res_all[emh_type] = np.empty((len(file_pos_list), nb_emh, nb_var), dtype=FilePosition.FLOAT_TYPE)
+            for indices, res in res_by_group:
+                res_all[emh_type][indices, :, :] = res[emh_type]
+        return res_all
+
+
+class FrameCache:
+    """
+    Cache des enregistrements lus (avec éviction des moins récemment utilisés) dont la taille est bornée
+
+    :ivar max_size: taille maximale du cache (en octets)
+    :vartype max_size: int
+    :ivar size: taille actuelle du cache (en octets)
+    :vartype size: int
+    :ivar compression: algorithme de compression des enregistrements (None si non compressés)
+    :vartype compression: str
+    :ivar frames: dictionnaire ordonné (du moins au plus récemment utilisé) avec pour clé (nom du calcul, index de
+        l'enregistrement) et pour valeur le dictionnaire des tableaux de résultats par type d'EMH secondaire
+        (ou de tuples (octets compressés, type, dimensions) si les enregistrements sont compressés)
+    :vartype frames: OrderedDict(dict(np.ndarray))
+    :ivar hits: nombre d'enregistrements trouvés dans le cache
+    :vartype hits: int
+    :ivar misses: nombre d'enregistrements absents du cache
+    :vartype misses: int
+    :ivar evictions: nombre d'enregistrements retirés du cache
+    :vartype evictions: int
+    """
+
+    #: Algorithmes de compression disponibles
+    COMPRESSIONS = ['zlib', 'blosc']
+
+    #: Niveau de compression (compromis entre le taux de compression et la vitesse)
+    COMPRESSION_LEVEL = 1
+
+    def __init__(self, max_size_mb, compression=None):
+        """
+        :param max_size_mb: taille maximale du cache (en Mo)
+        :type max_size_mb: float
+        :param compression: algorithme de compression des enregistrements, parmi `COMPRESSIONS`
+            (pas de compression si None)
+        :type compression: str
+        """
+        if compression is not None and compression not in FrameCache.COMPRESSIONS:
+            raise ExceptionCrue10("La compression `%s` n'est pas supportée\nLes compressions possibles sont : %s"
+                                  % (compression, FrameCache.COMPRESSIONS))
+        if compression == 'blosc':
+            try:
+                import blosc  # noqa
+            except ImportError:  # ModuleNotFoundError not available in Python2
+                raise ExceptionCrue10("Le module blosc ne fonctionne pas !")
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.size = 0
+        self.compression = compression
+        self.frames = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _frame_size(frame):
+        return sum(len(values[0]) if isinstance(values, tuple) else values.nbytes for values in frame.values())
+
+    def _compress(self, frame):
+        if self.compression is None:
+            return frame
+        compressed_frame = {}
+        for emh_type, values in frame.items():
+            if self.compression == 'zlib':
+                data = zlib.compress(np.ascontiguousarray(values).tobytes(), FrameCache.COMPRESSION_LEVEL)
+            else:
+                import blosc
+                data = blosc.compress(np.ascontiguousarray(values).tobytes(), typesize=values.itemsize,
+                                      clevel=FrameCache.COMPRESSION_LEVEL)
+            compressed_frame[emh_type] = (data, values.dtype.str, values.shape)
+        return compressed_frame
+
+    def _decompress(self, compressed_frame):
+        if self.compression is None:
+            return compressed_frame
+        frame = {}
+        for emh_type, (data, dtype, shape) in compressed_frame.items():
+            if self.compression == 'zlib':
+                data = zlib.decompress(data)
+            else:
+                import blosc
+                data = blosc.decompress(data)
+            frame[emh_type] = np.frombuffer(data, dtype=dtype).reshape(shape)  # read-only
+        return frame
+
+    def get(self, key):
+        """
+        Obtenir un enregistrement du cache (None s'il est absent)
+
+        :param key: nom du calcul et index de l'enregistrement
+        :type key: (str, int)
+        :rtype: dict(np.ndarray)
+        """
+        try:
+            frame = self.frames[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.frames.move_to_end(key)
+        self.hits += 1
+        return self._decompress(frame)
+
+    def put(self, key, frame):
+        """
+        Ajouter un enregistrement au cache
+        (et retirer les moins récemment utilisés si la taille maximale est dépassée)
+
+        :param key: nom du calcul et index de l'enregistrement
+        :type key: (str, int)
+        :param frame: dictionnaire des tableaux de résultats par type d'EMH secondaire
+        :type frame: dict(np.ndarray)
+        """
+        frame = self._compress(frame)
+        frame_size = FrameCache._frame_size(frame)
+        if frame_size > self.max_size:
+            return
+        if key in self.frames:
+            self.size -= FrameCache._frame_size(self.frames.pop(key))
+        self.frames[key] = frame
+        self.size += frame_size
+        while self.size > self.max_size:
+            _, old_frame = self.frames.popitem(last=False)
+            self.size -= FrameCache._frame_size(old_frame)
+            self.evictions += 1
+
+    def clear(self):
+        """Vider le cache (les compteurs sont conservés)"""
+        self.frames.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __repr__(self):
+        return "Cache de %i enregistrements%s (%.1f/%.1f Mo, %i succès, %i échecs, %i évictions)" \
+               % (len(self.frames), '' if self.compression is None else ' compressés (%s)' % self.compression,
+                  self.size / 1024 / 1024, self.max_size / 1024 / 1024, self.hits, self.misses, self.evictions)
+
+
 class ResCalcPseudoPerm:
     """
     Métadonnées des résultats pour un calcul pseudo-permanent
@@ -143,8 +600,199 @@ class ResCalcTrans:
     def time_serie(self):
         return np.array([frame[0] for frame in self.frame_list])
 
+    @property
+    def nb_frames(self):
+        """Nombre d'enregistrements"""
+        return len(self.frame_list)
+
+    def get_file_positions(self, frames=None):
+        """
+        Obtenir les positions dans les fichiers RBIN des enregistrements demandés
+
+        :param frames: indices (ou slice) des enregistrements (si absent alors tous sont pris)
+        :type frames: slice or list(int)
+        :rtype: list(FilePosition)
+        """
+        if frames is None:
+            frames = slice(None)
+        if isinstance(frames, slice):
+            return [file_pos for _, file_pos in self.frame_list[frames]]
+        return [self.frame_list[i][1] for i in frames]
+
+    def get_frame_range(self, start_time=-float('inf'), end_time=float('inf')):
+        """
+        Obtenir les indices des enregistrements compris dans la fenêtre temporelle (recherche dichotomique)
+
+        :param start_time: borne inférieure temporelle
+        :type start_time: float
+        :param end_time: borne supérieure temporelle
+        :type end_time: float
+        :return: indices du premier enregistrement et de celui qui suit le dernier
+        :rtype: tuple(int, int)
+        """
+        time = self.time_serie()
+        first = int(np.searchsorted(time, start_time, side='left'))
+        last = int(np.searchsorted(time, end_time, side='right'))
+        return first, max(first, last)
+
+    def get_interpolation(self, times):
+        """
+        Obtenir les enregistrements encadrant chaque temps demandé et les coefficients d'interpolation linéaire
+
+        :param times: temps cibles (compris entre le premier et le dernier temps du calcul)
+        :type times: np.ndarray
+        :return: indices des enregistrements nécessaires (triés), positions dans cette liste des enregistrements
+            précédent et suivant chaque temps cible, poids de l'enregistrement suivant
+        :rtype: tuple(np.ndarray, np.ndarray, np.ndarray, np.ndarray)
+        """
+        time = self.time_serie()
+        times = np.asarray(times, dtype=np.float64)
+        if len(time) == 0:
+            raise ExceptionCrue10("Le calcul `%s` n'a aucun temps" % self.name)
+        if np.any(times < time[0]) or np.any(times > time[-1]):
+            raise ExceptionCrue10("Les temps demandés doivent être compris entre %s et %s (calcul `%s`)"
+                                  % (time[0], time[-1], self.name))
+        idx_before = np.clip(np.searchsorted(time, times, side='right') - 1, 0, max(len(time) - 2, 0))
+        idx_after = np.minimum(idx_before + 1, len(time) - 1)
+        delta = (time[idx_after] - time[idx_before]).astype(np.float64)
+        weight = np.divide(times - time[idx_before], delta, out=np.zeros_like(times), where=delta != 0)
+        frames, inverse = np.unique(np.concatenate((idx_before, idx_after)), return_inverse=True)
+        return frames, inverse[:len(times)], inverse[len(times):], weight
+
     def __repr__(self):
-        return "Calcul transitoire #%s (%i temps)" % (self.name, len(self.frame_list))
+        return "Calcul transitoire #%s (%i temps)" % (self.name, self.nb_frames)
+
+
+class ResCalcTransLazy(ResCalcTrans):
+    """
+    Métadonnées des résultats pour un calcul transitoire stockées dans des tableaux compacts.
+    Les objets FilePosition ne sont créés qu'à la demande (la liste complète `frame_list` n'est construite
+    qu'au premier accès).
+
+    :ivar times: temps des enregistrements
+    :vartype times: np.ndarray
+    :ivar rbin_paths: liste des chemins complets vers les fichiers RBIN (sans doublon)
+    :vartype rbin_paths: list(str)
+    :ivar file_ids: indice du fichier RBIN (dans `rbin_paths`) de chaque enregistrement
+    :vartype file_ids: np.ndarray
+    :ivar offsets: position dans le fichier RBIN de chaque enregistrement
+    :vartype offsets: np.ndarray
+    """
+
+    def __init__(self, name, times, rbin_paths, file_ids, offsets):
+        self.name = name
+        self.times = times
+        self.rbin_paths = rbin_paths
+        self.file_ids = file_ids
+        self.offsets = offsets
+        self._frame_list = None
+
+    @classmethod
+    def from_res_calc_trans(cls, calc):
+        """
+        Construire les métadonnées compactes d'un calcul transitoire
+
+        :param calc: calcul transitoire
+        :type calc: ResCalcTrans
+        :rtype: ResCalcTransLazy
+        """
+        if isinstance(calc, ResCalcTransLazy):
+            return calc
+        rbin_ids = OrderedDict()
+        file_ids = [rbin_ids.setdefault(file_pos.rbin_path, len(rbin_ids)) for _, file_pos in calc.frame_list]
+        return cls(calc.name, calc.time_serie(), list(rbin_ids.keys()), np.array(file_ids, dtype=np.int32),
+                   np.array([file_pos.byte_offset for _, file_pos in calc.frame_list], dtype=np.int64))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_frame_list'] = None  # not pickled
+        return state
+
+    @property
+    def frame_list(self):
+        if self._frame_list is None:
+            self._frame_list = list(zip(self.times.tolist(), self.get_file_positions()))
+        return self._frame_list
+
+    def add_frame(self, time_sec, bin_path, byte_offset):
+        raise ExceptionCrue10("Impossible d'ajouter un enregistrement au calcul `%s` (lecture paresseuse)" % self.name)
+
+    def time_serie(self):
+        return self.times.copy()
+
+    @property
+    def nb_frames(self):
+        return len(self.times)
+
+    def get_file_positions(self, frames=None):
+        if frames is None:
+            frames = slice(None)
+        indices = np.arange(len(self.times))[frames]
+        return [FilePosition(self.rbin_paths[file_id], byte_offset)
+                for file_id, byte_offset in zip(self.file_ids[indices].tolist(), self.offsets[indices].tolist())]
+
+
+class ResultatsQuery:
+    """
+    Requête groupée sur les résultats transitoires : plusieurs demandes (calcul, EMHs, variables, fenêtre
+    temporelle) sont lues ensemble en un seul parcours séquentiel des fichiers RBIN.
+
+    :ivar resultats: résultats du calcul
+    :vartype resultats: ResultatsCalcul
+    :ivar requests: liste des requêtes (nom du calcul, liste des EMHs, liste des variables, sélection,
+        indices du premier enregistrement et de celui qui suit le dernier)
+    :vartype requests: list(tuple)
+    """
+
+    def __init__(self, resultats):
+        """
+        :param resultats: résultats du calcul
+        :type resultats: ResultatsCalcul
+        """
+        self.resultats = resultats
+        self.requests = []
+
+    def add_request(self, calc_name, emh_list, varname_list, start_time=-float('inf'), end_time=float('inf')):
+        """
+        Ajouter une requête (les EMHs et variables sont vérifiées immédiatement)
+
+        :param calc_name: nom du calcul transitoire
+        :type calc_name: str
+        :param emh_list: liste des EMHs concernées
+        :type emh_list: list(str)
+        :param varname_list: liste des variables à extraire (disponibles pour toutes les EMHs)
+        :type varname_list: list(str)
+        :param start_time: borne inférieure temporelle (début du transitoire si absent)
+        :type start_time: float
+        :param end_time: borne supérieure temporelle (fin du transitoire si absent)
+        :type end_time: float
+        :return: indice de la requête
+        :rtype: int
+        """
+        first, last = self.resultats.get_res_calc_trans(calc_name).get_frame_range(start_time, end_time)
+        selection = [self.resultats._get_selection(self.resultats.emh_type(emh_name), emh_name, varname)
+                     for emh_name in emh_list for varname in varname_list]
+        self.requests.append((calc_name, emh_list, varname_list, selection, first, last))
+        return len(self.requests) - 1
+
+    def execute(self):
+        """
+        Exécuter toutes les requêtes
+
+        :return: liste (dans l'ordre des requêtes) de tuples avec les temps et le tableau des valeurs
+            (shape=(nb_frames, nb_emh, nb_var))
+        :rtype: list(tuple(np.ndarray, np.ndarray))
+        """
+        values_list = self.resultats._get_batch_trans_values(
+            [(calc_name, selection, first, last) for calc_name, _, _, selection, first, last in self.requests])
+        results = []
+        for (calc_name, emh_list, varname_list, _, first, last), values in zip(self.requests, values_list):
+            time = self.resultats.get_res_calc_trans(calc_name).time_serie()[first:last]
+            results.append((time, values.reshape((last - first, len(emh_list), len(varname_list)))))
+        return results
+
+    def __repr__(self):
+        return "Requête groupée (%i demandes)" % len(self.requests)
 
 
 class ResultatsCalcul:
@@ -172,20 +820,112 @@ class ResultatsCalcul:
     :vartype res_calc_pseudoperm: OrderedDict(ResCalcPseudoPerm)
     :ivar res_calc_trans: dictionnaires avec les métadonnées des calculs transitoires
     :vartype res_calc_trans: OrderedDict(ResCalcTrans)
+    :ivar frame_cache: cache des enregistrements lus (None si non activé)
+    :vartype frame_cache: FrameCache
     :ivar _emh_type_first_branche: premier type d'EMH "secondaire" pour Branche (pa ex. 'BrancheBarrageFilEau')
     :vartype _emh_type_first_branche: str
     :ivar _res_pattern: liste de tuples du type (emh_type, shape)
     :vartype _res_pattern: list(tuple)
+    :ivar _res_blocks: positions des blocs de données dans un enregistrement (voir `get_res_layout`)
+    :vartype _res_blocks: OrderedDict(tuple(int, (int, int)))
+    :ivar _emh_index: dictionnaire donnant pour chaque nom d'EMH son type d'EMH secondaire et sa position
+    :vartype _emh_index: dict(tuple(str, int))
+    :ivar _variable_index: dictionnaire donnant pour chaque type d'EMH secondaire la position de chaque variable
+    :vartype _variable_index: dict(dict(int))
+    :ivar _rbin_memmap: lecteur des fichiers RBIN par projection en mémoire (None si non activé)
+    :vartype _rbin_memmap: RbinMemmap
+    :ivar nb_threads: nombre de threads pour le décodage des enregistrements (lecture séquentielle si 1)
+    :vartype nb_threads: int
+    :ivar lazy: lecture paresseuse du fichier rcal (les calculs transitoires sont des `ResCalcTransLazy`)
+    :vartype lazy: bool
+    :ivar _dtypes: dictionnaire donnant pour chaque type d'EMH secondaire la précision de chaque variable
+        (None si tous les résultats sont en double précision)
+    :vartype _dtypes: dict(list(np.dtype))
+    :ivar _block_dtypes: dictionnaire donnant pour chaque type d'EMH secondaire la précision de ses tableaux de
+        résultats (la plus grande précision de ses variables)
+    :vartype _block_dtypes: dict(np.dtype)
     """
+    #: Dossier du cache des métadonnées (à côté du fichier rcal si None)
+    METADATA_CACHE_FOLDER = RESULTS_CACHE_FOLDER
+
     #: Noms des EMHs primaires
     EMH_PRIMARY_TYPES = ['Noeud', 'Casier', 'Section', 'Branche', 'Modele']
 
-    def __init__(self, rcal_path):
+    #: Nombre d'enregistrements par paquet par défaut pour les lectures par paquets
+    CHUNK_SIZE = 100
+
+    #: Formats de fichiers disponibles pour `export_all_calc`
+    EXPORT_FORMATS = ['csv', 'csv.gz', 'parquet']
+
+    #: Réductions temporelles disponibles pour `reduce_trans`
+    REDUCTIONS = ['max', 'min', 'time_max', 'time_min', 'mean', 'sum', 'integral', 'time_above', 'time_first_above']
+
+    def __init__(self, rcal_path, use_memmap=False, cache_size_mb=None, nb_threads=1, lazy=False,
+                 use_metadata_cache=False, dtype=None, cache_compression=None):
+        """
+        :param rcal_path: chemin vers le fichier rcal
+        :type rcal_path: str
+        :param use_memmap: lire les fichiers RBIN par projection en mémoire (`np.memmap`)
+        :type use_memmap: bool
+        :param cache_size_mb: taille maximale (en Mo) du cache des enregistrements lus (pas de cache si None)
+        :type cache_size_mb: float
+        :param nb_threads: nombre de threads pour le décodage des enregistrements (lecture séquentielle si 1)
+        :type nb_threads: int
+        :param lazy: lire le fichier rcal au fil de l'eau (`iterparse`) en stockant les temps et positions des
+            enregistrements des calculs transitoires dans des tableaux compacts (adapté aux très longs transitoires)
+        :type lazy: bool
+        :param use_metadata_cache: utiliser un cache sur disque des métadonnées lues (structure, variables et
+            enregistrements), invalidé si la date de modification ou la taille du fichier rcal ou d'un fichier RBIN
+            change. Les calculs transitoires lus depuis le cache sont des `ResCalcTransLazy` et `rcal_root` est None.
+        :type use_metadata_cache: bool
+        :param dtype: précision des résultats décodés (double précision si None) : soit un type de flottant pour
+            toutes les variables (par ex. `np.float32`), soit un dictionnaire avec les noms des variables à réduire
+            et leur type (par ex. `{'Z': np.float32, 'Vact': np.float16}`), les autres variables restant en double
+            précision. Un tableau de résultats a la plus grande précision de ses variables. Attention, `np.float16`
+            n'a que 3 chiffres significatifs et est limité à 65504 (pas adapté aux cotes ni aux volumes).
+        :type dtype: np.dtype or dict(np.dtype)
+        :param cache_compression: algorithme de compression des enregistrements du cache (voir
+            `FrameCache.COMPRESSIONS`), pas de compression si None
+        :type cache_compression: str
+        """
+        if nb_threads < 1:
+            raise ExceptionCrue10("Le nombre de threads doit être strictement positif")
+        self._init_state(rcal_path, cache_size_mb=cache_size_mb, cache_compression=cache_compression,
+                         nb_threads=nb_threads, lazy=lazy)
+
+        if not (use_metadata_cache and self._read_metadata_cache()):
+            if lazy:
+                self._iterparse_rcal()
+            else:
+                self.rcal_root = ET.parse(rcal_path).getroot()
+            self._read_parametrage()
+            self._read_structure()
+            self._read_rescalc()
+            self._set_res_pattern()
+            if use_metadata_cache:
+                self._write_metadata_cache()
+        _, self._res_blocks, _ = get_res_layout(self._res_pattern, self._emh_type_first_branche)
+        self._set_dtypes(dtype)
+
+        if use_memmap:
+            self._rbin_memmap = RbinMemmap(self._res_pattern, self._emh_type_first_branche)
+
+    def _init_state(self, rcal_path, cache_size_mb=None, cache_compression=None, nb_threads=1, lazy=False):
         """
+        Initialiser les attributs communs à tous les lecteurs de résultats (métadonnées vides)
+
         :param rcal_path: chemin vers le fichier rcal
         :type rcal_path: str
+        :param cache_size_mb: taille maximale (en Mo) du cache des enregistrements lus (pas de cache si None)
+        :type cache_size_mb: float
+        :param cache_compression: algorithme de compression des enregistrements du cache
+        :type cache_compression: str
+        :param nb_threads: nombre de threads pour le décodage des enregistrements
+        :type nb_threads: int
+        :param lazy: lecture paresseuse du fichier rcal
+        :type lazy: bool
         """
-        self.rcal_root = ET.parse(rcal_path).getroot()
+        self.rcal_root = None
         self.rcal_path = rcal_path
         self.rcal_folder = os.path.dirname(rcal_path)
         self.emh_types = []
@@ -195,14 +935,23 @@ class ResultatsCalcul:
         self.variables_Zregul = []
         self.res_calc_pseudoperm = OrderedDict()
         self.res_calc_trans = OrderedDict()
+        self.frame_cache = None if cache_size_mb is None else FrameCache(cache_size_mb, cache_compression)
+        self.nb_threads = nb_threads
+        self.lazy = lazy
 
         self._emh_type_first_branche = None
         self._res_pattern = []
+        self._res_blocks = OrderedDict()
+        self._emh_index = {}
+        self._variable_index = {}
+        self._rbin_memmap = None
+        self._dtypes = None
+        self._block_dtypes = {}
 
-        self._read_parametrage()
-        self._read_structure()
-        self._read_rescalc()
-        self._set_res_pattern()
+    @property
+    def use_memmap(self):
+        """Lecture des fichiers RBIN par projection en mémoire"""
+        return self._rbin_memmap is not None
 
     @property
     def run_id(self):
@@ -242,6 +991,117 @@ class ResultatsCalcul:
                     emh_name = sub_elt.get('NomRef')
                     self.emh[emh_sec].append(emh_name)
 
+    def get_rbin_paths(self):
+        """
+        Obtenir la liste triée des fichiers RBIN des calculs
+
+        :rtype: list(str)
+        """
+        rbin_paths = set(calc.file_pos.rbin_path for calc in self.res_calc_pseudoperm.values())
+        for calc in self.res_calc_trans.values():
+            if isinstance(calc, ResCalcTransLazy):
+                rbin_paths.update(calc.rbin_paths)
+            else:
+                rbin_paths.update(file_pos.rbin_path for file_pos in calc.get_file_positions())
+        return sorted(rbin_paths)
+
+    def get_metadata_cache_path(self):
+        """
+        Obtenir le chemin vers le fichier de cache des métadonnées
+
+        :rtype: str
+        """
+        rcal_path = self.rcal_path[:-len('.xml')] if self.rcal_path.endswith('.xml') else self.rcal_path
+        if ResultatsCalcul.METADATA_CACHE_FOLDER is None:
+            return rcal_path + '.metadata.pkl'
+        # Flatten the absolute path to get a unique file name in the cache folder
+        flat_path = re.sub(r'[^0-9A-Za-z_.-]', '_', os.path.abspath(rcal_path))
+        return os.path.join(ResultatsCalcul.METADATA_CACHE_FOLDER, flat_path + '.metadata.pkl')
+
+    def _read_metadata_cache(self):
+        """
+        Lire les métadonnées depuis le cache s'il est à jour
+
+        :return: le cache a été lu
+        :rtype: bool
+        """
+        cache_path = self.get_metadata_cache_path()
+        if not os.path.exists(cache_path):
+            return False
+        try:
+            with io.open(cache_path, 'rb') as in_pickle:
+                metadata = pickle.load(in_pickle)
+            if metadata['version'] != METADATA_CACHE_VERSION or \
+                    metadata['rcal_path'] != os.path.abspath(self.rcal_path) or \
+                    metadata['sources'] != get_files_signature(list(metadata['sources'].keys())):
+                logger.debug("Le cache des métadonnées `%s` n'est pas à jour" % cache_path)
+                return False
+        except (OSError, IOError, EOFError, KeyError, pickle.UnpicklingError) as e:
+            logger.warning("Le cache des métadonnées `%s` est illisible : %s" % (cache_path, e))
+            return False
+
+        for attr in ('emh_types', 'emh', 'variables', 'variables_Qregul', 'variables_Zregul', 'res_calc_pseudoperm',
+                     'res_calc_trans', '_emh_type_first_branche', '_res_pattern'):
+            setattr(self, attr, metadata[attr])
+        self._set_index()
+        return True
+
+    def _write_metadata_cache(self):
+        """Écrire les métadonnées dans le cache (les calculs transitoires sont stockés de manière compacte)"""
+        cache_path = self.get_metadata_cache_path()
+        metadata = {
+            'version': METADATA_CACHE_VERSION,
+            'rcal_path': os.path.abspath(self.rcal_path),
+            'sources': get_files_signature([self.rcal_path] + self.get_rbin_paths()),
+            'emh_types': self.emh_types,
+            'emh': self.emh,
+            'variables': self.variables,
+            'variables_Qregul': self.variables_Qregul,
+            'variables_Zregul': self.variables_Zregul,
+            'res_calc_pseudoperm': self.res_calc_pseudoperm,
+            'res_calc_trans': OrderedDict([(calc_name, ResCalcTransLazy.from_res_calc_trans(calc))
+                                           for calc_name, calc in self.res_calc_trans.items()]),
+            '_emh_type_first_branche': self._emh_type_first_branche,
+            '_res_pattern': self._res_pattern,
+        }
+        try:
+            with io.open(cache_path, 'wb') as out_pickle:
+                pickle.dump(metadata, out_pickle, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, IOError) as e:
+            logger.warning("Le cache des métadonnées `%s` n'a pas pu être écrit : %s" % (cache_path, e))
+
+    def _iterparse_rcal(self):
+        """
+        Lire le fichier rcal au fil de l'eau : les éléments `ResPdt` sont supprimés de l'arbre XML dès qu'ils sont lus
+        et les calculs transitoires sont directement construits en `ResCalcTransLazy`
+        (les noms des fichiers RBIN sont partagés entre tous les enregistrements)
+        """
+        rbin_ids = OrderedDict()  # Href -> index in rbin_paths
+        rbin_paths = []
+        calc_elt = None
+        for event, elt in ET.iterparse(self.rcal_path, events=('start', 'end')):
+            if event == 'start':
+                if self.rcal_root is None:
+                    self.rcal_root = elt
+                elif elt.tag == PREFIX + 'ResCalcTrans':
+                    calc_elt = elt
+                    file_ids, offsets, times = [], [], []
+            elif elt.tag == PREFIX + 'ResPdt':
+                href = elt.get('Href')
+                if href not in rbin_ids:
+                    rbin_ids[href] = len(rbin_paths)
+                    rbin_paths.append(os.path.join(self.rcal_folder, href))
+                file_ids.append(rbin_ids[href])
+                offsets.append(int(elt.get('OffsetMot')))
+                times.append(elt.get('TempsSimu'))
+                del calc_elt[:]
+            elif elt.tag == PREFIX + 'ResCalcTrans':
+                calc_name = calc_elt.get('NomRef')
+                self.res_calc_trans[calc_name] = ResCalcTransLazy(
+                    calc_name, get_times_in_seconds(times), rbin_paths,
+                    np.array(file_ids, dtype=np.int32), np.array(offsets, dtype=np.int64))
+                calc_elt = None
+
     def _read_parametrage(self):
         nb_bytes = int(self.rcal_root.find(PREFIX + 'Parametrage').find(PREFIX + 'NbrOctetMot').text)
         if nb_bytes != FilePosition.FLOAT_SIZE:
@@ -281,12 +1141,28 @@ class ResultatsCalcul:
                         if not sub_elt.tag.endswith('VariableRes'):
                             self._add_emh_names(sub_elt, 'Section')
 
+        self._set_index()
+
+    def _set_index(self):
+        """Construire les tables d'index des EMHs et des variables (pour des recherches en temps constant)"""
+        self._emh_index = {}
+        for emh_type in self.emh_types:
+            for emh_pos, emh_name in enumerate(self.emh[emh_type]):
+                self._emh_index.setdefault(emh_name, (emh_type, emh_pos))
+        self._variable_index = {}
+        for emh_type in self.variables.keys():
+            self._variable_index[emh_type] = {}
+            for var_pos, varname in enumerate(self.variables_extended(emh_type)):
+                self._variable_index[emh_type].setdefault(varname, var_pos)
+
     def _read_rescalc(self):
         for calc in self.rcal_root.find(PREFIX + 'ResCalcPerms'):
             calc_pseudoperm = ResCalcPseudoPerm(calc.get('NomRef'), os.path.join(self.rcal_folder, calc.get('Href')),
                                                 int(calc.get('OffsetMot')))
             self.res_calc_pseudoperm[calc_pseudoperm.name] = calc_pseudoperm
 
+        if self.lazy:
+            return  # transient calculations are already read by `_iterparse_rcal`
         for calc in self.rcal_root.find(PREFIX + 'ResCalcTranss'):
             calc_trans = ResCalcTrans(calc.get('NomRef'))
             for pdt in calc:
@@ -311,26 +1187,295 @@ class ResultatsCalcul:
             return self.variables[emh_type] + self.variables_Qregul + self.variables_Zregul
         return self.variables[emh_type]
 
+    def _set_dtypes(self, dtype):
+        """
+        Définir la précision de chaque variable et de chaque tableau de résultats
+
+        :param dtype: précision des résultats décodés (voir `__init__`)
+        :type dtype: np.dtype or dict(np.dtype)
+        """
+        default_dtype = np.dtype(FilePosition.FLOAT_TYPE)
+        if dtype is None:
+            self._dtypes = None
+            self._block_dtypes = {emh_type: default_dtype for emh_type, _ in self._res_pattern}
+            return
+
+        if isinstance(dtype, dict):
+            var_dtypes = {varname: np.dtype(var_dtype) for varname, var_dtype in dtype.items()}
+            all_varnames = set(varname for emh_type in self.emh_types for varname in self.variables_extended(emh_type))
+            for varname in var_dtypes.keys():
+                if varname not in all_varnames:
+                    raise ExceptionCrue10("La variable `%s` n'a pas de résultats" % varname)
+        else:
+            var_dtypes = None
+            dtype = np.dtype(dtype)
+        for var_dtype in [dtype] if var_dtypes is None else var_dtypes.values():
+            if not np.issubdtype(var_dtype, np.floating):
+                raise ExceptionCrue10("La précision `%s` n'est pas un type de flottant" % var_dtype)
+
+        self._dtypes = {}
+        self._block_dtypes = {}
+        for emh_type, _ in self._res_pattern:
+            varnames = self.variables_extended(emh_type) if emh_type in self.variables else []
+            if var_dtypes is None:
+                self._dtypes[emh_type] = [dtype] * len(varnames)
+            else:
+                self._dtypes[emh_type] = [var_dtypes.get(varname, default_dtype) for varname in varnames]
+            self._block_dtypes[emh_type] = np.result_type(*self._dtypes[emh_type]) if varnames else default_dtype
+
+    def _apply_dtypes(self, emh_type, values):
+        """
+        Appliquer la précision des variables à un tableau de résultats (la dernière dimension correspond aux
+        variables). Les variables moins précises que le tableau sont arrondies à leur précision.
+
+        :param emh_type: type d'EMH secondaire
+        :type emh_type: str
+        :param values: tableau de résultats
+        :type values: np.ndarray
+        :rtype: np.ndarray
+        """
+        if self._dtypes is None:
+            return values
+        block_dtype = self._block_dtypes[emh_type]
+        rounded = [(var_pos, var_dtype) for var_pos, var_dtype in enumerate(self._dtypes[emh_type])
+                   if var_dtype != block_dtype]
+        if values.dtype != block_dtype or (rounded and not values.flags.writeable):
+            values = values.astype(block_dtype)
+        for var_pos, var_dtype in rounded:
+            values[..., var_pos] = values[..., var_pos].astype(var_dtype)
+        return values
+
+    def _apply_selection_dtypes(self, selection, values):
+        """
+        Appliquer la précision des variables sélectionnées à un tableau de valeurs (la dernière dimension
+        correspond à la sélection)
+
+        :param selection: liste de tuples (type d'EMH secondaire, position de l'EMH, position de la variable)
+        :type selection: list(tuple(str, int, int))
+        :param values: tableau de valeurs (shape=(nb_frames, nb_selection))
+        :type values: np.ndarray
+        :rtype: np.ndarray
+        """
+        if self._dtypes is None or not selection:
+            return values
+        dtypes = [self._dtypes[emh_type][var_pos] for emh_type, _, var_pos in selection]
+        values = values.astype(np.result_type(*dtypes))
+        for i, var_dtype in enumerate(dtypes):
+            if var_dtype != values.dtype:
+                values[..., i] = values[..., i].astype(var_dtype)
+        return values
+
     def emh_type(self, emh_name):
-        for emh_type in self.emh_types:
-            if emh_name in self.emh[emh_type]:
-                return emh_type
-        raise ExceptionCrue10("Le type de l'EMH %s n'est pas déterminable, "
-                              "probablement car son nom est mal orthographié." % emh_name)
+        try:
+            return self._emh_index[emh_name][0]
+        except KeyError:
+            raise ExceptionCrue10("Le type de l'EMH %s n'est pas déterminable, "
+                                  "probablement car son nom est mal orthographié." % emh_name)
 
     def get_variable_position(self, emh_type, varname):
         try:
-            return self.variables_extended(emh_type).index(varname)
-        except ValueError:
+            return self._variable_index[emh_type][varname]
+        except KeyError:
             raise ExceptionCrue10("La variable `%s` n'est pas disponible pour les %ss\n"
                                   "Les variables possibles sont : %s"
                                   % (varname, emh_type.lower(), self.variables_extended(emh_type)))
 
     def get_emh_position(self, emh_type, emh_name):
         try:
-            return self.emh[emh_type].index(emh_name)
-        except ValueError:
-            raise ExceptionCrue10("L'EMH `%s` n'est pas dans la liste des %s" % (emh_name, emh_type.lower()))
+            emh_type_found, emh_pos = self._emh_index[emh_name]
+        except KeyError:
+            emh_type_found, emh_pos = None, None
+        if emh_type_found != emh_type:
+            try:
+                return self.emh[emh_type].index(emh_name)  # EMH name shared by several types
+            except (KeyError, ValueError):
+                raise ExceptionCrue10("L'EMH `%s` n'est pas dans la liste des %s" % (emh_name, emh_type.lower()))
+        return emh_pos
+
+    def positions_of(self, emh_names):
+        """
+        Obtenir en une seule fois les types d'EMH secondaires et les positions d'une liste d'EMHs
+
+        :param emh_names: liste des noms d'EMHs
+        :type emh_names: list(str)
+        :return: tableau des types d'EMH secondaires et tableau des positions (utilisables pour de l'indexation)
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        emh_types = np.empty(len(emh_names), dtype=object)
+        positions = np.empty(len(emh_names), dtype=np.int64)
+        for i, emh_name in enumerate(emh_names):
+            try:
+                emh_types[i], positions[i] = self._emh_index[emh_name]
+            except KeyError:
+                raise ExceptionCrue10("Le type de l'EMH %s n'est pas déterminable, "
+                                      "probablement car son nom est mal orthographié." % emh_name)
+        return emh_types, positions
+
+    def section_positions_of(self, section_names):
+        """
+        Obtenir les positions d'une liste de sections
+
+        :param section_names: liste des noms de sections
+        :type section_names: list(str)
+        :return: tableau des positions des sections
+        :rtype: np.ndarray
+        """
+        emh_types, positions = self.positions_of(section_names)
+        for section_name, emh_type in zip(section_names, emh_types):
+            if emh_type != 'Section':
+                raise ExceptionCrue10("L'EMH `%s` n'est pas dans la liste des section" % section_name)
+        return positions
+
+    def get_position_in_frame(self, emh_type, emh_name, varname):
+        """
+        Obtenir la position (en nombre de mots) d'une valeur dans un enregistrement du fichier RBIN
+
+        :param emh_type: type d'EMH secondaire
+        :type emh_type: str
+        :param emh_name: nom de l'EMH
+        :type emh_name: str
+        :param varname: nom de la variable
+        :type varname: str
+        :rtype: int
+        """
+        return self._get_position_in_frame(emh_type, self.get_emh_position(emh_type, emh_name),
+                                           self.get_variable_position(emh_type, varname))
+
+    def _get_position_in_frame(self, emh_type, emh_pos, var_pos):
+        block_offset, (_, nb_var) = self._res_blocks[emh_type]
+        return block_offset + emh_pos * nb_var + var_pos
+
+    def _get_selection(self, emh_type, emh_name, varname):
+        """
+        Obtenir la sélection d'une valeur : tuple (type d'EMH secondaire, position de l'EMH, position de la variable)
+        """
+        return emh_type, self.get_emh_position(emh_type, emh_name), self.get_variable_position(emh_type, varname)
+
+    def _get_trans_values(self, calc_name, selection, frames=None):
+        """
+        Lire uniquement les valeurs sélectionnées pour les temps d'un calcul transitoire
+
+        :param calc_name: nom du calcul transitoire
+        :type calc_name: str
+        :param selection: liste de tuples (type d'EMH secondaire, position de l'EMH, position de la variable)
+        :type selection: list(tuple(str, int, int))
+        :param frames: indices des enregistrements à lire (si absent alors tous sont lus)
+        :type frames: np.ndarray
+        :return: tableau de valeurs (shape=(nb_frames, nb_selection))
+        :rtype: np.ndarray
+        """
+        calc = self.get_res_calc_trans(calc_name)
+        positions = [self._get_position_in_frame(emh_type, emh_pos, var_pos)
+                     for emh_type, emh_pos, var_pos in selection]
+        values = self._get_values_at_positions(calc.get_file_positions(frames), positions, False)
+        return self._apply_selection_dtypes(selection, values)
+
+    def _get_trans_values_at_times(self, calc_name, selection, times):
+        """
+        Obtenir les valeurs sélectionnées interpolées linéairement aux temps demandés
+        (seuls les enregistrements encadrant les temps demandés sont lus)
+
+        :param calc_name: nom du calcul transitoire
+        :type calc_name: str
+        :param selection: liste de tuples (type d'EMH secondaire, position de l'EMH, position de la variable)
+        :type selection: list(tuple(str, int, int))
+        :param times: temps cibles (si absent alors les valeurs de tous les temps du calcul sont renvoyées)
+        :type times: np.ndarray
+        :return: tableau de valeurs (shape=(nb_times, nb_selection))
+        :rtype: np.ndarray
+        """
+        if times is None:
+            return self._get_trans_values(calc_name, selection)
+        frames, idx_before, idx_after, weight = self.get_res_calc_trans(calc_name).get_interpolation(times)
+        values = self._get_trans_values(calc_name, selection, frames=frames)
+        return ResultatsCalcul._interpolate(values, idx_before, idx_after, weight)
+
+    def _get_batch_trans_values(self, requests):
+        """
+        Lire les valeurs sélectionnées de plusieurs requêtes en un seul parcours des fichiers RBIN :
+        les enregistrements de toutes les requêtes sont regroupés (sans doublon) et lus dans l'ordre des fichiers,
+        avec l'union des positions demandées, puis les valeurs sont réparties entre les requêtes.
+
+        :param requests: liste de tuples (nom du calcul transitoire, sélection, indices du premier enregistrement et
+            de celui qui suit le dernier)
+        :type requests: list(tuple(str, list(tuple(str, int, int)), int, int))
+        :return: liste des tableaux de valeurs de chaque requête (shape=(nb_frames, nb_selection))
+        :rtype: list(np.ndarray)
+        """
+        frame_index = OrderedDict()  # (rbin_path, byte_offset) -> index in file_pos_list
+        file_pos_list = []
+        position_index = OrderedDict()  # position in frame -> index in positions
+        plans = []
+        for calc_name, selection, first, last in requests:
+            calc = self.get_res_calc_trans(calc_name)
+            frames = []
+            for file_pos in calc.get_file_positions(slice(first, last)):
+                key = (file_pos.rbin_path, file_pos.byte_offset)
+                if key not in frame_index:
+                    frame_index[key] = len(file_pos_list)
+                    file_pos_list.append(file_pos)
+                frames.append(frame_index[key])
+            positions = [position_index.setdefault(self._get_position_in_frame(emh_type, emh_pos, var_pos),
+                                                   len(position_index))
+                         for emh_type, emh_pos, var_pos in selection]
+            plans.append((selection, np.array(frames, dtype=np.int64), np.array(positions, dtype=np.int64)))
+
+        values = self._get_values_at_positions(file_pos_list, list(position_index.keys()), False)
+        return [self._apply_selection_dtypes(selection, values[np.ix_(frames, positions)])
+                for selection, frames, positions in plans]
+
+    def get_query(self, requests=None):
+        """
+        Obtenir une requête groupée sur les résultats transitoires (voir `ResultatsQuery`)
+
+        :param requests: liste de requêtes (nom du calcul transitoire, liste des EMHs, liste des variables
+            et éventuellement bornes temporelles)
+        :type requests: list(tuple)
+        :rtype: ResultatsQuery
+        """
+        query = ResultatsQuery(self)
+        if requests is not None:
+            for request in requests:
+                query.add_request(*request)
+        return query
+
+    @staticmethod
+    def _interpolate(values, idx_before, idx_after, weight):
+        """Interpolation linéaire selon le premier axe (valeurs exactes pour des poids de 0 ou 1)"""
+        weight = weight.reshape((-1,) + (1,) * (values.ndim - 1))
+        return (values[idx_before] * (1.0 - weight) + values[idx_after] * weight).astype(values.dtype, copy=False)
+
+    def _get_pseudoperm_values(self, selection):
+        """
+        Lire uniquement les valeurs sélectionnées pour tous les calculs pseudo-permanents
+        (en un seul parcours des fichiers RBIN)
+
+        :param selection: liste de tuples (type d'EMH secondaire, position de l'EMH, position de la variable)
+        :type selection: list(tuple(str, int, int))
+        :return: tableau de valeurs (shape=(nb_calc, nb_selection))
+        :rtype: np.ndarray
+        """
+        positions = [self._get_position_in_frame(emh_type, emh_pos, var_pos)
+                     for emh_type, emh_pos, var_pos in selection]
+        file_pos_list = [calc.file_pos for calc in self.res_calc_pseudoperm.values()]
+        return self._apply_selection_dtypes(selection, self._get_values_at_positions(file_pos_list, positions, True))
+
+    def _get_values_at_positions(self, file_pos_list, positions, is_pseudoperm):
+        """
+        Lire uniquement les valeurs demandées de plusieurs enregistrements
+
+        :param file_pos_list: liste des positions des enregistrements
+        :type file_pos_list: list(FilePosition)
+        :param positions: positions des valeurs dans un enregistrement (voir `get_position_in_frame`)
+        :type positions: list(int)
+        :param is_pseudoperm: les données correspondent à un calcul pseudo-permanent
+        :type is_pseudoperm: bool
+        :return: tableau de valeurs (shape=(nb_frames, nb_positions))
+        :rtype: np.ndarray
+        """
+        if self.use_memmap:
+            return self._rbin_memmap.get_values(file_pos_list, positions, is_pseudoperm)
+        return get_values_at_positions(file_pos_list, positions, is_pseudoperm)
 
     def get_res_calc_pseudoperm(self, calc_name):
         """
@@ -386,23 +1531,44 @@ class ResultatsCalcul:
         :rtype: dict(np.ndarray)
         """
         calc = self.get_res_calc_pseudoperm(calc_name)
-        return calc.file_pos.get_data(self._res_pattern, True, self._emh_type_first_branche)
+        emh_types = [emh_type for emh_type, _ in self._res_pattern]
+        if self.frame_cache is not None:
+            res = self._get_frames_with_cache(calc_name, [calc.file_pos], True, emh_types)
+            return {emh_type: values[0, :, :] for emh_type, values in res.items()}
+        if self.use_memmap:
+            res = self._read_frames([calc.file_pos], True, emh_types)
+            return {emh_type: values[0, :, :] for emh_type, values in res.items()}
+        res = calc.file_pos.get_data(self._res_pattern, True, self._emh_type_first_branche)
+        return {emh_type: self._apply_dtypes(emh_type, values) for emh_type, values in res.items()}
 
     def get_data_all_pseudoperm(self):
         """
         Obtenir des tableaux numpy de résultats de tous les calculs pseudo-permanent demandé pour chaque type d'EMH.
         Les tableaux ont 3 dimensions : calcul, emh, variable.
+        Tous les calculs sont lus en un seul parcours des fichiers RBIN (sauf si le cache des enregistrements est
+        activé).
 
         :rtype: dict(np.ndarray)
         """
-        data = {}
-        for idx_calc, calc_name in enumerate(self.res_calc_pseudoperm.keys()):
-            res = self.get_data_pseudoperm(calc_name)
-            if not data:
+        if not self.res_calc_pseudoperm:
+            return {}
+        if self.frame_cache is not None:
+            data = {}
+            for idx_calc, calc_name in enumerate(self.res_calc_pseudoperm.keys()):
+                res = self.get_data_pseudoperm(calc_name)
+                if not data:
+                    for emh_type, values in res.items():
+                        data[emh_type] = np.empty((len(self.res_calc_pseudoperm), values.shape[0], values.shape[1]),
+                                                  dtype=values.dtype)
                 for emh_type, values in res.items():
-                    data[emh_type] = np.empty((len(self.res_calc_pseudoperm), values.shape[0], values.shape[1]))
-            for emh_type, values in res.items():
-                data[emh_type][idx_calc, :, :] = values
+                    data[emh_type][idx_calc, :, :] = values
+            return data
+
+        # All calculations are read at once (in the order of the RBIN files)
+        file_pos_list = [calc.file_pos for calc in self.res_calc_pseudoperm.values()]
+        data = self._read_frames(file_pos_list, True, [emh_type for emh_type, _ in self._res_pattern])
+        if self.use_memmap:
+            data = {emh_type: np.array(values) for emh_type, values in data.items()}  # copies of read-only views
         return data
 
     def extract_profil_long_pseudoperm_as_dataframe(self, calc_name, branches, var_names=None):
@@ -435,8 +1601,8 @@ class ResultatsCalcul:
                 if i == len(branche.liste_sections_dans_branche) - 1:
                     distance += section.xp
 
-        pos_sections = [self.emh['Section'].index(section_name) for section_name in section_names]
-        pos_variables = [self.variables['Section'].index(var) for var in var_names]
+        pos_sections = self.section_positions_of(section_names)
+        pos_variables = [self.get_variable_position('Section', var) for var in var_names]
         array = res_perm[pos_sections, :][:, pos_variables]
 
         values_in_dict = OrderedDict([('branche', branche_names), ('section', section_names),
@@ -478,8 +1644,8 @@ class ResultatsCalcul:
                 if i == len(branche.liste_sections_dans_branche) - 1:
                     distance += section.xp
 
-        pos_sections = [self.emh['Section'].index(section_name) for section_name in section_names]
-        pos_variables = [self.variables['Section'].index(var) for var in var_names]
+        pos_sections = self.section_positions_of(section_names)
+        pos_variables = [self.get_variable_position('Section', var) for var in var_names]
         array = res_trans[pos_sections, :][:, pos_variables]
 
         values_in_dict = OrderedDict([('branche', branche_names), ('section', section_names),
@@ -509,11 +1675,10 @@ class ResultatsCalcul:
         :return: tableau de valeurs du profil en long
         :rtype: pd.DataFrame
         """
-        time = self.get_res_calc_trans(calc_name).time_serie()
-        res = self.get_data_trans(calc_name)['Section']
-        res_max = np.max(res[np.logical_and(start_time <= time, time <= end_time), :, :], axis=0)
-        if associated_time:
-            res_time = np.argmax(res[np.logical_and(start_time <= time, time <= end_time), :, :], axis=0)
+        reductions = self.reduce_trans(calc_name, ['max', 'time_max'], emh_types=['Section'],
+                                       start_time=start_time, end_time=end_time)
+        res_max = reductions['max']['Section']
+        res_time = reductions['time_max']['Section']
 
         if var_names is None:
             var_names = self.variables['Section']
@@ -530,43 +1695,419 @@ class ResultatsCalcul:
                 if i == len(branche.liste_sections_dans_branche) - 1:
                     distance += section.xp
 
-        pos_sections = [self.emh['Section'].index(section_name) for section_name in section_names]
-        pos_variables = [self.variables['Section'].index(var) for var in var_names]
+        pos_sections = self.section_positions_of(section_names)
+        pos_variables = [self.get_variable_position('Section', var) for var in var_names]
         res_max_sub = res_max[pos_sections, :][:, pos_variables]
-        if associated_time:
-            res_time_sub = res_time[pos_sections, :][:, pos_variables]
-            array_time = self.get_res_calc_trans(calc_name).time_serie()
+        res_time_sub = res_time[pos_sections, :][:, pos_variables]
 
         values_in_dict = OrderedDict([('branche', branche_names), ('section', section_names),
                                       ('distance', distances_list)])
         for i, var in enumerate(var_names):
             values_in_dict[var] = res_max_sub[:, i]
             if associated_time:
-                values_in_dict['time_' + var] = array_time[res_time_sub[:, i]]
+                values_in_dict['time_' + var] = res_time_sub[:, i]
         return pd.DataFrame(values_in_dict)
 
-    def get_data_trans(self, calc_name):
+    def get_data_trans(self, calc_name, start_time=-float('inf'), end_time=float('inf')):
         """
         Obtenir des tableaux numpy de résultats du calcul transitoire demandé pour chaque type d'EMH.
         Les tableaux ont 3 dimensions : temps, emh, variable.
+        Seuls les enregistrements de la fenêtre temporelle sont lus.
 
         :param calc_name: nom du calcul
+        :param start_time: borne inférieure temporelle (début du transitoire si absent)
+        :type start_time: float
+        :param end_time: borne supérieure temporelle (fin du transitoire si absent)
+        :type end_time: float
         :return: dict(np.ndarray)
         """
         calc = self.get_res_calc_trans(calc_name)
+        first, last = calc.get_frame_range(start_time, end_time)
+        file_pos_list = calc.get_file_positions(slice(first, last))
+        if self.frame_cache is not None:
+            return self._get_frames_with_cache(calc_name, file_pos_list, False, self.emh_types, first_frame=first)
+        return self._read_frames(file_pos_list, False, self.emh_types)
 
-        # Append arrays
+    def resample_trans(self, calc_name, times, emh_types=None):
+        """
+        Obtenir des tableaux numpy de résultats du calcul transitoire demandé interpolés linéairement aux temps
+        demandés. Seuls les enregistrements encadrant les temps demandés sont lus.
+
+        :param calc_name: nom du calcul transitoire
+        :type calc_name: str
+        :param times: temps cibles (compris entre le premier et le dernier temps du calcul)
+        :type times: np.ndarray
+        :param emh_types: liste des types d'EMH secondaires à extraire (si absent alors tous sont extraits)
+        :type emh_types: list(str)
+        :return: dictionnaire avec les types d'EMH secondaires et le tableau de données
+            (shape=(nb_times, nb_emh, nb_var))
+        :rtype: dict(np.ndarray)
+        """
+        calc = self.get_res_calc_trans(calc_name)
+        if emh_types is None:
+            emh_types = self.emh_types
+        frames, idx_before, idx_after, weight = calc.get_interpolation(times)
+        res = self._read_frames(calc.get_file_positions(frames), False, emh_types)
+        return {emh_type: ResultatsCalcul._interpolate(values, idx_before, idx_after, weight)
+                for emh_type, values in res.items()}
+
+    def iter_frames_trans(self, calc_name, emh_types=None, chunk=None, start_time=-float('inf'),
+                          end_time=float('inf')):
+        """
+        Parcourir les résultats du calcul transitoire demandé par paquets d'enregistrements successifs.
+        Seul un paquet est en mémoire à la fois, ce qui permet de traiter des calculs plus gros que la mémoire.
+        Seuls les enregistrements de la fenêtre temporelle sont lus.
+
+        :param calc_name: nom du calcul transitoire
+        :type calc_name: str
+        :param emh_types: liste des types d'EMH secondaires à extraire (si absent alors tous sont extraits)
+        :type emh_types: list(str)
+        :param chunk: nombre d'enregistrements par paquet (`CHUNK_SIZE` si absent)
+        :type chunk: int
+        :param start_time: borne inférieure temporelle (début du transitoire si absent)
+        :type start_time: float
+        :param end_time: borne supérieure temporelle (fin du transitoire si absent)
+        :type end_time: float
+        :return: générateur de tuples avec les temps du paquet et le dictionnaire des tableaux de résultats par type
+            d'EMH secondaire (shape=(nb_frames_paquet, nb_emh, nb_var))
+        :rtype: generator(tuple(np.ndarray, dict(np.ndarray)))
+        """
+        calc = self.get_res_calc_trans(calc_name)
+        if emh_types is None:
+            emh_types = self.emh_types
+        for emh_type in emh_types:
+            if emh_type not in self.emh_types:
+                raise ExceptionCrue10("Le type d'EMH `%s` n'a pas de résultats\nLes types possibles sont : %s"
+                                      % (emh_type, self.emh_types))
+        if chunk is None:
+            chunk = ResultatsCalcul.CHUNK_SIZE
+        if chunk < 1:
+            raise ExceptionCrue10("Le nombre d'enregistrements par paquet doit être strictement positif")
+
+        time = calc.time_serie()
+        first, last = calc.get_frame_range(start_time, end_time)
+        for start in range(first, last, chunk):
+            end = min(start + chunk, last)
+            file_pos_list = calc.get_file_positions(slice(start, end))
+            if self.frame_cache is not None:
+                res = self._get_frames_with_cache(calc_name, file_pos_list, False, emh_types, first_frame=start)
+            else:
+                res = self._read_frames(file_pos_list, False, emh_types)
+            yield time[start:end], res
+
+    def reduce_trans(self, calc_name, reductions, emh_types=None, start_time=-float('inf'), end_time=float('inf'),
+                     threshold=None, chunk=None):
+        """
+        Calculer plusieurs réductions temporelles d'un calcul transitoire en un seul parcours des enregistrements.
+        Les réductions disponibles sont (voir `REDUCTIONS`) :
+
+        - `max`, `min` : valeurs maximale et minimale
+        - `time_max`, `time_min` : temps (premier atteint) des valeurs maximale et minimale (NaN si toutes les
+          valeurs sont NaN, les temps sont alors des flottants)
+        - `mean`, `sum` : moyenne et somme des valeurs des enregistrements
+        - `integral` : intégrale temporelle (méthode des trapèzes)
+        - `time_above` : durée de dépassement du seuil (avec interpolation linéaire entre les enregistrements)
+        - `time_first_above` : premier temps où le seuil est dépassé (NaN s'il n'est jamais dépassé)
+
+        :param calc_name: nom du calcul transitoire
+        :type calc_name: str
+        :param reductions: liste des réductions à calculer
+        :type reductions: list(str)
+        :param emh_types: liste des types d'EMH secondaires (si absent alors tous sont traités)
+        :type emh_types: list(str)
+        :param start_time: borne inférieure temporelle (début du transitoire si absent)
+        :type start_time: float
+        :param end_time: borne supérieure temporelle (fin du transitoire si absent)
+        :type end_time: float
+        :param threshold: seuil pour les réductions de dépassement : une valeur pour tous les types d'EMH ou un
+            dictionnaire par type d'EMH secondaire de tableaux compatibles avec la shape (nb_emh, nb_var)
+        :type threshold: float or dict(np.ndarray)
+        :param chunk: nombre d'enregistrements par paquet (`CHUNK_SIZE` si absent)
+        :type chunk: int
+        :return: dictionnaire par réduction de dictionnaires par type d'EMH secondaire avec les tableaux de valeurs
+            (shape=(nb_emh, nb_var))
+        :rtype: OrderedDict(dict(np.ndarray))
+        """
+        for reduction in reductions:
+            if reduction not in ResultatsCalcul.REDUCTIONS:
+                raise ExceptionCrue10("La réduction `%s` n'existe pas\nLes réductions possibles sont : %s"
+                                      % (reduction, ResultatsCalcul.REDUCTIONS))
+        if emh_types is None:
+            emh_types = self.emh_types
+        with_threshold = 'time_above' in reductions or 'time_first_above' in reductions
+        if with_threshold:
+            if threshold is None:
+                raise ExceptionCrue10("Un seuil est nécessaire pour les réductions de dépassement")
+            if not isinstance(threshold, dict):
+                threshold = {emh_type: threshold for emh_type in emh_types}
+
+        states = {}
+        for emh_type in emh_types:
+            shape = self._res_blocks[emh_type][1]
+            states[emh_type] = {
+                'max': np.full(shape, -np.inf),
+                'min': np.full(shape, np.inf),
+                'time_max': np.full(shape, np.nan),
+                'time_min': np.full(shape, np.nan),
+                'sum': np.zeros(shape),
+                'integral': np.zeros(shape),
+                'time_above': np.zeros(shape),
+                'time_first_above': np.full(shape, np.nan),
+            }
+        nb_frames = 0
+        previous_time = None
+        previous_values = {}
+
+        for time, res in self.iter_frames_trans(calc_name, emh_types=emh_types, chunk=chunk,
+                                                start_time=start_time, end_time=end_time):
+            for emh_type in emh_types:
+                values = res[emh_type]
+                state = states[emh_type]
+                if 'max' in reductions or 'time_max' in reductions:
+                    idx_max = np.argmax(values, axis=0)
+                    chunk_max = np.take_along_axis(values, idx_max[np.newaxis, :, :], axis=0)[0]
+                    is_greater = chunk_max > state['max']
+                    state['max'] = np.where(is_greater, chunk_max, state['max'])
+                    state['time_max'] = np.where(is_greater, time[idx_max], state['time_max'])
+                if 'min' in reductions or 'time_min' in reductions:
+                    idx_min = np.argmin(values, axis=0)
+                    chunk_min = np.take_along_axis(values, idx_min[np.newaxis, :, :], axis=0)[0]
+                    is_lower = chunk_min < state['min']
+                    state['min'] = np.where(is_lower, chunk_min, state['min'])
+                    state['time_min'] = np.where(is_lower, time[idx_min], state['time_min'])
+                if 'sum' in reductions or 'mean' in reductions:
+                    state['sum'] += np.sum(values, axis=0)
+
+                # Integrals over the intervals between frames (including the one with the previous chunk)
+                if 'integral' in reductions or 'time_above' in reductions:
+                    if previous_time is None:
+                        time_ext, values_ext = time, values
+                    else:
+                        time_ext = np.concatenate(([previous_time], time))
+                        values_ext = np.concatenate((previous_values[emh_type][np.newaxis, :, :], values))
+                    dt = np.diff(time_ext)[:, np.newaxis, np.newaxis]
+                    if 'integral' in reductions:
+                        state['integral'] += np.sum(0.5 * (values_ext[1:] + values_ext[:-1]) * dt, axis=0)
+                    if 'time_above' in reductions:
+                        state['time_above'] += np.sum(ResultatsCalcul._duration_above(
+                            values_ext[:-1] - threshold[emh_type], values_ext[1:] - threshold[emh_type], dt), axis=0)
+                if 'time_first_above' in reductions:
+                    is_above = values > threshold[emh_type]
+                    time_first = time[np.argmax(is_above, axis=0)]
+                    is_first = np.logical_and(np.isnan(state['time_first_above']), is_above.any(axis=0))
+                    state['time_first_above'] = np.where(is_first, time_first, state['time_first_above'])
+                previous_values[emh_type] = np.array(values[-1, :, :])
+            previous_time = time[-1]
+            nb_frames += len(time)
+
+        if nb_frames == 0:
+            raise ExceptionCrue10("Aucun temps du calcul `%s` n'est compris entre %s et %s"
+                                  % (calc_name, start_time, end_time))
+        results = OrderedDict()
+        for reduction in reductions:
+            results[reduction] = {}
+            for emh_type in emh_types:
+                if reduction == 'mean':
+                    results[reduction][emh_type] = states[emh_type]['sum'] / nb_frames
+                elif reduction in ('time_max', 'time_min'):
+                    times = states[emh_type][reduction]
+                    if np.isfinite(times).all():  # same type as the time serie (NaN has to be kept otherwise)
+                        times = times.astype(previous_time.dtype)
+                    results[reduction][emh_type] = times
+                else:
+                    results[reduction][emh_type] = states[emh_type][reduction]
+        return results
+
+    def extract_dyke_exceedance_as_dataframe(self, calc_name, section_names, crest_levels, freeboards=0.0,
+                                             varname='Z', start_time=-float('inf'), end_time=float('inf'), chunk=None):
+        """
+        Calculer le dépassement des crêtes de digues aux sections demandées en un seul parcours d'un calcul
+        transitoire. Il y a dépassement lorsque la marge (`varname + revanche - cote de crête`) est positive.
+
+        Les colonnes du tableau sont :
+
+        - `section`, `crest_level`, `freeboard` : données d'entrée
+        - `time_first_above` et `z_first_above` : premier temps de dépassement et valeur associée (NaN sinon)
+        - `time_above` : durée de dépassement (avec interpolation linéaire entre les enregistrements)
+        - `margin_max` et `time_margin_max` : marge maximale et temps associé
+
+        :param calc_name: nom du calcul transitoire
+        :type calc_name: str
+        :param section_names: liste des noms de sections (une même section peut apparaître plusieurs fois)
+        :type section_names: list(str)
+        :param crest_levels: cotes de crête des digues
+        :type crest_levels: np.ndarray
+        :param freeboards: revanches (ajoutées à la variable) : une valeur ou une valeur par section
+        :type freeboards: float or np.ndarray
+        :param varname: nom de la variable aux sections
+        :type varname: str
+        :param start_time: borne inférieure temporelle (début du transitoire si absent)
+        :type start_time: float
+        :param end_time: borne supérieure temporelle (fin du transitoire si absent)
+        :type end_time: float
+        :param chunk: nombre d'enregistrements par paquet (`CHUNK_SIZE` si absent)
+        :type chunk: int
+        :rtype: pd.DataFrame
+        """
+        positions = self.section_positions_of(section_names)
+        var_pos = self.get_variable_position('Section', varname)
+        crest_levels = np.asarray(crest_levels, dtype=np.float64)
+        if crest_levels.shape != positions.shape:
+            raise ExceptionCrue10("Il faut autant de cotes de crête (%i) que de sections (%i)"
+                                  % (len(crest_levels), len(positions)))
+        freeboards = np.broadcast_to(np.asarray(freeboards, dtype=np.float64), crest_levels.shape)
+
+        indices = np.arange(len(positions))
+        time_first_above = np.full(len(positions), np.nan)
+        z_first_above = np.full(len(positions), np.nan)
+        time_above = np.zeros(len(positions))
+        margin_max = np.full(len(positions), -np.inf)
+        time_margin_max = np.full(len(positions), np.nan)
+        nb_frames = 0
+        previous_time = None
+        previous_margin = None
+
+        for time, res in self.iter_frames_trans(calc_name, emh_types=['Section'], chunk=chunk,
+                                                start_time=start_time, end_time=end_time):
+            values = res['Section'][:, positions, var_pos]  # shape=(nb_frames_chunk, nb_sections)
+            margin = (values + freeboards) - crest_levels
+
+            idx_max = np.argmax(margin, axis=0)
+            is_greater = margin[idx_max, indices] > margin_max
+            margin_max = np.where(is_greater, margin[idx_max, indices], margin_max)
+            time_margin_max = np.where(is_greater, time[idx_max], time_margin_max)
+
+            is_above = margin > 0
+            idx_first = np.argmax(is_above, axis=0)
+            is_first = np.logical_and(np.isnan(time_first_above), is_above.any(axis=0))
+            time_first_above = np.where(is_first, time[idx_first], time_first_above)
+            z_first_above = np.where(is_first, values[idx_first, indices], z_first_above)
+
+            if previous_time is None:
+                time_ext, margin_ext = time, margin
+            else:
+                time_ext = np.concatenate(([previous_time], time))
+                margin_ext = np.concatenate((previous_margin[np.newaxis, :], margin))
+            time_above += np.sum(ResultatsCalcul._duration_above(margin_ext[:-1], margin_ext[1:],
+                                                                 np.diff(time_ext)[:, np.newaxis]), axis=0)
+            previous_time = time[-1]
+            previous_margin = margin[-1, :]
+            nb_frames += len(time)
+
+        if nb_frames == 0:
+            raise ExceptionCrue10("Aucun temps du calcul `%s` n'est compris entre %s et %s"
+                                  % (calc_name, start_time, end_time))
+        return pd.DataFrame(OrderedDict([
+            ('section', list(section_names)),
+            ('crest_level', crest_levels),
+            ('freeboard', freeboards),
+            ('time_first_above', time_first_above),
+            ('z_first_above', z_first_above),
+            ('time_above', time_above),
+            ('margin_max', margin_max),
+            ('time_margin_max', time_margin_max),
+        ]))
+
+    @staticmethod
+    def _duration_above(delta_start, delta_end, dt):
+        """
+        Durée de dépassement d'un seuil sur des intervalles de temps, en interpolant linéairement le temps de
+        franchissement du seuil
+
+        :param delta_start: écart au seuil au début des intervalles
+        :type delta_start: np.ndarray
+        :param delta_end: écart au seuil à la fin des intervalles
+        :type delta_end: np.ndarray
+        :param dt: durée des intervalles
+        :type dt: np.ndarray
+        :rtype: np.ndarray
+        """
+        is_above_start = delta_start > 0
+        is_above_end = delta_end > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(is_above_start, delta_start, delta_end) / np.abs(delta_start - delta_end)
+        fraction = np.where(is_above_start == is_above_end, is_above_start.astype(float), fraction)
+        return fraction * dt
+
+    def _read_frames(self, file_pos_list, is_pseudoperm, emh_types):
+        """
+        Lire les tableaux de résultats de plusieurs enregistrements
+
+        :param file_pos_list: liste des positions des enregistrements
+        :type file_pos_list: list(FilePosition)
+        :param is_pseudoperm: les données correspondent à un calcul pseudo-permanent
+        :type is_pseudoperm: bool
+        :param emh_types: liste des types d'EMH secondaires à extraire
+        :type emh_types: list(str)
+        :return: dictionnaire avec les types d'EMH secondaires et le tableau de données
+            (shape=(nb_frames, nb_emh, nb_var))
+        :rtype: dict(np.ndarray)
+        """
+        if self.use_memmap:
+            res_all = self._rbin_memmap.get_data(file_pos_list, is_pseudoperm, emh_types)
+            return {emh_type: self._apply_dtypes(emh_type, values) for emh_type, values in res_all.items()}
+
+        # Fill preallocated arrays (values are converted to the precision of the arrays while decoding)
         res_all = {}
-        for i, (time_sec, file_pos) in enumerate(calc.frame_list):
-            res = file_pos.get_data(self._res_pattern, False, self._emh_type_first_branche)
-            for emh_type in self.emh_types:
-                if i == 0:
-                    res_all[emh_type] = []
-                res_all[emh_type].append(res[emh_type])
-
-        # Stack arrays
-        for emh_type in self.emh_types:
-            res_all[emh_type] = np.array(res_all[emh_type])
+        for emh_type in emh_types:
+            _, (nb_emh, nb_var) = self._res_blocks[emh_type]
+            res_all[emh_type] = np.empty((len(file_pos_list), nb_emh, nb_var), dtype=self._block_dtypes[emh_type])
+
+        res_layout = get_res_layout(self._res_pattern, self._emh_type_first_branche)
+
+        def read_batch(start, end):
+            read_frames(file_pos_list, res_layout, is_pseudoperm, res_all, indices=range(start, end))
+
+        nb_batches = min(self.nb_threads, len(file_pos_list))
+        if nb_batches <= 1:
+            read_batch(0, len(file_pos_list))
+        else:
+            # Contiguous batches of frames, each one decoded by a thread into its own slice of the arrays
+            bounds = np.linspace(0, len(file_pos_list), nb_batches + 1).astype(int)
+            with ThreadPoolExecutor(max_workers=nb_batches) as executor:
+                futures = [executor.submit(read_batch, start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+                for future in futures:
+                    future.result()  # raise exceptions from threads
+        return {emh_type: self._apply_dtypes(emh_type, values) for emh_type, values in res_all.items()}
+
+    def _get_frames_with_cache(self, calc_name, file_pos_list, is_pseudoperm, emh_types, first_frame=0):
+        """
+        Obtenir les tableaux de résultats de plusieurs enregistrements d'un calcul en passant par le cache :
+        seuls les enregistrements absents du cache sont lus (puis ajoutés au cache)
+
+        :param calc_name: nom du calcul
+        :type calc_name: str
+        :param file_pos_list: liste des positions des enregistrements du calcul
+        :type file_pos_list: list(FilePosition)
+        :param is_pseudoperm: les données correspondent à un calcul pseudo-permanent
+        :type is_pseudoperm: bool
+        :param emh_types: liste des types d'EMH secondaires à extraire
+        :type emh_types: list(str)
+        :param first_frame: index du premier enregistrement de `file_pos_list` dans le calcul
+        :type first_frame: int
+        :return: dictionnaire avec les types d'EMH secondaires et le tableau de données
+            (shape=(nb_frames, nb_emh, nb_var))
+        :rtype: dict(np.ndarray)
+        """
+        frames = [self.frame_cache.get((calc_name, first_frame + i)) for i in range(len(file_pos_list))]
+        missing = [i for i, frame in enumerate(frames) if frame is None]
+        if missing:
+            all_emh_types = [emh_type for emh_type, _ in self._res_pattern]
+            res = self._read_frames([file_pos_list[i] for i in missing], is_pseudoperm, all_emh_types)
+            for j, i in enumerate(missing):
+                frame = {}
+                for emh_type in all_emh_types:
+                    frame[emh_type] = np.array(res[emh_type][j, :, :])
+                    frame[emh_type].setflags(write=False)
+                self.frame_cache.put((calc_name, first_frame + i), frame)
+                frames[i] = frame
+
+        res_all = {}
+        for emh_type in emh_types:
+            _, (nb_emh, nb_var) = self._res_blocks[emh_type]
+            res_all[emh_type] = np.empty((len(frames), nb_emh, nb_var), dtype=self._block_dtypes[emh_type])
+            for i, frame in enumerate(frames):
+                res_all[emh_type][i, :, :] = frame[emh_type]
         return res_all
 
     def get_all_pseudoperm_var_at_emhs_as_array(self, varname, emh_list):
@@ -581,24 +2122,15 @@ class ResultatsCalcul:
         :return: tableau numpy (lignes = calculs pseudo-permanents, colonnes = EMHs)
         :rtype: np.ndarray
         """
-        values = np.empty((len(self.res_calc_pseudoperm), len(emh_list)))
-
-        emh_types = []
-        for emh_name in emh_list:
-            emh_types.append(self.emh_type(emh_name))
+        emh_types, emh_positions = self.positions_of(emh_list)
+        selection = [(emh_type, emh_pos, self.get_variable_position(emh_type, varname))
+                     for emh_type, emh_pos in zip(emh_types, emh_positions)]
+        return self._get_pseudoperm_values(selection)
 
-        for i, calc_name in enumerate(self.res_calc_pseudoperm.keys()):
-            res = self.get_data_pseudoperm(calc_name)
-            for j, (emh_name, emh_type) in enumerate(zip(emh_list, emh_types)):
-                emh_pos = self.get_emh_position(emh_type, emh_name)
-                var_pos = self.get_variable_position(emh_type, varname)
-                values[i, j] = res[emh_type][emh_pos, var_pos]
-        return values
-
-    def get_trans_var_at_emhs_as_array(self, calc_name, varname, emh_list):
+    def get_trans_var_at_emhs_as_array(self, calc_name, varname, emh_list, times=None):
         """
         Obtenir un tableau numpy avec les valeurs numériques de la variable demandée aux EMHs pour l'ensemble des
-        temps du calcul transitoire demandé
+        temps du calcul transitoire demandé (ou interpolées linéairement aux temps demandés)
 
         :param calc_name: nom du calcul transitoire
         :type calc_name: str
@@ -606,22 +2138,13 @@ class ResultatsCalcul:
         :type varname: str
         :param emh_list: liste des EMHs concernées
         :type emh_list: list(str)
-        :return: tableau numpy (lignes = temps du calcul transitoire, colonnes = EMHs)
+        :param times: temps cibles (si absent alors tous les temps du calcul sont pris)
+        :type times: np.ndarray
+        :return: tableau numpy (lignes = temps du calcul transitoire ou temps cibles, colonnes = EMHs)
         :rtype: np.ndarray
         """
-        calc = self.get_res_calc_trans(calc_name)
-        values = np.empty((len(calc.frame_list), len(emh_list)))
-
-        emh_types = []
-        for emh_name in emh_list:
-            emh_types.append(self.emh_type(emh_name))
-
-        res = self.get_data_trans(calc_name)
-        for i, (emh_name, emh_type) in enumerate(zip(emh_list, emh_types)):
-            emh_pos = self.get_emh_position(emh_type, emh_name)
-            var_pos = self.get_variable_position(emh_type, varname)
-            values[:, i] = res[emh_type][:, emh_pos, var_pos]
-        return values
+        selection = [self._get_selection(self.emh_type(emh_name), emh_name, varname) for emh_name in emh_list]
+        return self._get_trans_values_at_times(calc_name, selection, times)
 
     def get_all_pseudoperm_vars_at_emh_as_array(self, emh_name, varname_list=None):
         """
@@ -636,22 +2159,15 @@ class ResultatsCalcul:
         :rtype: np.ndarray
         """
         emh_type = self.emh_type(emh_name)
-        emh_pos = self.get_emh_position(emh_type, emh_name)
         if varname_list is None:
             varname_list = self.variables_extended(emh_type)
-        varpos_list = [self.get_variable_position(emh_type, varname) for varname in varname_list]
-
-        values = np.empty((len(self.res_calc_pseudoperm), len(varname_list)))
-
-        for i, calc_name in enumerate(self.res_calc_pseudoperm.keys()):
-            res = self.get_data_pseudoperm(calc_name)
-            values[i, :] = res[emh_type][emh_pos, varpos_list]
-        return values
+        selection = [self._get_selection(emh_type, emh_name, varname) for varname in varname_list]
+        return self._get_pseudoperm_values(selection)
 
-    def get_trans_vars_at_emh_as_array(self, calc_name, emh_name, varname_list=None):
+    def get_trans_vars_at_emh_as_array(self, calc_name, emh_name, varname_list=None, times=None):
         """
         Obtenir un tableau numpy avec les valeurs numériques des variables demandées à l'EMH souhaitée
-        pour l'ensemble des temps du calcul transitoire demandé
+        pour l'ensemble des temps du calcul transitoire demandé (ou interpolées linéairement aux temps demandés)
 
         :param calc_name: nom du calcul transitoire
         :type calc_name: str
@@ -659,21 +2175,22 @@ class ResultatsCalcul:
         :type emh_name: str
         :param varname_list: liste des variables à extraire
         :type varname: list(str)
-        :return: tableau numpy (lignes = temps du calcul transitoire, colonnes = variables)
+        :param times: temps cibles (si absent alors tous les temps du calcul sont pris)
+        :type times: np.ndarray
+        :return: tableau numpy (lignes = temps du calcul transitoire ou temps cibles, colonnes = variables)
         :rtype: np.ndarray
         """
         emh_type = self.emh_type(emh_name)
-        emh_pos = self.get_emh_position(emh_type, emh_name)
         if varname_list is None:
             varname_list = self.variables_extended(emh_type)
-        varpos_list = [self.get_variable_position(emh_type, varname) for varname in varname_list]
-
-        res = self.get_data_trans(calc_name)
-        return res[emh_type][:, emh_pos, varpos_list]
+        selection = [self._get_selection(emh_type, emh_name, varname) for varname in varname_list]
+        return self._get_trans_values_at_times(calc_name, selection, times)
 
     def extract_res_trans_as_dataframe(self, lst_var, lst_emh):
         """
-        Exports as DataFrame tabular results: time, val1, val2, etc. where each vali stands for a varname for an EMH.
+        Exports as DataFrame tabular results: calc, time, val1, val2, etc.
+        where each vali stands for a varname for an EMH.
+        The results of all transient calculations are concatenated (each calculation is read only once).
 
         :param lst_var: liste des noms de variables à extraire
         :type lst_var: list(str)
@@ -682,34 +2199,186 @@ class ResultatsCalcul:
         :return: DataFrame avec le tableau des résultats, un pas de temps par ligne.
         :rtype: pd.DataFrame
         """
-        # Parcours des calculs
+        # Résolution des couples (EMH, variable) valides
+        # Les colonnes sont nommées par le nom de variable et le nom d'EMH (exemple 'Z St_P146.0a')
+        columns = OrderedDict()
+        for emh_name in lst_emh:
+            for var_name in lst_var:
+                try:
+                    emh_type = self.emh_type(emh_name)
+                    columns[var_name + " " + emh_name] = self._get_selection(emh_type, emh_name, var_name)
+                except ExceptionCrue10:
+                    # A priori, incompatibilité entre nom de variable et type d'EHM: pas grave, on ne sort juste pas ces résultats
+                    pass
+        selection = list(columns.values())
+
+        # Parcours des calculs (chaque calcul n'est lu qu'une seule fois)
+        lst_df = []
         for cal_name in self.res_calc_trans.keys():
-            # Préparation des dictionnaires de listes
-            dic_res = {}  # Dictionnaire des résultats, sous forme d'un dictionnaire de listes ayant chacune la dimension du nombre de pdt (pas de temps)
             lst_time = self.get_res_calc_trans(cal_name).time_serie()
-            lst_calc = []
-            for i in range(len(lst_time)):
-                lst_calc.append(cal_name)
-            dic_res['Calcul'] = lst_calc  # La première colonne est le nom du calcul
+            values = self._get_trans_values(cal_name, selection)
+            dic_res = OrderedDict()
+            dic_res['Calcul'] = [cal_name] * len(lst_time)  # La première colonne est le nom du calcul
             dic_res['Temps'] = lst_time  # La deuxième colonne est le pdt dans le calcul
-            for emh_name in lst_emh:
-                for var_name in lst_var:
-                    try:
-                        # Les colonnes suivantes sont les valeurs pour chaque nom de variable et nom d'EMH (exemple 'Z St_P146.0a')
-                        lst_emh_name = []
-                        lst_emh_name.append(emh_name)  # On a besoin d'une liste de noms d'EHM avec un seul élément
-                        lst_res = self.get_trans_var_at_emhs_as_array(cal_name, var_name, lst_emh_name)  # Récupération d'une liste de listes (chacune à un seul élément)
-                        lst_res_1d = []
-                        for itm_res in lst_res:
-                            lst_res_1d.append(itm_res[0])  # Chaque ligne de la liste est elle-même une liste à un élément, on le récupère
-                        if len(lst_res_1d) > 0:
-                            dic_res[var_name + " " + emh_name] = lst_res_1d  # L'entrée du dictionnaire (exemple 'Z St_P146.0a') contient la liste des valeurs pour chaque pdt
-                    except ExceptionCrue10:
-                        # A priori, incompatibilité entre nom de variable et type d'EHM: pas grave, on ne sort juste pas ces résultats
-                        pass
-
-            # Le DataFrame en retour est construit à partir d'un dictionnaire de listes
-            return pd.DataFrame(dic_res)  # DataFrame (=tableau de valeurs structuré, Pandas)
+            if len(lst_time) > 0:
+                for i, column in enumerate(columns.keys()):
+                    dic_res[column] = values[:, i]
+            lst_df.append(pd.DataFrame(dic_res))
+
+        if not lst_df:
+            return pd.DataFrame(columns=['Calcul', 'Temps'] + list(columns.keys()))
+        # Le DataFrame en retour est la concaténation des tableaux de chaque calcul
+        return pd.concat(lst_df, ignore_index=True)
+
+    def _iter_res_as_dataframes(self, calc_type, layout):
+        """
+        Parcourir les résultats de tous les calculs d'un type sous forme de tableaux successifs.
+        L'ordre des lignes est : calcul, type d'EMH, temps, EMH (et variable pour le format long).
+
+        :param calc_type: type de calcul ('pseudoperm' ou 'trans')
+        :type calc_type: str
+        :param layout: format du tableau ('long' ou 'wide')
+        :type layout: str
+        :rtype: generator(pd.DataFrame)
+        """
+        emh_types = [emh_type for emh_type in self.emh_types if self.variables[emh_type]]
+        all_variables = []
+        for emh_type in emh_types:
+            for variable in self.variables[emh_type]:
+                if variable not in all_variables:
+                    all_variables.append(variable)
+
+        def build_dataframe(calc_name, time, emh_type, values):
+            # values has shape=(nb_time, nb_emh, nb_var)
+            variables = self.variables[emh_type]
+            values = values[:, :, :len(variables)]
+            nb_time, nb_emh, nb_var = values.shape
+            emh_names = np.array(self.emh[emh_type], dtype=object)
+            if layout == 'long':
+                return pd.DataFrame(OrderedDict([
+                    ('calc', np.full(nb_time * nb_emh * nb_var, calc_name, dtype=object)),
+                    ('time', np.repeat(time, nb_emh * nb_var)),
+                    ('emh_type', np.full(nb_time * nb_emh * nb_var, emh_type, dtype=object)),
+                    ('emh', np.tile(np.repeat(emh_names, nb_var), nb_time)),
+                    ('variable', np.tile(np.array(variables, dtype=object), nb_time * nb_emh)),
+                    ('value', values.ravel()),
+                ]))
+            else:
+                columns = OrderedDict([
+                    ('calc', np.full(nb_time * nb_emh, calc_name, dtype=object)),
+                    ('time', np.repeat(time, nb_emh)),
+                    ('emh_type', np.full(nb_time * nb_emh, emh_type, dtype=object)),
+                    ('emh', np.tile(emh_names, nb_time)),
+                ])
+                for variable in all_variables:
+                    if variable in variables:
+                        columns[variable] = values[:, :, variables.index(variable)].ravel()
+                    else:
+                        columns[variable] = np.full(nb_time * nb_emh, np.nan)
+                return pd.DataFrame(columns)
+
+        if calc_type == 'pseudoperm':
+            for i_calc, calc_name in enumerate(self.res_calc_pseudoperm.keys()):
+                res = self.get_data_pseudoperm(calc_name)
+                for emh_type in emh_types:
+                    yield build_dataframe(calc_name, np.array([i_calc + 1]), emh_type, res[emh_type][np.newaxis])
+        elif calc_type == 'trans':
+            if not emh_types:
+                return
+            for calc_name in self.res_calc_trans.keys():
+                # Frames are read only once: the first EMH type is yielded directly whereas the other ones are
+                # written in temporary files to be yielded afterwards (to keep rows grouped by EMH type)
+                other_files = OrderedDict([(emh_type, TemporaryFile()) for emh_type in emh_types[1:]])
+                try:
+                    chunks = []  # times and arrays (shape, dtype) of each chunk
+                    for time, res in self.iter_frames_trans(calc_name, emh_types=emh_types):
+                        chunks.append((time, {emh_type: (res[emh_type].shape, res[emh_type].dtype)
+                                              for emh_type in other_files}))
+                        for emh_type, tmp_file in other_files.items():
+                            tmp_file.write(np.ascontiguousarray(res[emh_type]).tobytes())
+                        yield build_dataframe(calc_name, time, emh_types[0], res[emh_types[0]])
+                    for emh_type, tmp_file in other_files.items():
+                        tmp_file.seek(0)
+                        for time, arrays in chunks:
+                            shape, dtype = arrays[emh_type]
+                            values = np.frombuffer(tmp_file.read(int(np.prod(shape)) * dtype.itemsize), dtype=dtype)
+                            yield build_dataframe(calc_name, time, emh_type, values.reshape(shape))
+                finally:
+                    for tmp_file in other_files.values():
+                        tmp_file.close()
+        else:
+            raise ExceptionCrue10("Le type de calcul `%s` n'existe pas (les types possibles sont : pseudoperm, trans)"
+                                  % calc_type)
+
+    def export_all_calc(self, file_path, calc_type, file_format=None, layout='long'):
+        """
+        Exporter les résultats de tous les calculs d'un type dans un fichier, par paquets successifs
+        (les tableaux sont construits de manière vectorisée).
+
+        Le format long a pour en-tête : "calc;time;emh_type;emh;variable;value".
+        Le format large a une ligne par EMH et par temps avec une colonne par variable : "calc;time;emh_type;emh;Q;Z..."
+        (les valeurs des variables non disponibles pour un type d'EMH sont vides).
+
+        Pour les calculs pseudo-permanents, le temps correspond au numéro du calcul.
+
+        :param file_path: chemin vers le fichier de sortie
+        :type file_path: str
+        :param calc_type: type de calcul ('pseudoperm' ou 'trans')
+        :type calc_type: str
+        :param file_format: format du fichier (voir `EXPORT_FORMATS`), déduit de l'extension du fichier si absent
+        :type file_format: str
+        :param layout: format du tableau ('long' ou 'wide')
+        :type layout: str
+        :return: nombre de lignes écrites
+        :rtype: int
+        """
+        if file_format is None:
+            for ext in sorted(ResultatsCalcul.EXPORT_FORMATS, key=len, reverse=True):
+                if file_path.endswith('.' + ext):
+                    file_format = ext
+                    break
+        if file_format not in ResultatsCalcul.EXPORT_FORMATS:
+            raise ExceptionCrue10("Le format `%s` n'est pas supporté (les formats possibles sont : %s)"
+                                  % (file_format, ', '.join(ResultatsCalcul.EXPORT_FORMATS)))
+        if layout not in ('long', 'wide'):
+            raise ExceptionCrue10("Le format de tableau `%s` n'existe pas (les formats possibles sont : long, wide)"
+                                  % layout)
+
+        start = perf_counter()
+        nb_rows = 0
+        na_rep = 'nan' if layout == 'long' else ''
+        if file_format == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:  # ModuleNotFoundError not available in Python2
+                raise ExceptionCrue10("Le module pyarrow ne fonctionne pas !")
+            writer = None
+            try:
+                for df in self._iter_res_as_dataframes(calc_type, layout):
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(file_path, table.schema)
+                    writer.write_table(table)
+                    nb_rows += len(df)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            if file_format == 'csv.gz':
+                out_file = gzip.open(file_path, mode='wt', newline='')
+            else:
+                out_file = open(file_path, mode='w', newline='')
+            with out_file:
+                for df in self._iter_res_as_dataframes(calc_type, layout):
+                    df.to_csv(out_file, sep=CSV_DELIMITER, index=False, header=(nb_rows == 0),
+                              float_format=FMT_FLOAT_CSV, na_rep=na_rep, lineterminator='\r\n')
+                    nb_rows += len(df)
+
+        duration = perf_counter() - start
+        logger.debug("Export de %i lignes en %.1f s (%.2f millions de lignes/s)"
+                     % (nb_rows, duration, nb_rows / max(duration, 1e-9) / 1e6))
+        return nb_rows
 
     def write_all_calc_pseudoperm_in_csv(self, csv_path):
         """
@@ -719,26 +2388,7 @@ class ResultatsCalcul:
         :param csv_path: chemin vers le fichier CSV
         :type csv_path: str
         """
-        if version_info[0] == 3:   # Python2 fix
-            arguments = {'mode': 'w', 'newline': ''}
-        else:
-            arguments = {'mode': 'wb'}
-        with open(csv_path, **arguments) as csv_file:
-            fieldnames = ['calc', 'time', 'emh_type', 'emh', 'variable', 'value']
-            csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames, delimiter=CSV_DELIMITER)
-            csv_writer.writeheader()
-            for i_calc, calc_name in enumerate(self.res_calc_pseudoperm.keys()):
-                res = self.get_data_pseudoperm(calc_name)
-                for emh_type in self.emh_types:
-                    variables = self.variables[emh_type]
-                    for emh_name, row in zip(self.emh[emh_type], res[emh_type]):
-                        for variable, value in zip(variables, row):
-                            csv_writer.writerow({'calc': calc_name,
-                                                 'time': i_calc + 1,
-                                                 'emh_type': emh_type,
-                                                 'emh': emh_name,
-                                                 'variable': variable,
-                                                 'value': FMT_FLOAT_CSV % value})
+        self.export_all_calc(csv_path, 'pseudoperm', file_format='csv')
 
     def write_all_calc_trans_in_csv(self, csv_path):
         """
@@ -748,27 +2398,7 @@ class ResultatsCalcul:
         :param csv_path: chemin vers le fichier CSV
         :type csv_path: str
         """
-        if version_info[0] == 3:   # Python2 fix
-            arguments = {'mode': 'w', 'newline': ''}
-        else:
-            arguments = {'mode': 'wb'}
-        with open(csv_path, **arguments) as csv_file:
-            fieldnames = ['calc', 'time', 'emh_type', 'emh', 'variable', 'value']
-            csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames, delimiter=CSV_DELIMITER)
-            csv_writer.writeheader()
-            for calc_name in self.res_calc_trans.keys():
-                res = self.get_data_trans(calc_name)
-                for emh_type in self.emh_types:
-                    variables = self.variables[emh_type]
-                    for time_sec, res_frame in zip(self.get_res_calc_trans(calc_name).time_serie(), res[emh_type]):
-                        for emh_name, row in zip(self.emh[emh_type], res_frame):
-                            for variable, value in zip(variables, row):
-                                csv_writer.writerow({'calc': calc_name,
-                                                     'time': time_sec,
-                                                     'emh_type': emh_type,
-                                                     'emh': emh_name,
-                                                     'variable': variable,
-                                                     'value': FMT_FLOAT_CSV % value})
+        self.export_all_calc(csv_path, 'trans', file_format='csv')
 
     def __repr__(self):
         return "Résultats run #%s (%i permanents, %i transitoires)" % (self.run_id, len(self.res_calc_pseudoperm),
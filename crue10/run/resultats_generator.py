@@ -0,0 +1,399 @@
+# coding: utf-8
+"""
+Génération de résultats de calcul synthétiques (fichier rcal et fichiers RBIN)
+
+Les fichiers produits respectent la grammaire rcal et l'organisation des enregistrements des fichiers RBIN écrits
+par Crue10 : ils sont lisibles par `ResultatsCalcul` et permettent de tester ou de mesurer les performances des
+lecteurs sur des volumes réalistes (jusqu'à plusieurs Go) sans lancer Crue10.
+
+Les valeurs sont des fonctions déterministes du temps, de l'EMH et de la variable (voir
+`ResultatsGenerator.get_values`), ce qui permet de vérifier les valeurs lues.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import io  # Python2 fix
+import numpy as np
+import os.path
+
+from crue10.run.resultats_calcul import FilePosition, get_res_layout
+from crue10.utils import ExceptionCrue10, logger
+from crue10.utils.settings import XML_ENCODING
+
+
+def get_time_in_crue10_format(time_sec):
+    """
+    Convertir une durée en secondes au format Crue10 (par ex. `P1DT2H0M30S`)
+
+    :param time_sec: durée en secondes (entière)
+    :type time_sec: int
+    :rtype: str
+    """
+    mins, secs = divmod(int(time_sec), 60)
+    hours, mins = divmod(mins, 60)
+    days, hours = divmod(hours, 24)
+    return 'P%iDT%iH%iM%iS' % (days, hours, mins, secs)
+
+
+def get_delimiter(text):
+    """
+    Obtenir un délimiteur (chaîne complétée par des espaces à gauche sur un mot) sous forme d'entier de même
+    représentation binaire qu'un mot du fichier RBIN
+
+    :param text: texte du délimiteur (par ex. 'Section')
+    :type text: str
+    :rtype: np.uint64
+    """
+    word = text.rjust(FilePosition.FLOAT_SIZE).encode(FilePosition.ENCODING)
+    return np.frombuffer(word, dtype='<u8')[0]
+
+
+class ResultatsGenerator:
+    """
+    Générateur de résultats de calcul synthétiques
+
+    Les enregistrements sont écrits dans l'ordre des calculs (pseudo-permanents puis transitoires) et répartis dans
+    plusieurs fichiers RBIN si leur taille maximale est atteinte.
+    Les EMHs du type Modele (régulation) ne sont pas générées.
+
+    :ivar emh: dictionnaire avec les types d'EMH secondaires (dans l'ordre des enregistrements) donnant la liste des
+        noms d'EMHs
+    :vartype emh: OrderedDict(list(str))
+    :ivar variables: dictionnaire avec les types d'EMH secondaires donnant la liste des variables
+    :vartype variables: OrderedDict(list(str))
+    :ivar calc_pseudoperm: liste des noms des calculs pseudo-permanents
+    :vartype calc_pseudoperm: list(str)
+    :ivar calc_trans: dictionnaire avec les noms des calculs transitoires donnant les temps de leurs enregistrements
+    :vartype calc_trans: OrderedDict(np.ndarray)
+    :ivar max_file_size_mb: taille maximale (en Mo) d'un fichier RBIN (un seul fichier si None)
+    :vartype max_file_size_mb: float
+    """
+
+    #: Types d'EMH secondaires pour Branche (dans l'ordre de la grammaire)
+    BRANCHE_TYPES = ['BrancheBarrageFilEau', 'BrancheBarrageGenerique', 'BrancheNiveauxAssocies', 'BrancheOrifice',
+                     'BranchePdc', 'BrancheSaintVenant', 'BrancheSeuilLateral', 'BrancheSeuilTransversal',
+                     'BrancheStrickler']
+
+    #: Variables par défaut par type d'EMH secondaire
+    DEFAULT_VARIABLES = {
+        'Noeud': [],
+        'Casier': ['Qech', 'Splan', 'Vol', 'Z'],
+        'Section': ['Q', 'Stot', 'Vact', 'Vc', 'Z'],
+        'BrancheSaintVenant': ['SplanAct', 'SplanSto', 'SplanTot', 'Vol'],
+        'BrancheStrickler': ['Splan', 'Vol'],
+    }
+
+    #: Préfixes des noms d'EMHs par type d'EMH primaire
+    EMH_PREFIXES = {'Noeud': 'Nd_', 'Casier': 'Ca_', 'Section': 'St_', 'Branche': 'Br_'}
+
+    #: Délimiteurs des types de calcul et des types d'EMH primaires
+    DELIMITERS = OrderedDict([
+        ('ResCalcPseudoPerm', 'RcalPp'),
+        ('ResCalcVraiPerm', 'RcalVp'),
+        ('ResPdt', 'RcalPdt'),
+        ('CatEMHNoeud', 'Noeud'),
+        ('CatEMHCasier', 'Casier'),
+        ('CatEMHSection', 'Section'),
+        ('CatEMHBranche', 'Branche'),
+    ])
+
+    #: Nombre d'enregistrements générés et écrits à la fois
+    CHUNK_SIZE = 1000
+
+    def __init__(self, nb_noeuds=10, nb_casiers=5, nb_sections=100, nb_branches=None, variables=None,
+                 nb_calc_pseudoperm=2, nb_calc_trans=1, nb_frames=100, dt=3600, max_file_size_mb=None):
+        """
+        :param nb_noeuds: nombre de noeuds
+        :type nb_noeuds: int
+        :param nb_casiers: nombre de casiers
+        :type nb_casiers: int
+        :param nb_sections: nombre de sections
+        :type nb_sections: int
+        :param nb_branches: dictionnaire avec le nombre de branches par type d'EMH secondaire
+            (par défaut : 10 `BrancheSaintVenant` et 2 `BrancheStrickler`)
+        :type nb_branches: dict(int)
+        :param variables: dictionnaire avec les variables par type d'EMH secondaire (remplace celles de
+            `DEFAULT_VARIABLES`)
+        :type variables: dict(list(str))
+        :param nb_calc_pseudoperm: nombre de calculs pseudo-permanents
+        :type nb_calc_pseudoperm: int
+        :param nb_calc_trans: nombre de calculs transitoires
+        :type nb_calc_trans: int
+        :param nb_frames: nombre d'enregistrements par calcul transitoire
+        :type nb_frames: int
+        :param dt: pas de temps (en secondes entières) entre deux enregistrements transitoires
+        :type dt: int
+        :param max_file_size_mb: taille maximale (en Mo) d'un fichier RBIN (un seul fichier si None)
+        :type max_file_size_mb: float
+        """
+        if nb_branches is None:
+            nb_branches = {'BrancheSaintVenant': 10, 'BrancheStrickler': 2}
+        all_variables = dict(ResultatsGenerator.DEFAULT_VARIABLES)
+        if variables is not None:
+            all_variables.update(variables)
+        for emh_type in list(nb_branches.keys()) + list(all_variables.keys()):
+            if emh_type not in ['Noeud', 'Casier', 'Section'] + ResultatsGenerator.BRANCHE_TYPES:
+                raise ExceptionCrue10("Le type d'EMH `%s` n'est pas supporté" % emh_type)
+        if int(dt) != dt or dt <= 0:
+            raise ExceptionCrue10("Le pas de temps doit être un nombre entier strictement positif de secondes")
+
+        self.emh = OrderedDict()
+        self.variables = OrderedDict()
+        nb_emh_by_type = OrderedDict([('Noeud', nb_noeuds), ('Casier', nb_casiers), ('Section', nb_sections)])
+        for branche_type in ResultatsGenerator.BRANCHE_TYPES:
+            nb_emh_by_type[branche_type] = nb_branches.get(branche_type, 0)
+        i_branche = 0
+        for emh_type, nb_emh in nb_emh_by_type.items():
+            if emh_type.startswith('Branche'):
+                prefix = ResultatsGenerator.EMH_PREFIXES['Branche']
+                self.emh[emh_type] = ['%s%i' % (prefix, i_branche + i) for i in range(nb_emh)]
+                i_branche += nb_emh
+            else:
+                prefix = ResultatsGenerator.EMH_PREFIXES[emh_type]
+                self.emh[emh_type] = ['%s%i' % (prefix, i) for i in range(nb_emh)]
+            self.variables[emh_type] = list(all_variables.get(emh_type, []))
+
+        self.calc_pseudoperm = ['Cc_P%02i' % (i + 1) for i in range(nb_calc_pseudoperm)]
+        self.calc_trans = OrderedDict([('Cc_T%02i' % (i + 1), np.arange(nb_frames, dtype=np.int64) * int(dt))
+                                       for i in range(nb_calc_trans)])
+        self.max_file_size_mb = max_file_size_mb
+
+        self._emh_type_first_branche = None
+        self._res_pattern = []
+        self._set_res_pattern()
+        self._delimiters, self._blocks, self.frame_nb_words = get_res_layout(self._res_pattern,
+                                                                             self._emh_type_first_branche)
+
+    def _get_nb_words(self, emh_type):
+        return len(self.emh[emh_type]) * len(self.variables[emh_type])
+
+    def _set_res_pattern(self):
+        """Construire le schéma d'organisation des résultats (comme `ResultatsCalcul._set_res_pattern`)"""
+        for emh_type in ['Noeud', 'Casier', 'Section']:
+            if self._get_nb_words(emh_type) > 0:
+                self._res_pattern.append((emh_type, (len(self.emh[emh_type]), len(self.variables[emh_type]))))
+            else:
+                self._res_pattern.append((emh_type, (0, 0)))
+        for branche_type in ResultatsGenerator.BRANCHE_TYPES:
+            if self._get_nb_words(branche_type) > 0:
+                if self._emh_type_first_branche is None:
+                    self._emh_type_first_branche = branche_type
+                self._res_pattern.append((branche_type, (len(self.emh[branche_type]),
+                                                         len(self.variables[branche_type]))))
+        if self._emh_type_first_branche is None:
+            self._res_pattern.append(('Branche', (0, 0)))
+
+    @property
+    def nb_frames_total(self):
+        """Nombre total d'enregistrements"""
+        return len(self.calc_pseudoperm) + sum(len(times) for times in self.calc_trans.values())
+
+    @property
+    def size(self):
+        """Taille totale des fichiers RBIN (en octets)"""
+        return self.nb_frames_total * self.frame_nb_words * FilePosition.FLOAT_SIZE
+
+    def get_values(self, times):
+        """
+        Obtenir les valeurs synthétiques aux temps demandés :
+        `10 * (var_pos + 1) + 0.01 * emh_pos + sin(2 * pi * time / 86400 + 0.1 * emh_pos)`
+        (les calculs pseudo-permanents correspondent aux temps 0, 1, 2... en heures)
+
+        :param times: temps (en secondes)
+        :type times: np.ndarray
+        :return: dictionnaire avec les types d'EMH secondaires et le tableau de valeurs
+            (shape=(nb_times, nb_emh, nb_var))
+        :rtype: dict(np.ndarray)
+        """
+        times = np.asarray(times, dtype=np.float64)
+        res = OrderedDict()
+        for emh_type, (nb_emh, nb_var) in self._res_pattern:
+            emh_pos = np.arange(nb_emh)
+            signal = np.sin(2 * np.pi * times[:, np.newaxis] / 86400.0 + 0.1 * emh_pos)
+            res[emh_type] = (10.0 * (np.arange(nb_var) + 1)[np.newaxis, np.newaxis, :] +
+                             (0.01 * emh_pos + signal)[:, :, np.newaxis])
+        return res
+
+    def get_pseudoperm_values(self):
+        """
+        Obtenir les valeurs de tous les calculs pseudo-permanents (voir `get_values`)
+
+        :rtype: dict(np.ndarray)
+        """
+        return self.get_values(np.arange(len(self.calc_pseudoperm)) * 3600.0)
+
+    def _get_frames(self, calc_delimiter, times):
+        """
+        Construire des enregistrements complets (délimiteurs compris)
+
+        :return: tableau des mots des enregistrements (shape=(nb_frames, frame_nb_words))
+        :rtype: np.ndarray
+        """
+        frames = np.empty((len(times), self.frame_nb_words), dtype='<u8')
+        frames[:, 0] = get_delimiter(ResultatsGenerator.DELIMITERS[calc_delimiter])
+        for offset, emh_type in self._delimiters:
+            primary_type = 'Branche' if emh_type.startswith('Branche') else emh_type
+            frames[:, offset] = get_delimiter(ResultatsGenerator.DELIMITERS['CatEMH' + primary_type])
+        values = frames.view('<f8')
+        for emh_type, res in self.get_values(times).items():
+            block_offset, (nb_emh, nb_var) = self._blocks[emh_type]
+            values[:, block_offset:block_offset + nb_emh * nb_var] = res.reshape((len(times), -1))
+        return frames
+
+    def _iter_chunks(self):
+        """
+        Parcourir les enregistrements par paquets
+
+        :return: générateur de tuples (délimiteur du calcul, liste des noms de calcul, temps)
+        :rtype: generator(tuple(str, list(str), np.ndarray))
+        """
+        if self.calc_pseudoperm:
+            yield 'ResCalcPseudoPerm', self.calc_pseudoperm, np.arange(len(self.calc_pseudoperm)) * 3600.0
+        for calc_name, times in self.calc_trans.items():
+            for start in range(0, len(times), ResultatsGenerator.CHUNK_SIZE):
+                chunk_times = times[start:start + ResultatsGenerator.CHUNK_SIZE]
+                yield 'ResPdt', [calc_name] * len(chunk_times), chunk_times
+
+    def write(self, folder, basename='Mo_Synthetique', etude='Etu_Synthetique.etu.xml'):
+        """
+        Écrire le fichier rcal et les fichiers RBIN dans un dossier
+
+        :param folder: dossier de sortie (créé s'il n'existe pas)
+        :type folder: str
+        :param basename: nom du modèle (les fichiers sont `<basename>.rcal.xml` et `<basename>.rcal_0001.bin`...)
+        :type basename: str
+        :param etude: nom du fichier étude (renseigné dans le contexte de simulation)
+        :type etude: str
+        :return: chemin vers le fichier rcal
+        :rtype: str
+        """
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        frame_size = self.frame_nb_words * FilePosition.FLOAT_SIZE
+        if self.max_file_size_mb is None:
+            max_frames_by_file = max(self.nb_frames_total, 1)
+        else:
+            max_frames_by_file = max(int(self.max_file_size_mb * 1024 * 1024) // frame_size, 1)
+
+        # Write RBIN files
+        logger.debug("Écriture de %i enregistrements (%.1f Mo)" % (self.nb_frames_total, self.size / 1024 / 1024))
+        positions = []  # (calc_delimiter, calc_name, time, rbin_name, word_offset) for each frame
+        out_bin = None
+        i_file, nb_frames_in_file = 0, max_frames_by_file
+        try:
+            for calc_delimiter, calc_names, times in self._iter_chunks():
+                frames = self._get_frames(calc_delimiter, times)
+                start = 0
+                while start < len(times):
+                    if nb_frames_in_file == max_frames_by_file:
+                        if out_bin is not None:
+                            out_bin.close()
+                        i_file += 1
+                        rbin_name = '%s.rcal_%04i.bin' % (basename, i_file)
+                        out_bin = io.open(os.path.join(folder, rbin_name), 'wb')
+                        nb_frames_in_file = 0
+                    end = min(start + max_frames_by_file - nb_frames_in_file, len(times))
+                    out_bin.write(frames[start:end].tobytes())
+                    for i in range(start, end):
+                        positions.append((calc_delimiter, calc_names[i], times[i], rbin_name,
+                                          (nb_frames_in_file + i - start) * self.frame_nb_words))
+                    nb_frames_in_file += end - start
+                    start = end
+        finally:
+            if out_bin is not None:
+                out_bin.close()
+
+        # Write rcal file
+        rcal_path = os.path.join(folder, basename + '.rcal.xml')
+        with io.open(rcal_path, 'w', encoding=XML_ENCODING) as out_xml:
+            out_xml.write(u'\ufeff')  # Add BOM for utf-8
+            out_xml.write(u'<?xml version="1.0" encoding="UTF-8"?>\n')
+            out_xml.write(u'<RCAL xmlns="http://www.fudaa.fr/xsd/crue" '
+                          u'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                          u'xsi:schemaLocation="http://www.fudaa.fr/xsd/crue '
+                          u'http://www.fudaa.fr/xsd/crue/rcal-1.3.xsd">\n')
+            out_xml.write(u'  <Commentaire>Résultats synthétiques</Commentaire>\n')
+            out_xml.write(u'  <Parametrage>\n    <NbrOctetMot>%i</NbrOctetMot>\n' % FilePosition.FLOAT_SIZE)
+            for name, text in ResultatsGenerator.DELIMITERS.items():
+                out_xml.write(u'    <Delimiteur Chaine="%s" Nom="%s"/>\n' % (text.rjust(FilePosition.FLOAT_SIZE), name))
+            out_xml.write(u'  </Parametrage>\n')
+            out_xml.write(u'  <ContexteSimulation>\n')
+            out_xml.write(u'    <DateSimulation>%s</DateSimulation>\n'
+                          % datetime.now().strftime('%Y-%m-%dT%H:%M:%S.000'))
+            out_xml.write(u'    <VersionCrue>10.4.0</VersionCrue>\n')
+            out_xml.write(u'    <Etude>%s</Etude>\n' % etude)
+            out_xml.write(u'    <Scenario NomRef="Sc_%s"/>\n' % basename)
+            out_xml.write(u'    <Run NomRef="R%s"/>\n' % datetime.now().strftime('%Y-%m-%d-%Hh%Mm%S'))
+            out_xml.write(u'    <Modele NomRef="Mo_%s"/>\n' % basename)
+            out_xml.write(u'  </ContexteSimulation>\n')
+            self._write_structure(out_xml)
+
+            out_xml.write(u'  <ResCalcPerms>\n')
+            for calc_delimiter, calc_name, _, rbin_name, offset in positions:
+                if calc_delimiter == 'ResCalcPseudoPerm':
+                    out_xml.write(u'    <ResCalcPseudoPerm Href="%s" NomRef="%s" OffsetMot="%i"/>\n'
+                                  % (rbin_name, calc_name, offset))
+            out_xml.write(u'  </ResCalcPerms>\n')
+            out_xml.write(u'  <ResCalcTranss>\n')
+            for calc_name in self.calc_trans.keys():
+                out_xml.write(u'    <ResCalcTrans NomRef="%s">\n' % calc_name)
+                for calc_delimiter, frame_calc_name, time, rbin_name, offset in positions:
+                    if calc_delimiter == 'ResPdt' and frame_calc_name == calc_name:
+                        out_xml.write(u'      <ResPdt Href="%s" OffsetMot="%i" TempsSimu="%s"/>\n'
+                                      % (rbin_name, offset, get_time_in_crue10_format(time)))
+                out_xml.write(u'    </ResCalcTrans>\n')
+            out_xml.write(u'  </ResCalcTranss>\n')
+            out_xml.write(u'</RCAL>\n')
+        return rcal_path
+
+    def _write_structure(self, out_xml):
+        """Écrire l'élément `StructureResultat` du fichier rcal"""
+        def write_variables(indent, emh_type):
+            for varname in self.variables[emh_type]:
+                out_xml.write(u'%s<VariableRes NomRef="%s"/>\n' % (indent, varname))
+
+        def write_emhs(indent, tag, emh_type, emh_names):
+            nb_var = len(self.variables[emh_type])
+            for emh_name in emh_names:
+                out_xml.write(u'%s<%s NbrMot="%i" NomRef="%s"/>\n' % (indent, tag, nb_var, emh_name))
+
+        out_xml.write(u'  <StructureResultat NbrMot="%i">\n' % self.frame_nb_words)
+
+        out_xml.write(u'    <Noeuds NbrMot="%i">\n' % (1 + self._get_nb_words('Noeud')))
+        out_xml.write(u'      <NoeudNiveauContinu NbrMot="%i">\n' % self._get_nb_words('Noeud'))
+        write_variables(' ' * 8, 'Noeud')
+        write_emhs(' ' * 8, 'Noeud', 'Noeud', self.emh['Noeud'])
+        out_xml.write(u'      </NoeudNiveauContinu>\n    </Noeuds>\n')
+
+        out_xml.write(u'    <Casiers NbrMot="%i">\n' % (1 + self._get_nb_words('Casier')))
+        write_variables(' ' * 6, 'Casier')
+        out_xml.write(u'      <CasierProfil NbrMot="%i">\n' % self._get_nb_words('Casier'))
+        write_emhs(' ' * 8, 'Casier', 'Casier', self.emh['Casier'])
+        out_xml.write(u'      </CasierProfil>\n    </Casiers>\n')
+
+        out_xml.write(u'    <Sections NbrMot="%i">\n' % (1 + self._get_nb_words('Section')))
+        write_variables(' ' * 6, 'Section')
+        for section_type in ['SectionIdem', 'SectionInterpolee', 'SectionProfil', 'SectionSansGeometrie']:
+            if section_type == 'SectionProfil':  # all sections are SectionProfil
+                out_xml.write(u'      <%s NbrMot="%i">\n' % (section_type, self._get_nb_words('Section')))
+                write_emhs(' ' * 8, 'Section', 'Section', self.emh['Section'])
+                out_xml.write(u'      </%s>\n' % section_type)
+            else:
+                out_xml.write(u'      <%s NbrMot="0"/>\n' % section_type)
+        out_xml.write(u'    </Sections>\n')
+
+        nb_words_branches = sum(self._get_nb_words(branche_type) for branche_type in ResultatsGenerator.BRANCHE_TYPES)
+        out_xml.write(u'    <Branches NbrMot="%i">\n' % (1 + nb_words_branches))
+        for branche_type in ResultatsGenerator.BRANCHE_TYPES:
+            out_xml.write(u'      <%s NbrMot="%i">\n' % (branche_type, self._get_nb_words(branche_type)))
+            write_variables(' ' * 8, branche_type)
+            write_emhs(' ' * 8, 'Branche', branche_type, self.emh[branche_type])
+            out_xml.write(u'      </%s>\n' % branche_type)
+        out_xml.write(u'    </Branches>\n')
+
+        out_xml.write(u'  </StructureResultat>\n')
+
+    def __repr__(self):
+        return "Générateur de résultats synthétiques (%i EMHs, %i calculs pseudo-permanents, " \
+               "%i calculs transitoires, %i enregistrements de %i mots, %.1f Mo)" \
+               % (sum(len(emh_names) for emh_names in self.emh.values()), len(self.calc_pseudoperm),
+                  len(self.calc_trans), self.nb_frames_total, self.frame_nb_words, self.size / 1024 / 1024)
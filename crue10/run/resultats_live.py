@@ -0,0 +1,162 @@
+# coding: utf-8
+"""
+Lecture des résultats de calcul au fil de l'eau (pendant que Crue10 calcule)
+
+Le fichier rcal n'est lu que jusqu'à la structure des résultats (il peut être incomplet) et les fichiers RBIN sont
+suivis au fur et à mesure qu'ils grossissent : chaque nouvel enregistrement complet est décodé selon le schéma
+d'organisation des résultats.
+"""
+from glob import glob
+import io  # Python2 fix
+import os.path
+from time import perf_counter, sleep
+import xml.etree.ElementTree as ET
+
+from crue10.run.resultats_calcul import FilePosition, get_res_layout, ResultatsCalcul
+from crue10.utils import ExceptionCrue10, PREFIX
+
+
+class ResultatsLive(ResultatsCalcul):
+    """
+    Suivi des résultats d'un calcul en cours : les enregistrements sont lus dans l'ordre des fichiers RBIN
+    (`<rcal>_0001.bin`, `<rcal>_0002.bin`...) dès qu'ils sont complets.
+    Les temps des enregistrements ne sont pas disponibles (ils ne sont écrits que dans le fichier rcal),
+    les enregistrements sont donc numérotés dans chaque type de calcul.
+
+    :ivar poll_interval: durée d'attente (en secondes) entre deux vérifications des fichiers RBIN
+    :vartype poll_interval: float
+    :ivar nb_frames: nombre d'enregistrements lus par type de calcul ('pseudoperm' et 'trans')
+    :vartype nb_frames: dict(int)
+    """
+
+    def __init__(self, rcal_path, poll_interval=1.0):
+        """
+        :param rcal_path: chemin vers le fichier rcal (éventuellement incomplet)
+        :type rcal_path: str
+        :param poll_interval: durée d'attente (en secondes) entre deux vérifications des fichiers RBIN
+        :type poll_interval: float
+        """
+        self._init_state(rcal_path)
+        self.poll_interval = poll_interval
+        self.nb_frames = {'pseudoperm': 0, 'trans': 0}
+        self._rbin_index = 0
+        self._word_offset = 0
+
+        self._read_partial_rcal()
+        self._read_parametrage()
+        self._read_structure()
+        self._set_res_pattern()
+        _, self._res_blocks, self._frame_nb_words = get_res_layout(self._res_pattern, self._emh_type_first_branche)
+        self._set_dtypes(None)
+
+    def _read_partial_rcal(self):
+        """Lire le fichier rcal jusqu'à la fin de l'élément `StructureResultat` (la suite peut être incomplète)"""
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        with io.open(self.rcal_path, 'rb') as in_xml:
+            for chunk in iter(lambda: in_xml.read(64 * 1024), b''):
+                parser.feed(chunk)
+                for event, elt in parser.read_events():
+                    if event == 'start' and self.rcal_root is None:
+                        self.rcal_root = elt
+                    elif event == 'end' and elt.tag == PREFIX + 'StructureResultat':
+                        return
+        raise ExceptionCrue10("La structure des résultats n'est pas (encore) disponible dans `%s`" % self.rcal_path)
+
+    def get_rbin_paths(self):
+        """
+        Obtenir la liste triée des fichiers RBIN existants
+
+        :rtype: list(str)
+        """
+        rcal_path = self.rcal_path[:-len('.xml')] if self.rcal_path.endswith('.xml') else self.rcal_path
+        return sorted(glob(rcal_path + '_*.bin'))
+
+    def _read_next_frame(self, emh_types):
+        """
+        Lire l'enregistrement suivant s'il est complet
+
+        :return: None ou tuple avec le type de calcul, le numéro de l'enregistrement et le dictionnaire des tableaux
+            de résultats par type d'EMH secondaire (shape=(nb_emh, nb_var))
+        :rtype: tuple(str, int, dict(np.ndarray))
+        """
+        rbin_paths = self.get_rbin_paths()
+        while self._rbin_index < len(rbin_paths):
+            rbin_path = rbin_paths[self._rbin_index]
+            if os.path.getsize(rbin_path) >= (self._word_offset + self._frame_nb_words) * FilePosition.FLOAT_SIZE:
+                with io.open(rbin_path, 'rb') as resin:
+                    resin.seek(self._word_offset * FilePosition.FLOAT_SIZE)
+                    calc_delimiter = resin.read(FilePosition.FLOAT_SIZE).decode(FilePosition.ENCODING).strip()
+                if calc_delimiter == 'RcalPp':
+                    calc_type = 'pseudoperm'
+                elif calc_delimiter == 'RcalPdt':
+                    calc_type = 'trans'
+                else:
+                    raise ExceptionCrue10("Le délimiteur `%s` (fichier `%s`, position %i) n'est pas supporté"
+                                          % (calc_delimiter, rbin_path, self._word_offset))
+                res = FilePosition(rbin_path, self._word_offset).get_data(
+                    self._res_pattern, calc_type == 'pseudoperm', self._emh_type_first_branche)
+                self._word_offset += self._frame_nb_words
+                self.nb_frames[calc_type] += 1
+                return calc_type, self.nb_frames[calc_type] - 1, {emh_type: res[emh_type] for emh_type in emh_types}
+            if self._rbin_index + 1 < len(rbin_paths):
+                # Crue10 writes in the next file: the current one is complete
+                self._rbin_index += 1
+                self._word_offset = 0
+            else:
+                break
+        return None
+
+    def iter_new_frames(self, emh_types=None, timeout=None):
+        """
+        Parcourir les nouveaux enregistrements au fur et à mesure qu'ils sont écrits
+
+        :param emh_types: liste des types d'EMH secondaires à extraire (si absent alors tous sont extraits)
+        :type emh_types: list(str)
+        :param timeout: durée maximale (en secondes) sans nouvel enregistrement avant d'arrêter le suivi
+            (si absent alors le suivi ne s'arrête jamais)
+        :type timeout: float
+        :return: générateur de tuples avec le type de calcul ('pseudoperm' ou 'trans'), le numéro de
+            l'enregistrement dans ce type de calcul et le dictionnaire des tableaux de résultats par type d'EMH
+            secondaire (shape=(nb_emh, nb_var))
+        :rtype: generator(tuple(str, int, dict(np.ndarray)))
+        """
+        if emh_types is None:
+            emh_types = self.emh_types
+        for emh_type in emh_types:
+            if emh_type not in self.emh_types:
+                raise ExceptionCrue10("Le type d'EMH `%s` n'a pas de résultats\nLes types possibles sont : %s"
+                                      % (emh_type, self.emh_types))
+        last_frame_time = perf_counter()
+        while True:
+            frame = self._read_next_frame(emh_types)
+            if frame is not None:
+                yield frame
+                last_frame_time = perf_counter()
+            elif timeout is not None and perf_counter() - last_frame_time >= timeout:
+                return
+            else:
+                sleep(self.poll_interval)
+
+    def follow(self, callback, emh_types=None, timeout=None):
+        """
+        Appeler une fonction pour chaque nouvel enregistrement (voir `iter_new_frames`)
+
+        :param callback: fonction appelée avec le type de calcul, le numéro de l'enregistrement et le dictionnaire
+            des tableaux de résultats
+        :type callback: function
+        :param emh_types: liste des types d'EMH secondaires à extraire (si absent alors tous sont extraits)
+        :type emh_types: list(str)
+        :param timeout: durée maximale (en secondes) sans nouvel enregistrement avant d'arrêter le suivi
+        :type timeout: float
+        :return: nombre d'enregistrements lus
+        :rtype: int
+        """
+        nb_frames = 0
+        for calc_type, i_frame, res in self.iter_new_frames(emh_types=emh_types, timeout=timeout):
+            callback(calc_type, i_frame, res)
+            nb_frames += 1
+        return nb_frames
+
+    def __repr__(self):
+        return "Résultats run #%s en cours (%i permanents, %i transitoires lus)" \
+               % (self.run_id, self.nb_frames['pseudoperm'], self.nb_frames['trans'])
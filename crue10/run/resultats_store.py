@@ -0,0 +1,358 @@
+# coding: utf-8
+"""
+Stockage en colonnes des résultats de calcul d'un Run
+
+Les résultats d'un fichier rcal (et des fichiers RBIN associés) sont convertis en tableaux `.npy` dans un dossier
+placé à côté du fichier rcal. Chaque calcul transitoire est stocké selon deux organisations :
+
+- `time_major` : tableaux de shape (temps, emh, variable), adaptés à la lecture d'enregistrements complets
+- `emh_major` : tableaux de shape (emh, variable, temps), adaptés à la lecture de séries temporelles
+
+Le lecteur `ResultatsStore` a la même interface que `ResultatsCalcul` et choisit l'organisation la plus adaptée à
+chaque requête.
+"""
+from collections import OrderedDict
+import json
+import numpy as np
+import os.path
+
+from crue10.run.resultats_calcul import FilePosition, get_files_signature, get_res_layout, ResCalcPseudoPerm, \
+    ResCalcTrans, ResultatsCalcul
+from crue10.utils import ExceptionCrue10
+
+
+#: Version du format de stockage
+STORE_VERSION = 1
+
+#: Nom du fichier de métadonnées du stockage
+STORE_METADATA = 'metadata.json'
+
+
+def get_store_path(rcal_path):
+    """
+    Obtenir le chemin par défaut du dossier de stockage associé à un fichier rcal
+
+    :param rcal_path: chemin vers le fichier rcal
+    :type rcal_path: str
+    :rtype: str
+    """
+    if rcal_path.endswith('.xml'):
+        rcal_path = rcal_path[:-len('.xml')]
+    return rcal_path + '_store'
+
+
+def get_sources_signature(resultats):
+    """
+    Obtenir la signature (date de modification et taille) du fichier rcal et des fichiers RBIN
+
+    :param resultats: résultats du calcul
+    :type resultats: ResultatsCalcul
+    :return: dictionnaire avec pour chaque fichier (chemin relatif au dossier du rcal) sa date et sa taille
+    :rtype: dict(list)
+    """
+    signature = get_files_signature([resultats.rcal_path] + resultats.get_rbin_paths())
+    return {os.path.relpath(path, resultats.rcal_folder): list(mtime_size) for path, mtime_size in signature.items()}
+
+
+def write_resultats_store(resultats, store_path=None):
+    """
+    Écrire les résultats de calcul dans un stockage en colonnes (les calculs transitoires sont lus par paquets)
+
+    :param resultats: résultats du calcul
+    :type resultats: ResultatsCalcul
+    :param store_path: chemin vers le dossier de stockage (à côté du fichier rcal si absent)
+    :type store_path: str
+    :return: chemin vers le dossier de stockage
+    :rtype: str
+    """
+    if store_path is None:
+        store_path = get_store_path(resultats.rcal_path)
+    metadata_path = os.path.join(store_path, STORE_METADATA)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)  # the store is invalid until it is fully written
+    for folder in (store_path, os.path.join(store_path, 'pseudoperm'), os.path.join(store_path, 'trans')):
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+    # Pseudo-permanent calculations (shape=(calc, emh, var))
+    if resultats.res_calc_pseudoperm:
+        for emh_type, values in resultats.get_data_all_pseudoperm().items():
+            np.save(os.path.join(store_path, 'pseudoperm', emh_type + '.npy'), values)
+
+    # Transient calculations
+    for calc_name, calc in resultats.res_calc_trans.items():
+        calc_folder = os.path.join(store_path, 'trans', calc_name)
+        if not os.path.exists(calc_folder):
+            os.makedirs(calc_folder)
+        nb_frames = calc.nb_frames
+        np.save(os.path.join(calc_folder, 'time.npy'), calc.time_serie())
+        time_major = {}
+        emh_major = {}
+        for emh_type in resultats.emh_types:
+            _, (nb_emh, nb_var) = resultats._res_blocks[emh_type]
+            time_major[emh_type] = np.lib.format.open_memmap(
+                os.path.join(calc_folder, emh_type + '.time_major.npy'), mode='w+',
+                dtype=FilePosition.FLOAT_TYPE, shape=(nb_frames, nb_emh, nb_var))
+            emh_major[emh_type] = np.lib.format.open_memmap(
+                os.path.join(calc_folder, emh_type + '.emh_major.npy'), mode='w+',
+                dtype=FilePosition.FLOAT_TYPE, shape=(nb_emh, nb_var, nb_frames))
+        start = 0
+        for time, res in resultats.iter_frames_trans(calc_name):
+            end = start + len(time)
+            for emh_type in resultats.emh_types:
+                time_major[emh_type][start:end, :, :] = res[emh_type]
+                emh_major[emh_type][:, :, start:end] = res[emh_type].transpose((1, 2, 0))
+            start = end
+        for emh_type in resultats.emh_types:
+            time_major[emh_type].flush()
+            emh_major[emh_type].flush()
+        del time_major, emh_major
+
+    # Metadata (written at the end)
+    metadata = OrderedDict([
+        ('version', STORE_VERSION),
+        ('rcal_path', os.path.abspath(resultats.rcal_path)),
+        ('sources', get_sources_signature(resultats)),
+        ('emh_types', resultats.emh_types),
+        ('emh', list(resultats.emh.items())),
+        ('variables', list(resultats.variables.items())),
+        ('variables_Qregul', resultats.variables_Qregul),
+        ('variables_Zregul', resultats.variables_Zregul),
+        ('emh_type_first_branche', resultats._emh_type_first_branche),
+        ('res_pattern', resultats._res_pattern),
+        ('calc_pseudoperm', list(resultats.res_calc_pseudoperm.keys())),
+        ('calc_trans', list(resultats.res_calc_trans.keys())),
+    ])
+    with open(metadata_path, 'w') as out_json:
+        json.dump(metadata, out_json)
+    return store_path
+
+
+def is_store_up_to_date(store_path, resultats):
+    """
+    Le stockage existe et a été écrit à partir des fichiers rcal et RBIN actuels
+
+    :param store_path: chemin vers le dossier de stockage
+    :type store_path: str
+    :param resultats: résultats du calcul
+    :type resultats: ResultatsCalcul
+    :rtype: bool
+    """
+    metadata_path = os.path.join(store_path, STORE_METADATA)
+    if not os.path.exists(metadata_path):
+        return False
+    with open(metadata_path, 'r') as in_json:
+        metadata = json.load(in_json)
+    return metadata['version'] == STORE_VERSION and metadata['sources'] == get_sources_signature(resultats)
+
+
+class ResCalcPseudoPermStore(ResCalcPseudoPerm):
+    """
+    Métadonnées d'un calcul pseudo-permanent lu depuis un stockage en colonnes (pas de position dans les fichiers
+    RBIN : les résultats sont à l'indice `index` des tableaux `pseudoperm/<emh_type>.npy`)
+
+    :ivar name: nom du calcul pseudo-permanent
+    :vartype name: str
+    :ivar index: indice du calcul dans les tableaux du stockage
+    :vartype index: int
+    """
+
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+
+    @property
+    def file_pos(self):
+        raise ExceptionCrue10("Le calcul `%s` est lu depuis un stockage en colonnes : il n'a pas de position dans "
+                              "les fichiers RBIN" % self.name)
+
+
+class ResCalcTransStore(ResCalcTrans):
+    """
+    Métadonnées d'un calcul transitoire lu depuis un stockage en colonnes (seuls les temps sont connus, les
+    enregistrements n'ont pas de position dans les fichiers RBIN)
+
+    :ivar times: temps des enregistrements
+    :vartype times: np.ndarray
+    """
+
+    def __init__(self, name, times):
+        self.name = name
+        self.times = times
+
+    def _no_file_position(self):
+        return ExceptionCrue10("Le calcul `%s` est lu depuis un stockage en colonnes : ses enregistrements n'ont pas "
+                               "de position dans les fichiers RBIN" % self.name)
+
+    @property
+    def frame_list(self):
+        raise self._no_file_position()
+
+    def add_frame(self, time_sec, bin_path, byte_offset):
+        raise ExceptionCrue10("Impossible d'ajouter un enregistrement au calcul `%s` (stockage en colonnes)"
+                              % self.name)
+
+    def time_serie(self):
+        return self.times.copy()
+
+    @property
+    def nb_frames(self):
+        return len(self.times)
+
+    def get_file_positions(self, frames=None):
+        raise self._no_file_position()
+
+
+class ResultatsStore(ResultatsCalcul):
+    """
+    Lecture des résultats de calcul à partir d'un stockage en colonnes (voir `write_resultats_store`).
+    L'interface est celle de `ResultatsCalcul` :
+
+    - les enregistrements complets (`get_data_trans`, `iter_frames_trans`...) sont lus dans l'organisation `time_major`
+    - les séries temporelles (`get_trans_var_at_emhs_as_array`, `get_trans_vars_at_emh_as_array`...) sont lues dans
+      l'organisation `emh_major`
+    - les enregistrements n'ont pas de position dans les fichiers RBIN : `get_rbin_paths` et les positions des calculs
+      (`file_pos`, `get_file_positions`) lèvent une exception (les fichiers du stockage sont donnés par
+      `get_store_paths`)
+
+    :ivar store_path: chemin vers le dossier de stockage
+    :vartype store_path: str
+    """
+
+    def __init__(self, store_path):
+        """
+        :param store_path: chemin vers le dossier de stockage
+        :type store_path: str
+        """
+        metadata_path = os.path.join(store_path, STORE_METADATA)
+        if not os.path.exists(metadata_path):
+            raise ExceptionCrue10("Le stockage `%s` n'existe pas ou est incomplet" % store_path)
+        with open(metadata_path, 'r') as in_json:
+            metadata = json.load(in_json)
+        if metadata['version'] != STORE_VERSION:
+            raise ExceptionCrue10("La version du stockage `%s` n'est pas supportée" % store_path)
+
+        self._init_state(metadata['rcal_path'])
+        self.store_path = store_path
+        self.emh_types = metadata['emh_types']
+        self.emh = OrderedDict(metadata['emh'])
+        self.variables = OrderedDict(metadata['variables'])
+        self.variables_Qregul = metadata['variables_Qregul']
+        self.variables_Zregul = metadata['variables_Zregul']
+        for i, calc_name in enumerate(metadata['calc_pseudoperm']):
+            self.res_calc_pseudoperm[calc_name] = ResCalcPseudoPermStore(calc_name, i)
+        for calc_name in metadata['calc_trans']:
+            self.res_calc_trans[calc_name] = ResCalcTransStore(calc_name,
+                                                               np.load(self._get_trans_path(calc_name, 'time')))
+
+        self._emh_type_first_branche = metadata['emh_type_first_branche']
+        self._res_pattern = [(emh_type, tuple(shape)) for emh_type, shape in metadata['res_pattern']]
+        _, self._res_blocks, _ = get_res_layout(self._res_pattern, self._emh_type_first_branche)
+        self._set_index()
+        self._set_dtypes(None)
+
+    def get_store_paths(self):
+        """
+        Obtenir la liste triée des fichiers `.npy` du stockage
+
+        :rtype: list(str)
+        """
+        paths = [os.path.join(self.store_path, 'pseudoperm', emh_type + '.npy')
+                 for emh_type, _ in self._res_pattern if self.res_calc_pseudoperm]
+        for calc_name in self.res_calc_trans.keys():
+            paths.append(self._get_trans_path(calc_name, 'time'))
+            for emh_type in self.emh_types:
+                for layout in ('time_major', 'emh_major'):
+                    paths.append(self._get_trans_path(calc_name, emh_type + '.' + layout))
+        return sorted(paths)
+
+    def get_rbin_paths(self):
+        raise ExceptionCrue10("Le stockage `%s` ne lit pas les fichiers RBIN (voir `get_store_paths`)"
+                              % self.store_path)
+
+    def _get_trans_path(self, calc_name, basename):
+        return os.path.join(self.store_path, 'trans', calc_name, basename + '.npy')
+
+    def _load_trans(self, calc_name, emh_type, layout):
+        self.get_res_calc_trans(calc_name)
+        return np.load(self._get_trans_path(calc_name, emh_type + '.' + layout), mmap_mode='r')
+
+    def _load_pseudoperm(self, emh_type, mmap_mode=None):
+        return np.load(os.path.join(self.store_path, 'pseudoperm', emh_type + '.npy'), mmap_mode=mmap_mode)
+
+    def get_data_pseudoperm(self, calc_name):
+        i_calc = self.get_res_calc_pseudoperm(calc_name).index
+        return {emh_type: np.array(self._load_pseudoperm(emh_type, mmap_mode='r')[i_calc, :, :])
+                for emh_type, _ in self._res_pattern}
+
+    def get_data_all_pseudoperm(self):
+        if not self.res_calc_pseudoperm:
+            return {}
+        return {emh_type: self._load_pseudoperm(emh_type) for emh_type, _ in self._res_pattern}
+
+    def _get_pseudoperm_values(self, selection):
+        values = np.empty((len(self.res_calc_pseudoperm), len(selection)), dtype=FilePosition.FLOAT_TYPE)
+        if not self.res_calc_pseudoperm:
+            return values
+        for emh_type in set(emh_type for emh_type, _, _ in selection):
+            indices = [i for i, (sel_emh_type, _, _) in enumerate(selection) if sel_emh_type == emh_type]
+            emh_pos = [selection[i][1] for i in indices]
+            var_pos = [selection[i][2] for i in indices]
+            values[:, indices] = self._load_pseudoperm(emh_type, mmap_mode='r')[:, emh_pos, var_pos]
+        return values
+
+    def get_data_trans(self, calc_name, start_time=-float('inf'), end_time=float('inf')):
+        first, last = self.get_res_calc_trans(calc_name).get_frame_range(start_time, end_time)
+        return {emh_type: self._load_trans(calc_name, emh_type, 'time_major')[first:last]
+                for emh_type in self.emh_types}
+
+    def resample_trans(self, calc_name, times, emh_types=None):
+        if emh_types is None:
+            emh_types = self.emh_types
+        frames, idx_before, idx_after, weight = self.get_res_calc_trans(calc_name).get_interpolation(times)
+        return {emh_type: ResultatsCalcul._interpolate(self._load_trans(calc_name, emh_type, 'time_major')[frames],
+                                                       idx_before, idx_after, weight)
+                for emh_type in emh_types}
+
+    def iter_frames_trans(self, calc_name, emh_types=None, chunk=None, start_time=-float('inf'),
+                          end_time=float('inf')):
+        if emh_types is None:
+            emh_types = self.emh_types
+        for emh_type in emh_types:
+            if emh_type not in self.emh_types:
+                raise ExceptionCrue10("Le type d'EMH `%s` n'a pas de résultats\nLes types possibles sont : %s"
+                                      % (emh_type, self.emh_types))
+        if chunk is None:
+            chunk = ResultatsCalcul.CHUNK_SIZE
+        if chunk < 1:
+            raise ExceptionCrue10("Le nombre d'enregistrements par paquet doit être strictement positif")
+
+        calc = self.get_res_calc_trans(calc_name)
+        time = calc.time_serie()
+        first, last = calc.get_frame_range(start_time, end_time)
+        data = {emh_type: self._load_trans(calc_name, emh_type, 'time_major') for emh_type in emh_types}
+        for start in range(first, last, chunk):
+            end = min(start + chunk, last)
+            yield time[start:end], {emh_type: values[start:end, :, :] for emh_type, values in data.items()}
+
+    def _get_trans_values(self, calc_name, selection, frames=None):
+        if frames is None:
+            frames = slice(None)
+            nb_frames = self.get_res_calc_trans(calc_name).nb_frames
+        else:
+            nb_frames = len(frames)
+        values = np.empty((nb_frames, len(selection)), dtype=FilePosition.FLOAT_TYPE)
+        for emh_type in set(emh_type for emh_type, _, _ in selection):
+            indices = [i for i, (sel_emh_type, _, _) in enumerate(selection) if sel_emh_type == emh_type]
+            emh_pos = [selection[i][1] for i in indices]
+            var_pos = [selection[i][2] for i in indices]
+            values[:, indices] = self._load_trans(calc_name, emh_type, 'emh_major')[emh_pos, var_pos, :][:, frames].T
+        return values
+
+    def _get_batch_trans_values(self, requests):
+        return [self._get_trans_values(calc_name, selection, frames=np.arange(first, last))
+                for calc_name, selection, first, last in requests]
+
+    def __repr__(self):
+        return "Résultats run #%s stockés en colonnes (%i permanents, %i transitoires)" \
+               % (self.run_id, len(self.res_calc_pseudoperm), len(self.res_calc_trans))
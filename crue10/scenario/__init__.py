@@ -15,7 +15,8 @@ from crue10.run import get_run_identifier, Run
 from crue10.utils import check_isinstance, check_preffix, check_xml_content, \
     duration_iso8601_to_seconds, duration_seconds_to_iso8601, \
     ExceptionCrue10, extract_pdt_from_elt, get_optional_commentaire, get_xml_root_from_file, \
-    JINJA_ENV, logger, parse_loi, PREFIX, write_default_xml_file, write_xml_from_tree, DATA_FOLDER_ABSPATH
+    JINJA_ENV, logger, parse_float_values, parse_loi, PREFIX, write_default_xml_file, write_xml_from_tree, \
+    DATA_FOLDER_ABSPATH
 from crue10.utils.design_patterns import factory_define, factory_make
 from crue10.utils.crueconfigmetier import CCM_FILE
 from crue10.utils.settings import CRUE10_EXE_PATH
@@ -446,6 +447,7 @@ class Scenario(EnsembleFichiersXML):
         for elt_calc in root:
             if elt_calc.tag == PREFIX + 'CalcPseudoPerm':
                 calc_perm = CalcPseudoPerm(elt_calc.get('Nom'), get_optional_commentaire(elt_calc))
+                valeurs, value_texts = [], []
                 for elt_valeur in elt_calc:
                     if elt_valeur.tag == (PREFIX + 'Commentaire'):
                         continue
@@ -460,17 +462,16 @@ class Scenario(EnsembleFichiersXML):
                         sens = None
 
                     value_elt = elt_valeur.find(PREFIX + CalcPseudoPerm.CLIM_TYPE_TO_TAG_VALUE[clim_type])
-                    value = float(value_elt.text)
+                    value_texts.append(value_elt.text)
                     typ_loi = CalcPseudoPerm.CLIM_TYPE_TO_TAG_VALUE[clim_type]
 
-                    calc_perm.ajouter_valeur(
-                        elt_valeur.get('NomRef'),
-                        clim_type,
-                        elt_valeur.find(PREFIX + 'IsActive').text == 'true',
-                        value,
-                        sens,
-                        typ_loi,
-                    )
+                    valeurs.append((elt_valeur.get('NomRef'), clim_type,
+                                    elt_valeur.find(PREFIX + 'IsActive').text == 'true', sens, typ_loi))
+
+                # All values of the calculation are decoded at once
+                values = parse_float_values(value_texts, nb_columns=1).ravel().tolist()
+                for (nom_emh, clim_type, is_active, sens, typ_loi), value in zip(valeurs, values):
+                    calc_perm.ajouter_valeur(nom_emh, clim_type, is_active, value, sens, typ_loi)
 
                 self.ajouter_calcul(calc_perm)
 
@@ -534,7 +535,7 @@ class Scenario(EnsembleFichiersXML):
                 date_zero = elt_loi.find(PREFIX + 'DateZeroLoiDF').text
                 if date_zero is not None:
                     loi_hydraulique.set_date_zero(date_zero)
-            loi_hydraulique.set_values(parse_loi(elt_loi))
+            loi_hydraulique.set_values(parse_loi(elt_loi, nb_columns=2))
             self.ajouter_loi_hydraulique(loi_hydraulique)
 
     def _read_ocal(self):
@@ -598,11 +599,20 @@ class Scenario(EnsembleFichiersXML):
         root = self._get_xml_root_set_version_grammaire_and_comment('ores')
         self._set_variables(root)
 
-    def read_all(self, ignore_shp=False):
-        """Lire tous les fichiers du scénario"""
+    def read_all(self, ignore_shp=False, ncsize=1, lazy=False):
+        """
+        Lire tous les fichiers du scénario
+
+        :param ignore_shp: True pour ne pas lire les fichiers shp
+        :type ignore_shp: bool, optional
+        :param ncsize: nombre de processus pour lire les sous-modèles en parallèle
+        :type ncsize: int, optional
+        :param lazy: True pour différer la lecture des composants des sous-modèles (voir `SousModele.read_all`)
+        :type lazy: bool, optional
+        """
         if not self.was_read:
             self._set_xml_trees()
-            self.modele.read_all(ignore_shp=ignore_shp)
+            self.modele.read_all(ignore_shp=ignore_shp, ncsize=ncsize, lazy=lazy)
 
             self._read_dclm()
             self._read_dlhy()
@@ -1,10 +1,14 @@
 # coding: utf-8
 from builtins import super  # Python2 fix (requires module `future`)
 from collections import OrderedDict
+from copy import copy
 import fiona
+from functools import partial
+from multiprocessing import Pool
 import numpy as np
 import os.path
 from shapely.geometry import LinearRing, LineString, mapping, Point
+import time
 
 from crue10.base import EnsembleFichiersXML
 from crue10.emh.branche import BRANCHE_CLASSES, Branche, BranchePdC, BrancheSeuilTransversal, \
@@ -15,7 +19,9 @@ from crue10.emh.noeud import Noeud
 from crue10.emh.section import DEFAULT_FK_MAJ, DEFAULT_FK_MIN, DEFAULT_FK_STO, LoiFrottement, \
     LimiteGeom, LitNumerote, Section, SectionIdem, SectionInterpolee, SectionProfil, SectionSansGeometrie
 from crue10.utils import check_isinstance, check_preffix, ExceptionCrue10, ExceptionCrue10GeometryNotFound, \
-    ExceptionCrue10Grammar, get_optional_commentaire, logger, parse_loi, PREFIX
+    ExceptionCrue10Grammar, get_optional_commentaire, get_xpath, logger, parse_float_values, parse_loi, \
+    parse_loi_lxml, PREFIX, XPATH_COMMENTAIRE, XPATH_POINTFF
+from crue10.utils.design_patterns import LazyAttributes
 
 
 def parse_elem_seuil(elt, nom_elem, coef_list):
@@ -27,11 +33,127 @@ def parse_elem_seuil(elt, nom_elem, coef_list):
     :param with_pdc: True si avec pertes de charge
     :rtype: np.ndarray
     """
-    elt_group = elt.findall(PREFIX + nom_elem)
-    values = []
-    for elem in elt_group:
-        values.append([float(elem.find(PREFIX + coef).text) for coef in ['Largeur', 'Zseuil'] + coef_list])
-    return np.array(values)
+    coefs = ['Largeur', 'Zseuil'] + coef_list
+    texts = [' '.join(elem.find(PREFIX + coef).text for coef in coefs) for elem in elt.findall(PREFIX + nom_elem)]
+    return parse_float_values(texts, len(coefs))
+
+
+def parse_elem_seuil_lxml(elt, nom_elem, coef_list):
+    """
+    Équivalent de `parse_elem_seuil` pour un élément lxml (une requête XPath par colonne)
+
+    :param elt: élément XML
+    :type elt: lxml.etree._Element
+    :param nom_elem: nom de la balise des éléments de seuil
+    :type nom_elem: str
+    :param coef_list: liste des coefficients après la largeur et la cote de seuil
+    :type coef_list: list(str)
+    :rtype: np.ndarray
+    """
+    columns = [get_xpath('c:%s/c:%s/text()' % (nom_elem, coef))(elt) for coef in ['Largeur', 'Zseuil'] + coef_list]
+    if not columns[0]:
+        return np.array([])
+    return parse_float_values([' '.join(column) for column in columns], len(columns[0])).transpose()
+
+
+# Lecture des données dcsp par type de branche (analyseur lxml, voir `DCSP_READERS_BY_TAG`)
+def _set_dcsp_pdc_lxml(branche, emh, children, version_grammaire):
+    pdc_elt = children[PREFIX + 'Pdc']
+    branche.loi_QPdc = parse_loi_lxml(pdc_elt, XPATH_POINTFF)
+    branche.comment_loi = XPATH_COMMENTAIRE(pdc_elt)
+
+
+def _set_dcsp_seuil_lxml(branche, emh, children, version_grammaire):
+    branche.formule_pertes_de_charge = children[PREFIX + 'FormulePdc'].text
+    branche.set_liste_elements_seuil(parse_elem_seuil_lxml(emh, 'ElemSeuilAvecPdc', ['CoefD', 'CoefPdc']))
+
+
+def _set_dcsp_orifice_lxml(branche, emh, children, version_grammaire):
+    values = {child.tag[len(PREFIX):]: child.text for child in children[PREFIX + 'ElemOrifice']}
+    branche.CoefCtrLim = float(values['CoefCtrLim'])
+    branche.Largeur = float(values['Largeur'])
+    branche.Zseuil = float(values['Zseuil'])
+    branche.Haut = float(values['Haut'])
+    branche.CoefD = float(values['CoefD'])
+    branche.SensOrifice = values['SensOrifice']
+
+
+def _set_dcsp_niveaux_associes_lxml(branche, emh, children, version_grammaire):
+    branche.QLimInf = float(children[PREFIX + 'QLimInf'].text)
+    branche.QLimSup = float(children[PREFIX + 'QLimSup'].text)
+    zasso_elt = children[PREFIX + 'Zasso']
+    branche.loi_ZavZam = parse_loi_lxml(zasso_elt, XPATH_POINTFF)
+    branche.comment_loi = XPATH_COMMENTAIRE(zasso_elt)
+
+
+def _set_dcsp_barrage_generique_lxml(branche, emh, children, version_grammaire):
+    branche.QLimInf = float(children[PREFIX + 'QLimInf'].text)
+    branche.QLimSup = float(children[PREFIX + 'QLimSup'].text)
+    regime_noye_elt = children[PREFIX + 'RegimeNoye']
+    branche.loi_QDz = parse_loi_lxml(regime_noye_elt, XPATH_POINTFF)
+    branche.comment_noye = XPATH_COMMENTAIRE(regime_noye_elt)
+    regime_denoye_elt = children[PREFIX + 'RegimeDenoye']
+    branche.loi_QpilZam = parse_loi_lxml(regime_denoye_elt, XPATH_POINTFF)
+    branche.comment_denoye = XPATH_COMMENTAIRE(regime_denoye_elt)
+
+
+def _set_dcsp_barrage_fil_eau_lxml(branche, emh, children, version_grammaire):
+    branche.QLimInf = float(children[PREFIX + 'QLimInf'].text)
+    branche.QLimSup = float(children[PREFIX + 'QLimSup'].text)
+    if version_grammaire == '1.2':  # HARDCODED to support g1.2
+        liste_elements_barrage = parse_elem_seuil_lxml(emh, 'ElemSeuil', ['CoefD'])
+        branche.liste_elements_barrage = np.column_stack((liste_elements_barrage,
+                                                          COEF_D * np.ones(len(liste_elements_barrage))))
+        regime_manoeuvrant_elt = children[PREFIX + 'RegimeDenoye']
+    else:
+        branche.liste_elements_barrage = parse_elem_seuil_lxml(emh, 'ElemBarrage', ['CoefNoy', 'CoefDen'])
+        regime_manoeuvrant_elt = children[PREFIX + 'RegimeManoeuvrant']
+    branche.set_loi_QpilZam(parse_loi_lxml(regime_manoeuvrant_elt, XPATH_POINTFF))
+    branche.comment_manoeuvrant = XPATH_COMMENTAIRE(regime_manoeuvrant_elt)
+
+
+def _set_dcsp_saint_venant_lxml(branche, emh, children, version_grammaire):
+    branche.CoefBeta = float(children[PREFIX + 'CoefBeta'].text)
+    branche.CoefRuis = float(children[PREFIX + 'CoefRuis'].text)
+    branche.CoefRuisQdm = float(children[PREFIX + 'CoefRuisQdm'].text)
+
+
+#: Tables de correspondance entre les balises (avec espace de noms) et les EMH ou fonctions de lecture (analyseur lxml)
+SECTION_CLASSES_BY_TAG = {
+    PREFIX + 'SectionProfil': SectionProfil,
+    PREFIX + 'SectionIdem': SectionIdem,
+    PREFIX + 'SectionInterpolee': SectionInterpolee,
+    PREFIX + 'SectionSansGeometrie': SectionSansGeometrie,
+}
+BRANCHE_CLASSES_BY_TAG = {
+    PREFIX + 'BranchePdc': BranchePdC,
+    PREFIX + 'BrancheSeuilTransversal': BrancheSeuilTransversal,
+    PREFIX + 'BrancheSeuilLateral': BrancheSeuilLateral,
+    PREFIX + 'BrancheOrifice': BrancheOrifice,
+    PREFIX + 'BrancheStrickler': BrancheStrickler,
+    PREFIX + 'BrancheNiveauxAssocies': BrancheNiveauxAssocies,
+    PREFIX + 'BrancheBarrageGenerique': BrancheBarrageGenerique,
+    PREFIX + 'BrancheBarrageFilEau': BrancheBarrageFilEau,
+    PREFIX + 'BrancheSaintVenant': BrancheSaintVenant,
+}
+DCSP_READERS_BY_TAG = {
+    PREFIX + 'DonCalcSansPrtBranchePdc': _set_dcsp_pdc_lxml,
+    PREFIX + 'DonCalcSansPrtBrancheSeuilTransversal': _set_dcsp_seuil_lxml,
+    PREFIX + 'DonCalcSansPrtBrancheSeuilLateral': _set_dcsp_seuil_lxml,
+    PREFIX + 'DonCalcSansPrtBrancheOrifice': _set_dcsp_orifice_lxml,
+    PREFIX + 'DonCalcSansPrtBrancheNiveauxAssocies': _set_dcsp_niveaux_associes_lxml,
+    PREFIX + 'DonCalcSansPrtBrancheBarrageGenerique': _set_dcsp_barrage_generique_lxml,
+    PREFIX + 'DonCalcSansPrtBrancheBarrageFilEau': _set_dcsp_barrage_fil_eau_lxml,
+    PREFIX + 'DonCalcSansPrtBrancheSaintVenant': _set_dcsp_saint_venant_lxml,
+}
+
+#: Expressions XPath compilées une seule fois (analyseur lxml)
+XPATH_BRANCHE_SECTIONS_NOMREF = get_xpath('c:Branche-Sections/*/@NomRef')
+XPATH_BRANCHE_SECTIONS_XP = get_xpath('c:Branche-Sections/*/c:Xp/text()')
+XPATH_BRANCHE_SV_SECTIONS_NOMREF = get_xpath('c:BrancheSaintVenant-Sections/*/@NomRef')
+XPATH_BRANCHE_SV_SECTIONS_COEFS = [get_xpath('c:BrancheSaintVenant-Sections/*/c:%s/text()' % coef)
+                                   for coef in ['Xp', 'CoefPond', 'CoefConv', 'CoefDiv']]
+XPATH_CASIER_PROFILS_NOMREF = get_xpath('c:ProfilCasier/@NomRef')
 
 
 def cut_linestring(line, distance):
@@ -61,7 +183,7 @@ def cut_linestring(line, distance):
                 LineString([(cp.x, cp.y)] + coords[i:])]
 
 
-class SousModele(EnsembleFichiersXML):
+class SousModele(LazyAttributes, EnsembleFichiersXML):
     """
     Sous-modèle Crue10
 
@@ -81,14 +203,55 @@ class SousModele(EnsembleFichiersXML):
     :vartype batis_casier: OrderedDict(BatiCasier)
     :ivar lois_frottement: dictionnaire ordonné des lois de frottement (coefficients de Strickler)
     :vartype lois_frottement: OrderedDict(LoiFrottement)
+    :ivar xml_parser: analyseur XML utilisé pour lire les fichiers (une valeur de `XML_PARSERS`)
+    :vartype xml_parser: str
+    :ivar load_timings: durées de lecture (en secondes) des composants déjà lus (drso, dfrt, dptg, dcsp ou shp)
+    :vartype load_timings: OrderedDict(float)
     """
 
+    #: Analyseurs XML disponibles : `etree` (xml.etree.ElementTree) ou `lxml` (plus rapide pour les gros modèles)
+    XML_PARSERS = ['etree', 'lxml']
+
+    #: Composants dont la lecture peut être différée (voir `read_all`) avec les composants à lire au préalable
+    LAZY_COMPONENTS = OrderedDict([('dfrt', []), ('dptg', ['dfrt']), ('dcsp', []), ('shp', ['dptg'])])
+
+    #: Attributs des EMH renseignés par chaque composant différé (les lois de frottement du sous-modèle pour dfrt)
+    LAZY_ATTRIBUTES = {
+        'dptg': [
+            (SectionProfil, ['xz', 'lits_numerotes', 'limites_geom', 'largeur_fente', 'profondeur_fente',
+                             'comment_profilsection']),
+            (SectionIdem, ['dz_section_reference']),
+            (BrancheSaintVenant, ['CoefSinuo']),
+            (ProfilCasier, ['longueur', 'xz', 'xt_min', 'xt_max', 'comment']),
+            (BatiCasier, ['SplanBati', 'ZBatiTotal', 'comment']),
+        ],
+        'dcsp': [
+            (BranchePdC, ['loi_QPdc', 'comment_loi']),
+            (BrancheSeuilTransversal, ['formule_pertes_de_charge', 'liste_elements_seuil']),
+            (BrancheSeuilLateral, ['formule_pertes_de_charge', 'liste_elements_seuil']),
+            (BrancheOrifice, ['CoefCtrLim', 'Largeur', 'Zseuil', 'Haut', 'CoefD', 'SensOrifice']),
+            (BrancheNiveauxAssocies, ['QLimInf', 'QLimSup', 'loi_ZavZam', 'comment_loi']),
+            (BrancheBarrageGenerique, ['QLimInf', 'QLimSup', 'loi_QDz', 'loi_QpilZam', 'comment_noye',
+                                       'comment_denoye']),
+            (BrancheBarrageFilEau, ['QLimInf', 'QLimSup', 'liste_elements_barrage', 'loi_QpilZam',
+                                    'comment_manoeuvrant']),
+            (BrancheSaintVenant, ['CoefBeta', 'CoefRuis', 'CoefRuisQdm']),
+        ],
+        'shp': [
+            (Noeud, ['geom']),
+            (Branche, ['geom']),
+            (SectionProfil, ['geom_trace']),
+            (Casier, ['geom']),
+        ],
+    }
+
     FILES_SHP = ['noeuds', 'branches', 'casiers', 'tracesSections']
     FILES_XML = ['drso', 'dcsp', 'dptg', 'dfrt']
     METADATA_FIELDS = ['Type', 'IsActive', 'Commentaire', 'AuteurCreation', 'DateCreation', 'AuteurDerniereModif',
                        'DateDerniereModif']
 
-    def __init__(self, nom_sous_modele, mode='r', files=None, metadata=None, version_grammaire=None):
+    def __init__(self, nom_sous_modele, mode='r', files=None, metadata=None, version_grammaire=None,
+                 xml_parser='etree'):
         """
         :param nom_sous_modele: nom du sous-modèle
         :type nom_sous_modele: str
@@ -102,9 +265,15 @@ class SousModele(EnsembleFichiersXML):
         :type version_grammaire: str
         :param was_read_shp: True si le dossier avec les shp est lu ou si le sous-modèle est écrit
         :type was_read_shp: bool
+        :param xml_parser: analyseur XML pour la lecture des fichiers drso, dptg, dcsp et dfrt
+        :type xml_parser: str, optional
         """
         check_preffix(nom_sous_modele, 'Sm_')
+        if xml_parser not in SousModele.XML_PARSERS:
+            raise ExceptionCrue10("L'analyseur XML `%s` n'est pas supporté (valeurs possibles : %s)"
+                                  % (xml_parser, SousModele.XML_PARSERS))
         self.id = nom_sous_modele
+        self.xml_parser = xml_parser
         super().__init__(mode, files, metadata, version_grammaire=version_grammaire)
         if mode == 'r':
             self.was_read_shp = False
@@ -119,6 +288,9 @@ class SousModele(EnsembleFichiersXML):
         self.batis_casier = OrderedDict()
         self.lois_frottement = OrderedDict()
 
+        self.load_timings = OrderedDict()
+        self._lazy_pending = OrderedDict()
+
     def ajouter_noeud(self, noeud):
         """
         Ajouter un noeud au sous-modèle
@@ -416,18 +588,22 @@ class SousModele(EnsembleFichiersXML):
         """
         Lire le fichier dfrt.xml
         """
-        root = self._get_xml_root_set_version_grammaire_and_comment('dfrt')
+        root = self._get_xml_root_set_version_grammaire_and_comment('dfrt', xml_parser=self.xml_parser)
+        if self.xml_parser == 'lxml':
+            return self._read_dfrt_lxml(root)
         for loi in root.find(PREFIX + 'LoiFFs'):
             loi_frottement = LoiFrottement(loi.get('Nom'), loi.get('Type'),
                                            comment=get_optional_commentaire(loi))
-            loi_frottement.set_loi_Fk_values(parse_loi(loi))
+            loi_frottement.set_loi_Fk_values(parse_loi(loi, nb_columns=2))
             self.ajouter_loi_frottement(loi_frottement)
 
     def _read_drso(self, filter_branch_types=None):
         """
         Lire le fichier drso.xml
         """
-        root = self._get_xml_root_set_version_grammaire_and_comment('drso')
+        root = self._get_xml_root_set_version_grammaire_and_comment('drso', xml_parser=self.xml_parser)
+        if self.xml_parser == 'lxml':
+            return self._read_drso_lxml(root, filter_branch_types)
         for emh_group in root:
 
             if emh_group.tag == (PREFIX + 'Noeuds'):
@@ -559,7 +735,9 @@ class SousModele(EnsembleFichiersXML):
         """
         Lire le fichier dptg.xml
         """
-        root = self._get_xml_root_set_version_grammaire_and_comment('dptg')
+        root = self._get_xml_root_set_version_grammaire_and_comment('dptg', xml_parser=self.xml_parser)
+        if self.xml_parser == 'lxml':
+            return self._read_dptg_lxml(root)
         for emh_group in root:
 
             if emh_group.tag == (PREFIX + 'DonPrtGeoProfilCasiers'):
@@ -569,7 +747,7 @@ class SousModele(EnsembleFichiersXML):
                     profil_casier.comment = get_optional_commentaire(emh)
                     profil_casier.set_longueur(float(emh.find(PREFIX + 'Longueur').text))
 
-                    profil_casier.set_xz(parse_loi(emh))
+                    profil_casier.set_xz(parse_loi(emh, nb_columns=2))
 
                     lit_num_elt = emh.find(PREFIX + 'LitUtile')
                     profil_casier.xt_min = float(lit_num_elt.find(PREFIX + 'LimDeb').text.split()[0])
@@ -605,7 +783,7 @@ class SousModele(EnsembleFichiersXML):
                             limite = LimiteGeom(etiquette.get('Nom'), xt)
                             section.ajouter_limite_geom(limite)
 
-                    section.set_xz(parse_loi(emh))
+                    section.set_xz(parse_loi(emh, nb_columns=2))
 
             elif emh_group.tag == (PREFIX + 'DonPrtGeoCasiers'):
                 for emh in emh_group.findall(PREFIX + 'BatiCasier'):
@@ -627,7 +805,9 @@ class SousModele(EnsembleFichiersXML):
         """
         Lire le fichier dcsp.xml
         """
-        root = self._get_xml_root_set_version_grammaire_and_comment('dcsp')
+        root = self._get_xml_root_set_version_grammaire_and_comment('dcsp', xml_parser=self.xml_parser)
+        if self.xml_parser == 'lxml':
+            return self._read_dcsp_lxml(root)
         for emh_group in root:
 
             if emh_group.tag == (PREFIX + 'DonCalcSansPrtBranches'):
@@ -702,6 +882,202 @@ class SousModele(EnsembleFichiersXML):
                     else:
                         raise ExceptionCrue10("Données de branche non supportées")
 
+    def _read_dfrt_lxml(self, root):
+        """
+        Lire le fichier dfrt.xml à partir de sa racine lxml
+        """
+        for loi in root.find(PREFIX + 'LoiFFs'):
+            loi_frottement = LoiFrottement(loi.get('Nom'), loi.get('Type'), comment=XPATH_COMMENTAIRE(loi))
+            loi_frottement.set_loi_Fk_values(parse_loi_lxml(loi, XPATH_POINTFF, nb_columns=2))
+            self.ajouter_loi_frottement(loi_frottement)
+
+    def _read_drso_lxml(self, root, filter_branch_types=None):
+        """
+        Lire le fichier drso.xml à partir de sa racine lxml
+        """
+        for emh_group in root:
+
+            if emh_group.tag == (PREFIX + 'Noeuds'):
+                for emh_noeud in emh_group.iterchildren(PREFIX + 'NoeudNiveauContinu'):
+                    noeud = Noeud(emh_noeud.get('Nom'))
+                    noeud.comment = XPATH_COMMENTAIRE(emh_noeud)
+                    self.ajouter_noeud(noeud)
+
+            elif emh_group.tag == (PREFIX + 'Sections'):
+                sections_idem = []
+                for emh_section in emh_group:
+                    nom_section = emh_section.get('Nom')
+                    try:
+                        section_cls = SECTION_CLASSES_BY_TAG[emh_section.tag]
+                    except KeyError:
+                        raise ExceptionCrue10("Le type de section `%s` n'est pas reconnu"
+                                              % emh_section.tag[len(PREFIX):])
+                    if section_cls is SectionProfil:
+                        section = SectionProfil(nom_section,
+                                                emh_section.find(PREFIX + 'ProfilSection').get('NomRef'))
+                    elif section_cls is SectionIdem:
+                        # Sets temporary to None to preserve order of sections, SectionIdem instance is set below
+                        self.sections[nom_section] = None
+                        sections_idem.append(emh_section)
+                        continue
+                    else:
+                        section = section_cls(nom_section)
+                    section.comment = XPATH_COMMENTAIRE(emh_section)
+                    self.ajouter_section(section)
+
+                # SectionIdem set after SectionProfil to define its parent section properly
+                for emh_section in sections_idem:
+                    parent_section = self.get_section(emh_section.find(PREFIX + 'Section').get('NomRef'))
+                    section = SectionIdem(emh_section.get('Nom'), parent_section)
+                    section.comment = XPATH_COMMENTAIRE(emh_section)
+                    self.set_section(section)
+
+            elif emh_group.tag == (PREFIX + 'Branches'):
+                if filter_branch_types is None:
+                    branch_types = list(Branche.TYPES.keys())
+                else:
+                    branch_types = filter_branch_types
+
+                for emh_branche in emh_group:
+                    try:
+                        branche_cls = BRANCHE_CLASSES_BY_TAG[emh_branche.tag]
+                    except KeyError:
+                        raise ExceptionCrue10("Le type de branche `%s` n'est pas reconnu"
+                                              % emh_branche.tag[len(PREFIX):])
+                    if Branche.get_id_type_from_name(emh_branche.tag[len(PREFIX):]) not in branch_types:
+                        continue
+
+                    # Build branche instance (children are read in a single pass, lxml `find` is slow)
+                    children = {child.tag: child for child in emh_branche}
+                    is_active = children[PREFIX + 'IsActive'].text == 'true'
+                    noeud_amont = self.get_noeud(children[PREFIX + 'NdAm'].get('NomRef'))
+                    noeud_aval = self.get_noeud(children[PREFIX + 'NdAv'].get('NomRef'))
+                    branche = branche_cls(emh_branche.get('Nom'), noeud_amont, noeud_aval, is_active)
+                    branche.comment = XPATH_COMMENTAIRE(emh_branche)
+
+                    # Add section pilotage
+                    if branche_cls is BrancheBarrageGenerique or branche_cls is BrancheBarrageFilEau:
+                        branche.section_pilote = self.get_section(children[PREFIX + 'SectionPilote'].get('NomRef'))
+
+                    # Add associated sections (values of all sections are extracted at once)
+                    if branche_cls is BrancheSaintVenant:
+                        noms_section = XPATH_BRANCHE_SV_SECTIONS_NOMREF(emh_branche)
+                        for nom_section, xp, coef_pond, coef_conv, coef_div in zip(
+                                noms_section, *[xpath(emh_branche) for xpath in XPATH_BRANCHE_SV_SECTIONS_COEFS]):
+                            section = self.get_section(nom_section)
+                            section.CoefPond = float(coef_pond)
+                            section.CoefConv = float(coef_conv)
+                            section.CoefDiv = float(coef_div)
+                            branche.ajouter_section_dans_branche(section, float(xp))
+                    else:
+                        for nom_section, xp in zip(XPATH_BRANCHE_SECTIONS_NOMREF(emh_branche),
+                                                   XPATH_BRANCHE_SECTIONS_XP(emh_branche)):
+                            branche.ajouter_section_dans_branche(self.get_section(nom_section), float(xp))
+                    self.ajouter_branche(branche)
+
+            elif emh_group.tag == (PREFIX + 'Casiers'):
+                for emh_profils_casier in emh_group:
+                    children = {child.tag: child for child in emh_profils_casier}
+                    is_active = children[PREFIX + 'IsActive'].text == 'true'
+                    noeud = self.get_noeud(children[PREFIX + 'Noeud'].get('NomRef'))
+                    casier = Casier(emh_profils_casier.get('Nom'), noeud, is_active=is_active)
+                    casier.comment = XPATH_COMMENTAIRE(emh_profils_casier)
+
+                    # ProfilCasiers
+                    for nom_profil_casier in XPATH_CASIER_PROFILS_NOMREF(emh_profils_casier):
+                        pc = ProfilCasier(nom_profil_casier)
+                        self.ajouter_profil_casier(pc)
+                        casier.ajouter_profil_casier(pc)
+
+                    # BatiCasier
+                    emh_bc = children.get(PREFIX + 'BatiCasier')
+                    if emh_bc is not None:
+                        bc = BatiCasier(emh_bc.get('NomRef'))
+                        self.ajouter_bati_casier(bc)
+                        casier.set_bati(bc)
+
+                    self.ajouter_casier(casier)
+
+    def _read_dptg_lxml(self, root):
+        """
+        Lire le fichier dptg.xml à partir de sa racine lxml
+        """
+        for emh_group in root:
+
+            if emh_group.tag == (PREFIX + 'DonPrtGeoProfilCasiers'):
+                for emh in emh_group.iterchildren(PREFIX + 'ProfilCasier'):
+                    profil_casier = self.profils_casier[emh.get('Nom')]
+                    profil_casier.comment = XPATH_COMMENTAIRE(emh)
+                    children = {child.tag: child for child in emh}
+                    profil_casier.set_longueur(float(children[PREFIX + 'Longueur'].text))
+
+                    profil_casier.set_xz(parse_loi_lxml(emh, XPATH_POINTFF, nb_columns=2))
+
+                    lit_values = {child.tag: child.text for child in children[PREFIX + 'LitUtile']}
+                    profil_casier.xt_min = float(lit_values[PREFIX + 'LimDeb'].split()[0])
+                    profil_casier.xt_max = float(lit_values[PREFIX + 'LimFin'].split()[0])
+
+            elif emh_group.tag == (PREFIX + 'DonPrtGeoProfilSections'):
+                for emh in emh_group.iterchildren(PREFIX + 'ProfilSection'):
+                    nom_section = emh.get('Nom').replace('Ps_', 'St_')  # Not necessary consistant
+                    section = self.get_section(nom_section)
+                    section.comment_profilsection = XPATH_COMMENTAIRE(emh)
+                    children = {child.tag: child for child in emh}
+
+                    fente = children.get(PREFIX + 'Fente')
+                    if fente is not None:
+                        fente_values = {child.tag: child.text for child in fente}
+                        section.ajouter_fente(float(fente_values[PREFIX + 'LargeurFente']),
+                                              float(fente_values[PREFIX + 'ProfondeurFente']))
+
+                    for lit_num_elt in children[PREFIX + 'LitNumerotes']:
+                        lit_children = {child.tag: child for child in lit_num_elt}
+                        lit_nomme_elt = lit_children.get(PREFIX + 'LitNomme')
+                        if lit_nomme_elt is None:
+                            raise ExceptionCrue10("Pas de balise LitNomme pour la section %s" % section.id)
+                        xt_min = float(lit_children[PREFIX + 'LimDeb'].text.split()[0])
+                        xt_max = float(lit_children[PREFIX + 'LimFin'].text.split()[0])
+                        loi_frottement = self.get_loi_frottement(lit_children[PREFIX + 'Frot'].get('NomRef'))
+                        section.ajouter_lit(LitNumerote(lit_nomme_elt.text, xt_min, xt_max, loi_frottement))
+
+                    etiquettes = children.get(PREFIX + 'Etiquettes')
+                    if etiquettes is None:
+                        logger.warning("Aucune étiquette trouvée pour %s" % nom_section)
+                    else:
+                        for etiquette in etiquettes:
+                            xt = float(etiquette[0].text.split()[0])  # PointFF is the only child
+                            section.ajouter_limite_geom(LimiteGeom(etiquette.get('Nom'), xt))
+
+                    section.set_xz(parse_loi_lxml(emh, XPATH_POINTFF, nb_columns=2))
+
+            elif emh_group.tag == (PREFIX + 'DonPrtGeoCasiers'):
+                for emh in emh_group.iterchildren(PREFIX + 'BatiCasier'):
+                    bati_casier = self.get_bati_casier(emh.get('Nom'))
+                    bati_casier.comment = XPATH_COMMENTAIRE(emh)
+                    bati_casier.set_values(float(emh.findtext(PREFIX + 'SplanBati')),
+                                           float(emh.findtext(PREFIX + 'ZBatiTotal')))
+
+            elif emh_group.tag == (PREFIX + 'DonPrtGeoSections'):
+                for emh in emh_group.iterchildren(PREFIX + 'DonPrtGeoSectionIdem'):
+                    self.get_section(emh.get('NomRef')).dz_section_reference = float(emh.findtext(PREFIX + 'Dz'))
+
+            elif emh_group.tag == (PREFIX + 'DonPrtGeoBranches'):
+                for emh in emh_group.iterchildren(PREFIX + 'DonPrtGeoBrancheSaintVenant'):
+                    self.get_branche(emh.get('NomRef')).CoefSinuo = float(emh.findtext(PREFIX + 'CoefSinuo'))
+
+    def _read_dcsp_lxml(self, root):
+        """
+        Lire le fichier dcsp.xml à partir de sa racine lxml
+        """
+        for emh_group in root.iterchildren(PREFIX + 'DonCalcSansPrtBranches'):
+            for emh in emh_group:
+                try:
+                    set_dcsp = DCSP_READERS_BY_TAG[emh.tag]
+                except KeyError:
+                    raise ExceptionCrue10("Données de branche non supportées")
+                children = {child.tag: child for child in emh}
+                set_dcsp(self.branches[emh.get('NomRef')], emh, children, self.version_grammaire)
+
     def _read_shp_noeuds(self):
         """Read geometry of all `Noeuds` from current sous-modèle (they are compulsory)"""
         geoms = {}
@@ -769,35 +1145,139 @@ class SousModele(EnsembleFichiersXML):
             except KeyError:
                 raise ExceptionCrue10GeometryNotFound(casier)
 
-    def read_all(self, ignore_shp=False):
+    def _read_shp(self):
+        """
+        Lire les fichiers shp
+        """
+        try:
+            if self.noeuds:
+                self._read_shp_noeuds()
+            if self.branches:  # Has to be done before sections (to enable orthogonal reconstruction)
+                self._read_shp_branches()
+            if self.sections:
+                self._read_shp_traces_sections()
+            if self.casiers:
+                self._read_shp_casiers()
+        except fiona.errors.DriverError as e:
+            logger.warning("Un fichier shp n'a pas pu être lu, la géométrie des EMH n'est pas lisible.")
+            logger.warning(str(e))
+
+    def _read_component(self, component):
+        """
+        Lire un composant (fichier XML ou ensemble des fichiers shp) et mémoriser sa durée de lecture
+
+        :param component: drso, dfrt, dptg, dcsp ou shp
+        :type component: str
+        """
+        start = time.perf_counter()
+        getattr(self, '_read_' + component)()
+        self.load_timings[component] = time.perf_counter() - start
+
+    def _set_lazy_components(self, components):
+        """
+        Différer la lecture de composants : les attributs qu'ils renseignent sont retirés des EMH (et du sous-modèle)
+        jusqu'au premier accès à l'un d'eux
+
+        :param components: liste des composants (clés de `LAZY_COMPONENTS`)
+        :type components: list(str)
+        """
+        emhs = self.get_liste_noeuds() + self.get_liste_sections() + self.get_liste_branches() + \
+            self.get_liste_casiers() + self.get_liste_profils_casier() + self.get_liste_batis_casier()
+        for component in components:
+            loader = partial(self.load_component, component)
+            pending = []
+            if component == 'dfrt':
+                pending.append((self, ['lois_frottement'], self.set_lazy_attributes(['lois_frottement'], loader)))
+            else:
+                for emh in emhs:
+                    names = []
+                    for emh_cls, attributes in SousModele.LAZY_ATTRIBUTES[component]:
+                        if isinstance(emh, emh_cls):
+                            names += attributes
+                    if names:
+                        pending.append((emh, names, emh.set_lazy_attributes(names, loader)))
+            self._lazy_pending[component] = pending
+
+    def load_component(self, component):
+        """
+        Lire un composant différé (et les composants dont il dépend) s'il n'a pas encore été lu
+
+        :param component: dfrt, dptg, dcsp ou shp
+        :type component: str
+        """
+        pending = self._lazy_pending.get(component)
+        if pending is None:
+            return
+        for dependency in SousModele.LAZY_COMPONENTS[component]:
+            self.load_component(dependency)
+        del self._lazy_pending[component]
+        for emh, names, values in pending:
+            # Copies keep the default values intact if the read fails after filling them
+            emh.unset_lazy_attributes(names, {name: copy(value) for name, value in values.items()})
+        logger.debug("Lecture différée du composant %s du %s" % (component, self))
+        try:
+            self._read_component(component)
+        except Exception:
+            # Defer the component again: a later access has to fail too instead of returning default values
+            loader = partial(self.load_component, component)
+            for emh, names, _ in pending:
+                emh.set_lazy_attributes(names, loader)
+            self._lazy_pending[component] = pending
+            raise
+
+    def load_lazy_components(self):
+        """
+        Lire tous les composants différés
+        """
+        for component in list(self._lazy_pending.keys()):
+            self.load_component(component)
+
+    def get_lazy_components(self):
+        """
+        :return: liste des composants différés qui n'ont pas encore été lus
+        :rtype: list(str)
+        """
+        return list(self._lazy_pending.keys())
+
+    def __getstate__(self):
+        # All components have to be read before copying or serializing EMHs
+        self.load_lazy_components()
+        return super().__getstate__()
+
+    def read_all(self, ignore_shp=False, lazy=False):
         """
         Lire tous les fichiers du sous-modèle
-        Les fichiers sont lus si le dossier existe et si
+        Les fichiers shp sont lus si leur dossier existe et si `ignore_shp` est faux
+
+        Avec `lazy`, seul le fichier drso (topologie : liste des EMH et connexions) est lu immédiatement. Les autres
+        composants (voir `LAZY_COMPONENTS`) sont lus au premier accès à l'un des attributs qu'ils renseignent
+        (voir `LAZY_ATTRIBUTES`) : par exemple `section.xz` déclenche la lecture du dptg (et du dfrt) et `branche.geom`
+        celle des fichiers shp. Les durées de lecture des composants lus sont disponibles dans `load_timings`.
+
+        :param ignore_shp: True pour ne pas lire les fichiers shp
+        :type ignore_shp: bool, optional
+        :param lazy: True pour différer la lecture des composants autres que le drso
+        :type lazy: bool, optional
         """
         if not self.was_read:
-            # Read xml files
-            self._read_dfrt()
-            self._read_drso()
-            self._read_dptg()
-            self._read_dcsp()
+            read_shp = not ignore_shp and os.path.exists(os.path.dirname(self.files['noeuds']))
+            if lazy:
+                self._read_component('drso')
+                self.set_active_sections()
+                self._set_lazy_components([component for component in SousModele.LAZY_COMPONENTS
+                                           if component != 'shp' or read_shp])
+                self.was_read_shp = read_shp
+            else:
+                # Read xml files
+                for component in ['dfrt', 'drso', 'dptg', 'dcsp']:
+                    self._read_component(component)
 
-            self.set_active_sections()
+                self.set_active_sections()
 
-            # Read shp files
-            if not ignore_shp and os.path.exists(os.path.dirname(self.files['noeuds'])):
-                self.was_read_shp = True
-                try:
-                    if self.noeuds:
-                        self._read_shp_noeuds()
-                    if self.branches:  # Has to be done before sections (to enable orthogonal reconstruction)
-                        self._read_shp_branches()
-                    if self.sections:
-                        self._read_shp_traces_sections()
-                    if self.casiers:
-                        self._read_shp_casiers()
-                except fiona.errors.DriverError as e:
-                    logger.warning("Un fichier shp n'a pas pu être lu, la géométrie des EMH n'est pas lisible.")
-                    logger.warning(str(e))
+                # Read shp files
+                if read_shp:
+                    self.was_read_shp = True
+                    self._read_component('shp')
         self.was_read = True
 
     def _write_dfrt(self, folder):
@@ -1362,3 +1842,50 @@ class SousModele(EnsembleFichiersXML):
 
     def __repr__(self):
         return "Sous-modèle %s" % self.id
+
+
+def _read_all_worker(args):
+    """
+    Lire tous les fichiers d'un sous-modèle (exécuté dans un processus fils)
+
+    :param args: tuple avec le sous-modèle et `ignore_shp`
+    :type args: (SousModele, bool)
+    :return: sous-modèle lu
+    :rtype: SousModele
+    """
+    sous_modele, ignore_shp = args
+    sous_modele.read_all(ignore_shp=ignore_shp)
+    return sous_modele
+
+
+def read_all_sous_modeles(sous_modeles, ignore_shp=False, ncsize=1, lazy=False):
+    """
+    Lire tous les fichiers de plusieurs sous-modèles, en parallèle si `ncsize` > 1
+
+    Les sous-modèles sont lus dans des processus fils puis leurs EMH (avec leurs références internes : noeuds,
+    sections, lois de frottement...) sont rattachées aux sous-modèles d'origine, qui restent ceux référencés
+    par les modèles de l'étude.
+    Avec `lazy` (voir `SousModele.read_all`), les sous-modèles sont lus dans le processus courant.
+
+    :param sous_modeles: liste des sous-modèles
+    :type sous_modeles: list(SousModele)
+    :param ignore_shp: True pour ne pas lire les fichiers shp
+    :type ignore_shp: bool, optional
+    :param ncsize: nombre de processus
+    :type ncsize: int, optional
+    :param lazy: True pour différer la lecture des composants autres que le drso
+    :type lazy: bool, optional
+    """
+    sous_modeles_to_read = [sous_modele for sous_modele in sous_modeles if not sous_modele.was_read]
+    ncsize = min(ncsize, len(sous_modeles_to_read))
+    if ncsize <= 1 or lazy:
+        for sous_modele in sous_modeles_to_read:
+            sous_modele.read_all(ignore_shp=ignore_shp, lazy=lazy)
+        return
+
+    logger.debug("Lecture de %i sous-modèles en parallèle (sur %i processeurs)" % (len(sous_modeles_to_read), ncsize))
+    with Pool(processes=ncsize) as pool:
+        sous_modeles_read = pool.map(_read_all_worker, [(sous_modele, ignore_shp)
+                                                        for sous_modele in sous_modeles_to_read])
+    for sous_modele, sous_modele_read in zip(sous_modeles_to_read, sous_modeles_read):
+        sous_modele.__dict__.update(sous_modele_read.__dict__)
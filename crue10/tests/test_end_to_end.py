@@ -1,6 +1,7 @@
 # coding: utf-8
 from filecmp import dircmp
 import os.path
+import shutil
 import unittest
 
 from crue10.etude import Etude
@@ -126,3 +127,33 @@ class EndToEndTestCase(unittest.TestCase):
         folder_out = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', VERSION_GRAMMAIRE_PRECEDENTE, 'Etu3-6_grammaire')
         etude.write_all(folder_out)
         self._same_folders(folder_in, folder_out, VERSION_GRAMMAIRE_PRECEDENTE, etu_changed=False)
+
+    def test_read_all_use_snapshot(self):
+        folder_in = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'in', VERSION_GRAMMAIRE_COURANTE, 'Etu3-6')
+        folder_snapshot = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', VERSION_GRAMMAIRE_COURANTE, 'snapshot')
+        if os.path.exists(folder_snapshot):
+            shutil.rmtree(folder_snapshot)
+        shutil.copytree(folder_in, os.path.join(folder_snapshot, 'in'))
+        etu_path = os.path.join(folder_snapshot, 'in', 'Etu3-6.etu.xml')
+
+        # First reading writes the snapshot, second one restores it
+        etude = Etude(etu_path)
+        etude.read_all(use_snapshot=True)
+        self.assertTrue(os.path.exists(etude.get_snapshot_path()))
+        etude = Etude(etu_path)
+        self.assertTrue(etude._read_snapshot(ignore_shp=False))
+        self.assertFalse(etude._read_snapshot(ignore_shp=True))
+        etude = Etude(etu_path)
+        etude.read_all(use_snapshot=True)
+        self.assertTrue(etude.was_read)
+        folder_out = os.path.join(folder_snapshot, 'out')
+        etude.write_all(folder_out)
+        self._same_folders(folder_in, folder_out, VERSION_GRAMMAIRE_COURANTE, etu_changed=False)
+
+        # Any modification of an input file invalidates the snapshot
+        dptg_path = etude.get_sous_modele('Sm_M3-6_c10').files['dptg']
+        mtime = os.path.getmtime(dptg_path)
+        os.utime(dptg_path, (mtime + 10, mtime + 10))
+        self.assertFalse(Etude(etu_path)._read_snapshot(ignore_shp=False))
+        Etude(etu_path).read_all(use_snapshot=True)  # snapshot is rewritten
+        self.assertTrue(Etude(etu_path)._read_snapshot(ignore_shp=False))
@@ -0,0 +1,65 @@
+# coding: utf-8
+from filecmp import cmp
+import os.path
+import pandas as pd
+import shutil
+import unittest
+
+from crue10.etude import Etude
+from crue10.tests import DATA_TESTS_FOLDER_ABSPATH
+from crue10.utils.multiple_runs import get_run_steady_results
+from crue10.utils.settings import VERSION_GRAMMAIRE_COURANTE
+from snippets._params import COEUR_CIBLE, COEUR_REFERENCE
+
+
+FOLDER_IN = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'in', VERSION_GRAMMAIRE_COURANTE, 'Etu3-6I_run')
+FOLDER_OUT = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', VERSION_GRAMMAIRE_COURANTE, 'multiple_runs')
+
+
+class MultipleRunsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # Two copies of the same study (one folder by study)
+        self.dossier = os.path.join(FOLDER_OUT, 'etudes')
+        if os.path.exists(self.dossier):
+            shutil.rmtree(self.dossier)
+        for etude_dossier in ('Etu_A', 'Etu_B'):
+            shutil.copytree(FOLDER_IN, os.path.join(self.dossier, etude_dossier))
+
+        # The second study has no reference run
+        scenario = Etude(os.path.join(FOLDER_IN, 'Etu3-6.etu.xml')).get_scenario_courant()
+        self.run = scenario.get_dernier_run()
+        row = {'etude_basename': 'Etu3-6.etu.xml', 'scenario': scenario.id, 'run_id': self.run.id}
+        self.df_runs_unique = pd.DataFrame([
+            dict(row, etude_dossier='Etu_A', exe_id=COEUR_REFERENCE, run_idx=0),
+            dict(row, etude_dossier='Etu_A', exe_id=COEUR_CIBLE, run_idx=1),
+            dict(row, etude_dossier='Etu_B', exe_id=COEUR_CIBLE, run_idx=1),
+        ])
+
+    def test_get_run_steady_results_ncsize(self):
+        df_diff_stat = {}
+        for ncsize in (1, 2):
+            folder_csv = os.path.join(FOLDER_OUT, 'ncsize_%i' % ncsize)
+            if os.path.exists(folder_csv):
+                shutil.rmtree(folder_csv)
+            os.makedirs(folder_csv)
+            df_diff_stat[ncsize] = get_run_steady_results(self.dossier, self.df_runs_unique, COEUR_REFERENCE,
+                                                          out_csv_diff_by_calc=os.path.join(folder_csv, '%s.csv'),
+                                                          ncsize=ncsize)
+        pd.testing.assert_frame_equal(df_diff_stat[1], df_diff_stat[2])
+
+        # 4 criteria for both runs of the first study, the reference of another study is not used
+        df_diff_stat = df_diff_stat[1]
+        self.assertEqual(list(df_diff_stat['etude_dossier']), ['Etu_A'] * 8)
+        self.assertEqual(list(df_diff_stat['exe_id']), [COEUR_REFERENCE] * 4 + [COEUR_CIBLE] * 4)
+        self.assertEqual(list(df_diff_stat['variable']), ['MSD', 'MAD', 'DIFF_ABS_MAX', 'RMSD'] * 2)
+        self.assertTrue((df_diff_stat['value'] == 0.0).all())
+
+        # Differences by calculation are only written for the target run
+        self.assertEqual(os.listdir(os.path.join(FOLDER_OUT, 'ncsize_1')), ['Etu_A.csv'])
+        self.assertTrue(cmp(os.path.join(FOLDER_OUT, 'ncsize_1', 'Etu_A.csv'),
+                            os.path.join(FOLDER_OUT, 'ncsize_2', 'Etu_A.csv'), shallow=False))
+        df_diff = pd.read_csv(os.path.join(FOLDER_OUT, 'ncsize_1', 'Etu_A.csv'), sep=';')
+        self.assertEqual(list(df_diff.columns), ['id_calcul', 'emh', 'diff'])
+        resultats = self.run.get_resultats_calcul()
+        self.assertEqual(len(df_diff), len(resultats.res_calc_pseudoperm) * len(resultats.emh['Section']))
@@ -2,14 +2,25 @@
 from collections import OrderedDict
 from difflib import unified_diff
 from filecmp import cmp
+import gzip
+import importlib.util
 import numpy as np
 import os
+import pandas as pd
 import pickle
+import shutil
 from sys import version_info
 import unittest
+import warnings
 
 from crue10.etude import Etude
+from crue10.run.resultats_calcul import FilePosition, get_times_in_seconds, ResCalcTrans, ResCalcTransLazy, \
+    ResultatsCalcul
+from crue10.run.resultats_generator import get_time_in_crue10_format, ResultatsGenerator
+from crue10.run.resultats_live import ResultatsLive
+from crue10.run.resultats_store import is_store_up_to_date, ResultatsStore, write_resultats_store
 from crue10.tests import DATA_TESTS_FOLDER_ABSPATH, WRITE_REFERENCE_FILES
+from crue10.utils import check_xml_file, ExceptionCrue10
 from crue10.utils.settings import CSV_DELIMITER, FMT_FLOAT_CSV, VERSION_GRAMMAIRE_COURANTE
 
 
@@ -226,3 +237,669 @@ class ResultatsCalculTestCase(unittest.TestCase):
         df_actual = self.resultats.extract_res_trans_as_dataframe(['Q', 'Z'], SECTIONS)
         df_actual.to_csv(os.path.join(FOLDER_OUT, basename), sep=CSV_DELIMITER, float_format=FMT_FLOAT_CSV)
         self.assertTrue(cmp(os.path.join(FOLDER_IN, basename), os.path.join(FOLDER_OUT, basename)))
+
+    def test_get_data_memmap(self):
+        resultats_memmap = ResultatsCalcul(self.resultats.rcal_path, use_memmap=True)
+        self.assertTrue(resultats_memmap.use_memmap)
+
+        desired = self.resultats.get_data_pseudoperm('Cc_P02')
+        actual = resultats_memmap.get_data_pseudoperm('Cc_P02')
+        self.assertEqual(actual.keys(), desired.keys())
+        for key in desired.keys():
+            np.testing.assert_equal(actual[key], desired[key])
+
+        desired = self.resultats.get_data_trans('Cc_T01')
+        actual = resultats_memmap.get_data_trans('Cc_T01')
+        self.assertEqual(actual.keys(), desired.keys())
+        for key in desired.keys():
+            np.testing.assert_equal(actual[key], desired[key])
+
+        # Frames which are not regularly spaced (copies instead of views)
+        frame_list = self.resultats.get_res_calc_trans('Cc_T01').frame_list
+        file_pos_list = [file_pos for _, file_pos in frame_list[::-1]] + [frame_list[0][1]]
+        actual = resultats_memmap._rbin_memmap.get_data(file_pos_list, False, resultats_memmap.emh_types)
+        for key in desired.keys():
+            np.testing.assert_equal(actual[key][:-1], desired[key][::-1])
+            np.testing.assert_equal(actual[key][-1], desired[key][0])
+
+        with self.assertRaises(ExceptionCrue10):
+            resultats_memmap._rbin_memmap.get_data(file_pos_list, True, resultats_memmap.emh_types)
+
+    def test_get_data_all_pseudoperm_stacked(self):
+        resultats_memmap = ResultatsCalcul(self.resultats.rcal_path, use_memmap=True)
+        for resultats in (self.resultats, resultats_memmap):
+            # Calculations in the reverse order of the RBIN file
+            resultats.res_calc_pseudoperm = OrderedDict(reversed(list(resultats.res_calc_pseudoperm.items())))
+            data = resultats.get_data_all_pseudoperm()
+            self.assertEqual(set(data.keys()), set(emh_type for emh_type, _ in resultats._res_pattern))
+            for i, calc_name in enumerate(resultats.res_calc_pseudoperm.keys()):
+                for emh_type, values in resultats.get_data_pseudoperm(calc_name).items():
+                    np.testing.assert_equal(data[emh_type][i], values)
+            pos_z = resultats.get_variable_position('Section', 'Z')
+            np.testing.assert_equal(resultats.get_all_pseudoperm_var_at_emhs_as_array('Z', SECTIONS),
+                                    data['Section'][:, resultats.section_positions_of(SECTIONS), pos_z])
+            np.testing.assert_equal(resultats.get_all_pseudoperm_vars_at_emh_as_array('Ca_N6', ['Vol', 'Splan']),
+                                    data['Casier'][:, CASIERS.index('Ca_N6'), [resultats.get_variable_position(
+                                        'Casier', varname) for varname in ['Vol', 'Splan']]])
+            data['Section'][0, 0, 0] = 0.0  # arrays are writeable
+
+    def test_get_data_threads(self):
+        resultats_threads = ResultatsCalcul(self.resultats.rcal_path, nb_threads=4)
+        desired = self.resultats.get_data_trans('Cc_T01')
+        actual = resultats_threads.get_data_trans('Cc_T01')
+        self.assertEqual(actual.keys(), desired.keys())
+        for key in desired.keys():
+            np.testing.assert_equal(actual[key], desired[key])
+        for (time, res), (time_desired, res_desired) in zip(resultats_threads.iter_frames_trans('Cc_T01', chunk=3),
+                                                             self.resultats.iter_frames_trans('Cc_T01', chunk=3)):
+            np.testing.assert_equal(time, time_desired)
+            for key in res_desired.keys():
+                np.testing.assert_equal(res[key], res_desired[key])
+
+        # Errors raised in threads are propagated
+        frame_list = self.resultats.get_res_calc_trans('Cc_T01').frame_list
+        with self.assertRaises(ExceptionCrue10):
+            resultats_threads._read_frames([file_pos for _, file_pos in frame_list], True, resultats_threads.emh_types)
+        with self.assertRaises(ExceptionCrue10):
+            ResultatsCalcul(self.resultats.rcal_path, nb_threads=0)
+
+    def test_lazy(self):
+        resultats_lazy = ResultatsCalcul(self.resultats.rcal_path, lazy=True)
+        self.assertEqual(resultats_lazy.emh, self.resultats.emh)
+        self.assertEqual(resultats_lazy.variables, self.resultats.variables)
+        self.assertEqual(list(resultats_lazy.res_calc_pseudoperm.keys()),
+                         list(self.resultats.res_calc_pseudoperm.keys()))
+        calc_lazy = resultats_lazy.get_res_calc_trans('Cc_T01')
+        calc = self.resultats.get_res_calc_trans('Cc_T01')
+        self.assertIsInstance(calc_lazy, ResCalcTransLazy)
+        self.assertEqual(calc_lazy.nb_frames, 25)
+        self.assertEqual(len(calc_lazy.rbin_paths), 1)
+        np.testing.assert_equal(calc_lazy.time_serie(), calc.time_serie())
+
+        desired = self.resultats.get_data_trans('Cc_T01')
+        actual = resultats_lazy.get_data_trans('Cc_T01')
+        for key in desired.keys():
+            np.testing.assert_equal(actual[key], desired[key])
+        np.testing.assert_equal(resultats_lazy.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS),
+                                self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS))
+        self.assertIsNone(calc_lazy._frame_list)  # not materialised by the reads above
+
+        self.assertEqual([(time, file_pos.rbin_path, file_pos.byte_offset) for time, file_pos in calc_lazy.frame_list],
+                         [(time, file_pos.rbin_path, file_pos.byte_offset) for time, file_pos in calc.frame_list])
+        np.testing.assert_equal(get_times_in_seconds(['P0DT1H0M0S', 'P2DT0H1M3S']), [3600, 172863])
+        with self.assertRaises(ExceptionCrue10):
+            get_times_in_seconds(['P0DT1H0M0S', '1H'])
+
+    def test_get_trans_var_at_emhs_as_array_selective(self):
+        emh_list = ['St_PROF10', 'Ca_N6', 'Br_B6', 'St_B1_00050']
+        res = self.resultats.get_data_trans('Cc_T01')
+        desired = np.column_stack([
+            res['Section'][:, SECTIONS.index('St_PROF10'), 1],
+            res['Casier'][:, CASIERS.index('Ca_N6'), 1],
+            res['BrancheStrickler'][:, 0, 0],
+            res['Section'][:, SECTIONS.index('St_B1_00050'), 1],
+        ])
+        resultats_memmap = ResultatsCalcul(self.resultats.rcal_path, use_memmap=True)
+        max_gap_words = FilePosition.MAX_GAP_WORDS
+        try:
+            for max_gap in (max_gap_words, 1):  # one range or several ranges read per frame
+                FilePosition.MAX_GAP_WORDS = max_gap
+                for resultats in (self.resultats, resultats_memmap):
+                    actual = np.column_stack([
+                        resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Stot', emh_list[:1]),
+                        resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Splan', emh_list[1:3]),
+                        resultats.get_trans_vars_at_emh_as_array('Cc_T01', emh_list[3], ['Stot']),
+                    ])
+                    np.testing.assert_equal(actual, desired)
+        finally:
+            FilePosition.MAX_GAP_WORDS = max_gap_words
+
+    def test_get_query(self):
+        time = self.resultats.get_res_calc_trans('Cc_T01').time_serie()
+        requests = [
+            ('Cc_T01', SECTIONS[:5], ['Z', 'Q']),
+            ('Cc_T01', CASIERS, ['Splan'], time[3], time[10]),
+            ('Cc_T01', ['St_PROF10'], ['Z'], time[5]),
+        ]
+        resultats_memmap = ResultatsCalcul(self.resultats.rcal_path, use_memmap=True)
+        for resultats in (self.resultats, resultats_memmap):
+            query = resultats.get_query(requests)
+            self.assertEqual(len(query.requests), 3)
+            results = query.execute()
+            np.testing.assert_equal(results[0][0], time)
+            for i, varname in enumerate(['Z', 'Q']):
+                np.testing.assert_equal(results[0][1][:, :, i],
+                                        self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', varname, SECTIONS[:5]))
+            np.testing.assert_equal(results[1][0], time[3:11])
+            np.testing.assert_equal(results[1][1][:, :, 0],
+                                    self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Splan', CASIERS)[3:11])
+            np.testing.assert_equal(results[2][1][:, 0, 0],
+                                    self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', ['St_PROF10'])[5:, 0])
+
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.get_query().add_request('Cc_T01', CASIERS, ['Z'])
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.get_query().add_request('Cc_INCONNU', CASIERS, ['Splan'])
+
+    def test_positions_of(self):
+        emh_types, positions = self.resultats.positions_of(['St_PROF10', 'Ca_N6', 'Br_B6', 'St_PROF6B'])
+        self.assertEqual(list(emh_types), ['Section', 'Casier', 'BrancheStrickler', 'Section'])
+        np.testing.assert_equal(positions, [SECTIONS.index('St_PROF10'), 1, 0, 0])
+        self.assertEqual(self.resultats.emh_type('Br_B4'), 'BrancheSaintVenant')
+        self.assertEqual(self.resultats.get_emh_position('BrancheSaintVenant', 'Br_B4'), 2)
+        self.assertEqual(self.resultats.get_variable_position('Section', 'Z'), 4)
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.positions_of(['St_INCONNUE'])
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.get_emh_position('Section', 'Ca_N6')
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.get_variable_position('Casier', 'Z')
+
+    def test_frame_cache(self):
+        frame_size = 155 * FilePosition.FLOAT_SIZE - 4 * FilePosition.FLOAT_SIZE  # without delimiters
+        resultats_cache = ResultatsCalcul(self.resultats.rcal_path, cache_size_mb=26.5 * frame_size / 1024 / 1024)
+        cache = resultats_cache.frame_cache
+
+        for _ in range(2):
+            actual = resultats_cache.get_data_trans('Cc_T01')
+            desired = self.resultats.get_data_trans('Cc_T01')
+            for key in desired.keys():
+                np.testing.assert_equal(actual[key], desired[key])
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (25, 25, 0))
+
+        for _ in range(2):
+            actual = resultats_cache.get_data_pseudoperm('Cc_P02')
+            desired = self.resultats.get_data_pseudoperm('Cc_P02')
+            for key in desired.keys():
+                np.testing.assert_equal(actual[key], desired[key])
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (26, 26, 0))
+
+        resultats_cache.get_data_pseudoperm('Cc_P01')  # exceeds the maximum size
+        self.assertEqual(len(cache), 27 - 1)
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.size, cache.max_size)
+        self.assertIsNone(cache.get(('Cc_T01', 0)))  # least recently used frame was removed
+
+    def test_frame_cache_compression(self):
+        resultats_cache = ResultatsCalcul(self.resultats.rcal_path, cache_size_mb=10, cache_compression='zlib')
+        cache = resultats_cache.frame_cache
+        desired = self.resultats.get_data_trans('Cc_T01')
+        for _ in range(2):
+            actual = resultats_cache.get_data_trans('Cc_T01')
+            for key in desired.keys():
+                np.testing.assert_equal(actual[key], desired[key])
+        self.assertEqual((cache.hits, cache.misses), (25, 25))
+        self.assertLess(cache.size, sum(values.nbytes for values in desired.values()))
+        with self.assertRaises(ExceptionCrue10):
+            ResultatsCalcul(self.resultats.rcal_path, cache_size_mb=10, cache_compression='lzma')
+
+    def test_dtype(self):
+        desired = self.resultats.get_data_trans('Cc_T01')
+        for use_memmap in [False, True]:
+            resultats_float32 = ResultatsCalcul(self.resultats.rcal_path, use_memmap=use_memmap, dtype=np.float32)
+            actual = resultats_float32.get_data_trans('Cc_T01')
+            for key in desired.keys():
+                self.assertEqual(actual[key].dtype, np.float32)
+                self.assertEqual(actual[key].nbytes, desired[key].nbytes // 2)
+                np.testing.assert_equal(actual[key], desired[key].astype(np.float32))
+
+        # Only Z is reduced: the other arrays and variables keep double precision
+        resultats_z = ResultatsCalcul(self.resultats.rcal_path, dtype={'Z': np.float16}, cache_size_mb=10,
+                                      cache_compression='zlib')
+        for _ in range(2):  # from files and from cache
+            actual = resultats_z.get_data_trans('Cc_T01')
+            self.assertEqual(actual['Section'].dtype, np.float64)
+            self.assertEqual(actual['Casier'].dtype, np.float64)
+            np.testing.assert_equal(actual['Casier'], desired['Casier'])
+            np.testing.assert_equal(actual['Section'][:, :, :-1], desired['Section'][:, :, :-1])
+            np.testing.assert_equal(actual['Section'][:, :, -1],
+                                    desired['Section'][:, :, -1].astype(np.float16).astype(np.float64))
+        values = resultats_z.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS[:3])
+        self.assertEqual(values.dtype, np.float16)
+        np.testing.assert_equal(values, self.resultats.get_trans_var_at_emhs_as_array(
+            'Cc_T01', 'Z', SECTIONS[:3]).astype(np.float16))
+        values = resultats_z.get_trans_vars_at_emh_as_array('Cc_T01', SECTIONS[0], ['Q', 'Z'])
+        self.assertEqual(values.dtype, np.float64)
+
+        with self.assertRaises(ExceptionCrue10):
+            ResultatsCalcul(self.resultats.rcal_path, dtype={'Zinconnue': np.float32})
+        with self.assertRaises(ExceptionCrue10):
+            ResultatsCalcul(self.resultats.rcal_path, dtype=np.int32)
+
+    def test_resultats_generator(self):
+        # Same layout as the Crue10 results
+        generator = ResultatsGenerator(
+            nb_noeuds=7, nb_casiers=2, nb_sections=26, variables={'Casier': ['Qech', 'Splan', 'Vol']},
+            nb_branches={'BrancheOrifice': 1, 'BrancheSaintVenant': 3, 'BrancheSeuilLateral': 1,
+                         'BrancheSeuilTransversal': 1, 'BrancheStrickler': 1})
+        self.assertEqual(generator.frame_nb_words, 155)
+        self.assertEqual(generator._res_pattern, self.resultats._res_pattern)
+
+        generator = ResultatsGenerator(nb_noeuds=4, nb_casiers=3, nb_sections=7, variables={'Noeud': ['Z']},
+                                       nb_branches={'BrancheOrifice': 2, 'BrancheStrickler': 1},
+                                       nb_frames=30, dt=600, max_file_size_mb=0.003)
+        folder = os.path.join(FOLDER_OUT, 'Etu3-6I_run_synthetic', 'Runs', 'Sc_Synthetique', 'R1', 'Mo_Synthetique')
+        if os.path.exists(folder):
+            shutil.rmtree(folder)
+        rcal_path = generator.write(folder)
+        self.assertEqual(check_xml_file(rcal_path, VERSION_GRAMMAIRE_COURANTE), [])
+
+        desired_trans = generator.get_values(generator.calc_trans['Cc_T01'])
+        desired_pseudoperm = generator.get_pseudoperm_values()
+        for kwargs in [{}, {'lazy': True}, {'use_memmap': True}]:
+            resultats = ResultatsCalcul(rcal_path, **kwargs)
+            self.assertEqual(resultats.emh_types, ['Noeud', 'Casier', 'Section', 'BrancheStrickler'])
+            self.assertEqual(len(resultats.get_rbin_paths()), 6)  # 6 frames by file
+            np.testing.assert_equal(resultats.get_res_calc_trans('Cc_T01').time_serie(), np.arange(30) * 600)
+            actual = resultats.get_data_trans('Cc_T01')
+            for emh_type in resultats.emh_types:
+                np.testing.assert_equal(actual[emh_type], desired_trans[emh_type])
+            actual = resultats.get_data_all_pseudoperm()
+            for emh_type in resultats.emh_types:
+                np.testing.assert_equal(actual[emh_type], desired_pseudoperm[emh_type])
+
+        self.assertEqual(get_time_in_crue10_format(90061), 'P1DT1H1M1S')
+        with self.assertRaises(ExceptionCrue10):
+            ResultatsGenerator(nb_branches={'BrancheInconnue': 1})
+
+    def test_iter_frames_trans(self):
+        desired = self.resultats.get_data_trans('Cc_T01')
+        time_serie = self.resultats.get_res_calc_trans('Cc_T01').time_serie()
+        chunks = list(self.resultats.iter_frames_trans('Cc_T01', emh_types=['Casier', 'Section'], chunk=7))
+        self.assertEqual([len(time) for time, _ in chunks], [7, 7, 7, 4])
+        np.testing.assert_equal(np.concatenate([time for time, _ in chunks]), time_serie)
+        for emh_type in ['Casier', 'Section']:
+            np.testing.assert_equal(np.concatenate([res[emh_type] for _, res in chunks]), desired[emh_type])
+        self.assertEqual(list(chunks[0][1].keys()), ['Casier', 'Section'])
+        with self.assertRaises(ExceptionCrue10):
+            next(self.resultats.iter_frames_trans('Cc_T01', emh_types=['Noeud']))
+
+    def test_extract_profil_long_trans_max_as_dataframe_by_chunks(self):
+        chunk_size = ResultatsCalcul.CHUNK_SIZE
+        for start_time, end_time in [(-float('inf'), float('inf')), (3600.0, 10 * 3600.0)]:
+            ResultatsCalcul.CHUNK_SIZE = chunk_size
+            df_desired = self.resultats.extract_profil_long_trans_max_as_dataframe(
+                'Cc_T01', self.branches, start_time=start_time, end_time=end_time, associated_time=True)
+            try:
+                ResultatsCalcul.CHUNK_SIZE = 4
+                df_actual = self.resultats.extract_profil_long_trans_max_as_dataframe(
+                    'Cc_T01', self.branches, start_time=start_time, end_time=end_time, associated_time=True)
+            finally:
+                ResultatsCalcul.CHUNK_SIZE = chunk_size
+            self.assertTrue(df_actual.equals(df_desired))
+        self.assertTrue((df_actual['time_Z'] <= 10 * 3600.0).all())
+        self.assertTrue((df_actual['time_Z'] >= 3600.0).all())
+
+    def test_time_window(self):
+        calc = self.resultats.get_res_calc_trans('Cc_T01')
+        time = calc.time_serie()
+        self.assertEqual(calc.get_frame_range(), (0, 25))
+        self.assertEqual(calc.get_frame_range(time[3], time[10]), (3, 11))
+        self.assertEqual(calc.get_frame_range(time[3] + 1.0, time[10] - 1.0), (4, 10))
+        self.assertEqual(calc.get_frame_range(time[-1] + 1.0), (25, 25))
+
+        desired = self.resultats.get_data_trans('Cc_T01')
+        actual = self.resultats.get_data_trans('Cc_T01', start_time=time[3], end_time=time[10])
+        for key in desired.keys():
+            np.testing.assert_equal(actual[key], desired[key][3:11])
+        times = np.concatenate([t for t, _ in self.resultats.iter_frames_trans('Cc_T01', chunk=3, start_time=time[3],
+                                                                               end_time=time[10])])
+        np.testing.assert_equal(times, time[3:11])
+
+    def test_resample_trans(self):
+        time = self.resultats.get_res_calc_trans('Cc_T01').time_serie()
+        desired = self.resultats.get_data_trans('Cc_T01')
+
+        # Times of the frames: exact values
+        actual = self.resultats.resample_trans('Cc_T01', time[::4])
+        for key in desired.keys():
+            np.testing.assert_equal(actual[key], desired[key][::4])
+
+        # Intermediate times: linear interpolation
+        times = 0.25 * time[1:] + 0.75 * time[:-1]
+        actual = self.resultats.resample_trans('Cc_T01', times, emh_types=['Section'])
+        np.testing.assert_allclose(actual['Section'],
+                                   0.25 * desired['Section'][1:] + 0.75 * desired['Section'][:-1], rtol=1e-12)
+        np.testing.assert_allclose(self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS, times=times),
+                                   actual['Section'][:, [self.resultats.get_emh_position('Section', section)
+                                                         for section in SECTIONS],
+                                                     self.resultats.get_variable_position('Section', 'Z')],
+                                   rtol=1e-12)
+        np.testing.assert_equal(self.resultats.get_trans_vars_at_emh_as_array('Cc_T01', 'Ca_N7', ['Splan', 'Vol'],
+                                                                               times=time),
+                                self.resultats.get_trans_vars_at_emh_as_array('Cc_T01', 'Ca_N7', ['Splan', 'Vol']))
+
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.resample_trans('Cc_T01', [time[0] - 1.0])
+
+    def test_reduce_trans(self):
+        start_time, end_time = 2 * 3600.0, 20 * 3600.0
+        time = self.resultats.get_res_calc_trans('Cc_T01').time_serie()
+        mask = np.logical_and(start_time <= time, time <= end_time)
+        time = time[mask]
+        res = self.resultats.get_data_trans('Cc_T01')
+        threshold = {'Section': np.array([[0.0, 0.0, 0.0, 0.0, 5.0]]), 'Casier': 1000.0}
+
+        actual = self.resultats.reduce_trans('Cc_T01', ResultatsCalcul.REDUCTIONS, emh_types=['Section', 'Casier'],
+                                             start_time=start_time, end_time=end_time, threshold=threshold, chunk=4)
+        self.assertEqual(list(actual.keys()), ResultatsCalcul.REDUCTIONS)
+        for emh_type in ['Section', 'Casier']:
+            values = res[emh_type][mask, :, :]
+            np.testing.assert_equal(actual['max'][emh_type], np.max(values, axis=0))
+            np.testing.assert_equal(actual['min'][emh_type], np.min(values, axis=0))
+            np.testing.assert_equal(actual['time_max'][emh_type], time[np.argmax(values, axis=0)])
+            np.testing.assert_equal(actual['time_min'][emh_type], time[np.argmin(values, axis=0)])
+            np.testing.assert_allclose(actual['sum'][emh_type], np.sum(values, axis=0))
+            np.testing.assert_allclose(actual['mean'][emh_type], np.mean(values, axis=0))
+            dt = np.diff(time)[:, np.newaxis, np.newaxis]
+            np.testing.assert_allclose(actual['integral'][emh_type],
+                                       np.sum(0.5 * (values[1:] + values[:-1]) * dt, axis=0))
+
+            # Exceedance durations are bounded by the number of intervals above the threshold
+            is_above = values > threshold[emh_type]
+            nb_above_both = np.sum(np.logical_and(is_above[1:], is_above[:-1]), axis=0)
+            nb_above_one = np.sum(np.logical_or(is_above[1:], is_above[:-1]), axis=0)
+            self.assertTrue(np.all(actual['time_above'][emh_type] >= 3600.0 * nb_above_both))
+            self.assertTrue(np.all(actual['time_above'][emh_type] <= 3600.0 * nb_above_one))
+            time_first_above = np.where(is_above.any(axis=0), time[np.argmax(is_above, axis=0)], np.nan)
+            np.testing.assert_equal(actual['time_first_above'][emh_type], time_first_above)
+
+        # Linear interpolation of the threshold crossing
+        delta_start = np.array([1.0, -1.0, 1.0, -1.0, 0.0])
+        delta_end = np.array([1.0, -1.0, -3.0, 3.0, 0.0])
+        np.testing.assert_allclose(ResultatsCalcul._duration_above(delta_start, delta_end, 100.0),
+                                   [100.0, 0.0, 25.0, 75.0, 0.0])
+
+        # EMHs without any value have no time of extremum
+        iter_frames_trans = self.resultats.iter_frames_trans
+
+        def iter_frames_trans_nan(*args, **kwargs):
+            for time_chunk, res_chunk in iter_frames_trans(*args, **kwargs):
+                res_chunk = dict(res_chunk, Casier=np.array(res_chunk['Casier']))
+                res_chunk['Casier'][:, 0, :] = np.nan
+                yield time_chunk, res_chunk
+
+        self.resultats.iter_frames_trans = iter_frames_trans_nan
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                actual = self.resultats.reduce_trans('Cc_T01', ['time_max', 'time_min'], emh_types=['Casier'])
+        finally:
+            del self.resultats.iter_frames_trans
+        for reduction in ['time_max', 'time_min']:
+            self.assertTrue(np.isnan(actual[reduction]['Casier'][0, :]).all())
+            self.assertTrue(np.isfinite(actual[reduction]['Casier'][1:, :]).all())
+
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.reduce_trans('Cc_T01', ['time_above'])
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.reduce_trans('Cc_T01', ['median'])
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.reduce_trans('Cc_T01', ['max'], start_time=1e9)
+
+    def test_extract_dyke_exceedance_as_dataframe(self):
+        section_names = ['St_PROF10', 'St_PROF3A', 'St_PROF10', 'St_B1_00050']
+        z = self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', section_names)
+        time = self.resultats.get_res_calc_trans('Cc_T01').time_serie()
+        crest_levels = np.array([z[5, 0], z[0, 1] - 0.1, z.max() + 1.0, z[10, 3]])
+        freeboards = np.array([0.0, 0.0, 0.5, 0.01])
+
+        for chunk in (3, None):
+            df = self.resultats.extract_dyke_exceedance_as_dataframe('Cc_T01', section_names, crest_levels,
+                                                                     freeboards, chunk=chunk)
+            self.assertEqual(list(df['section']), section_names)
+            margin = z + freeboards - crest_levels
+            for i in range(len(section_names)):
+                above = np.where(margin[:, i] > 0)[0]
+                if len(above) == 0:
+                    self.assertTrue(np.isnan(df['time_first_above'][i]))
+                    self.assertEqual(df['time_above'][i], 0.0)
+                else:
+                    self.assertEqual(df['time_first_above'][i], time[above[0]])
+                    self.assertEqual(df['z_first_above'][i], z[above[0], i])
+                self.assertEqual(df['margin_max'][i], margin[:, i].max())
+                self.assertEqual(df['time_margin_max'][i], time[np.argmax(margin[:, i])])
+            self.assertEqual(df['time_above'][1], time[-1] - time[0])  # always above
+            pos_z = self.resultats.get_variable_position('Section', 'Z')
+            for i, position in enumerate(self.resultats.section_positions_of(section_names)):
+                threshold = np.full(self.resultats._res_blocks['Section'][1], np.inf)
+                threshold[position, pos_z] = crest_levels[i] - freeboards[i]
+                time_above = self.resultats.reduce_trans('Cc_T01', ['time_above'], emh_types=['Section'],
+                                                         threshold={'Section': threshold})['time_above']['Section']
+                self.assertAlmostEqual(df['time_above'][i], time_above[position, pos_z], delta=1e-6)
+
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.extract_dyke_exceedance_as_dataframe('Cc_T01', section_names, crest_levels[:2])
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.extract_dyke_exceedance_as_dataframe('Cc_T01', ['Ca_N7'], [0.0])
+
+    def test_export_all_calc(self):
+        basename = 'Etu3-6I_run_all_trans.csv'
+        nb_rows = self.resultats.export_all_calc(os.path.join(FOLDER_OUT, basename + '.gz'), 'trans')
+        self.assertEqual(nb_rows, 3750)
+        with open(os.path.join(FOLDER_IN, basename), 'r') as filein:
+            with gzip.open(os.path.join(FOLDER_OUT, basename + '.gz'), 'rt') as fileout:
+                self.assertEqual(filein.read(), fileout.read())
+
+        basename = 'Etu3-6I_run_all_trans_wide.csv'
+        nb_rows = self.resultats.export_all_calc(os.path.join(FOLDER_OUT, basename), 'trans', layout='wide')
+        self.assertEqual(nb_rows, 25 * (2 + 26 + 3 + 1))
+        df_wide = pd.read_csv(os.path.join(FOLDER_OUT, basename), sep=CSV_DELIMITER)
+        self.assertEqual(list(df_wide.columns), ['calc', 'time', 'emh_type', 'emh', 'Qech', 'Splan', 'Vol',
+                                                 'Q', 'Stot', 'Vact', 'Vc', 'Z', 'SplanAct', 'SplanSto', 'SplanTot'])
+        df_sections = df_wide[df_wide['emh_type'] == 'Section']
+        z_at_sections = self.resultats.get_data_trans('Cc_T01')['Section'][:, :, 4]
+        np.testing.assert_allclose(df_sections['Z'].values, z_at_sections.ravel(), rtol=1e-6)
+        self.assertTrue(df_sections['Qech'].isnull().all())
+
+        # Several chunks, each transient being read only once
+        calls = []
+        iter_frames_trans = self.resultats.iter_frames_trans
+
+        def iter_frames_trans_counted(calc_name, **kwargs):
+            calls.append(calc_name)
+            return iter_frames_trans(calc_name, chunk=7, **kwargs)
+        self.resultats.iter_frames_trans = iter_frames_trans_counted
+        basename = 'Etu3-6I_run_all_trans.csv'
+        self.resultats.export_all_calc(os.path.join(FOLDER_OUT, basename), 'trans')
+        self.assertEqual(calls, list(self.resultats.res_calc_trans.keys()))
+        with open(os.path.join(FOLDER_IN, basename), 'r') as filein:
+            with open(os.path.join(FOLDER_OUT, basename), 'r') as fileout:
+                self.assertEqual(filein.read(), fileout.read())
+        del self.resultats.iter_frames_trans
+
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.export_all_calc(os.path.join(FOLDER_OUT, 'res.txt'), 'trans')
+        with self.assertRaises(ExceptionCrue10):
+            self.resultats.export_all_calc(os.path.join(FOLDER_OUT, 'res.csv'), 'trans', layout='large')
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, "pyarrow n'est pas installé")
+    def test_export_all_calc_parquet(self):
+        file_path = os.path.join(FOLDER_OUT, 'Etu3-6I_run_all_pseudoperm.parquet')
+        nb_rows = self.resultats.export_all_calc(file_path, 'pseudoperm')
+        df_actual = pd.read_parquet(file_path)
+        df_desired = pd.read_csv(os.path.join(FOLDER_IN, 'Etu3-6I_run_all_pseudoperm.csv'), sep=CSV_DELIMITER)
+        self.assertEqual(nb_rows, len(df_desired))
+        np.testing.assert_allclose(df_actual['value'].values, df_desired['value'].values, rtol=1e-6)
+
+    def test_extract_res_trans_as_dataframe_all_calcs(self):
+        calc = ResCalcTrans('Cc_T02')
+        calc.frame_list = self.resultats.get_res_calc_trans('Cc_T01').frame_list[5:12]
+        self.resultats.res_calc_trans[calc.name] = calc
+
+        df = self.resultats.extract_res_trans_as_dataframe(['Z', 'Splan'], ['St_PROF10', 'Ca_N6', 'St_INCONNUE'])
+        self.assertEqual(list(df.columns), ['Calcul', 'Temps', 'Z St_PROF10', 'Splan Ca_N6'])
+        self.assertEqual(list(df['Calcul']), ['Cc_T01'] * 25 + ['Cc_T02'] * 7)
+        np.testing.assert_equal(df['Temps'].values[25:], df['Temps'].values[5:12])
+        np.testing.assert_equal(df['Z St_PROF10'].values[25:], df['Z St_PROF10'].values[5:12])
+        np.testing.assert_equal(df['Splan Ca_N6'].values[:25],
+                                self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Splan', ['Ca_N6'])[:, 0])
+
+    def test_resultats_store(self):
+        store_path = write_resultats_store(self.resultats, os.path.join(FOLDER_OUT, 'Etu3-6I_run_store'))
+        self.assertTrue(is_store_up_to_date(store_path, self.resultats))
+        store = ResultatsStore(store_path)
+        self.assertEqual(store.emh_types, self.resultats.emh_types)
+        self.assertEqual(store.emh, self.resultats.emh)
+        self.assertEqual(store.variables, self.resultats.variables)
+        self.assertEqual(list(store.res_calc_pseudoperm.keys()), list(self.resultats.res_calc_pseudoperm.keys()))
+
+        np.testing.assert_equal(store.get_all_pseudoperm_var_at_emhs_as_array('Z', SECTIONS),
+                                self.resultats.get_all_pseudoperm_var_at_emhs_as_array('Z', SECTIONS))
+        for emh_type, values in self.resultats.get_data_all_pseudoperm().items():
+            np.testing.assert_equal(store.get_data_all_pseudoperm()[emh_type], values)
+            np.testing.assert_equal(store.get_data_pseudoperm('Cc_P02')[emh_type], values[1, :, :])
+        np.testing.assert_equal(store.get_res_calc_trans('Cc_T01').time_serie(),
+                                self.resultats.get_res_calc_trans('Cc_T01').time_serie())
+        for emh_type, values in self.resultats.get_data_trans('Cc_T01').items():
+            np.testing.assert_equal(store.get_data_trans('Cc_T01')[emh_type], values)
+
+        # Time series (EMH-major layout)
+        np.testing.assert_equal(store.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS),
+                                self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS))
+        np.testing.assert_equal(store.get_trans_vars_at_emh_as_array('Cc_T01', 'Ca_N7', ['Splan', 'Vol']),
+                                self.resultats.get_trans_vars_at_emh_as_array('Cc_T01', 'Ca_N7', ['Splan', 'Vol']))
+        pd.testing.assert_frame_equal(
+            store.extract_profil_long_trans_max_as_dataframe('Cc_T01', self.branches),
+            self.resultats.extract_profil_long_trans_max_as_dataframe('Cc_T01', self.branches))
+
+        times = 0.5 * (self.resultats.get_res_calc_trans('Cc_T01').time_serie()[1:4] +
+                       self.resultats.get_res_calc_trans('Cc_T01').time_serie()[:3])
+        np.testing.assert_equal(store.resample_trans('Cc_T01', times)['Casier'],
+                                self.resultats.resample_trans('Cc_T01', times)['Casier'])
+        np.testing.assert_equal(store.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS, times=times),
+                                self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS, times=times))
+
+        results = store.get_query([('Cc_T01', CASIERS, ['Splan', 'Vol'], times[0])]).execute()
+        desired = self.resultats.get_query([('Cc_T01', CASIERS, ['Splan', 'Vol'], times[0])]).execute()
+        np.testing.assert_equal(results[0][0], desired[0][0])
+        np.testing.assert_equal(results[0][1], desired[0][1])
+
+        # Stored results have no position in the RBIN files
+        self.assertEqual(store.get_store_paths(),
+                         sorted(os.path.join(folder, filename) for folder, _, filenames in os.walk(store_path)
+                                for filename in filenames if filename.endswith('.npy')))
+        self.assertEqual(store.get_res_calc_trans('Cc_T01').nb_frames,
+                         self.resultats.get_res_calc_trans('Cc_T01').nb_frames)
+        with self.assertRaises(ExceptionCrue10):
+            store.get_rbin_paths()
+        with self.assertRaises(ExceptionCrue10):
+            store.get_res_calc_trans('Cc_T01').get_file_positions()
+        with self.assertRaises(ExceptionCrue10):
+            store.get_res_calc_trans('Cc_T01').frame_list
+        with self.assertRaises(ExceptionCrue10):
+            store.get_res_calc_pseudoperm('Cc_P01').file_pos
+
+        with self.assertRaises(ExceptionCrue10):
+            store.get_data_trans('Cc_INCONNU')
+        with self.assertRaises(ExceptionCrue10):
+            ResultatsStore(os.path.join(FOLDER_OUT, 'store_inconnu'))
+
+    def test_resultats_live(self):
+        live_folder = os.path.join(FOLDER_OUT, 'Etu3-6I_run_live')
+        if not os.path.exists(live_folder):
+            os.makedirs(live_folder)
+        rcal_path = os.path.join(live_folder, 'M3-6I_c10.rcal.xml')
+        rbin_path = os.path.join(live_folder, 'M3-6I_c10.rcal_0001.bin')
+        with open(self.resultats.rcal_path, 'rb') as in_rcal:
+            rcal = in_rcal.read()
+        with open(self.resultats.res_calc_pseudoperm['Cc_P01'].file_pos.rbin_path, 'rb') as in_rbin:
+            rbin = in_rbin.read()
+        frame_size = 155 * FilePosition.FLOAT_SIZE
+
+        # Incomplete rcal file (only the structure) and RBIN file with 2.5 frames
+        with open(rcal_path, 'wb') as out_rcal:
+            out_rcal.write(rcal[:rcal.index(b'<ResCalcPerms>') + 5])
+        with open(rbin_path, 'wb') as out_rbin:
+            out_rbin.write(rbin[:int(2.5 * frame_size)])
+        live = ResultatsLive(rcal_path, poll_interval=0.01)
+        self.assertEqual(live.emh, self.resultats.emh)
+        frames = list(live.iter_new_frames(emh_types=['Section'], timeout=0.05))
+        self.assertEqual([(calc_type, i_frame) for calc_type, i_frame, _ in frames],
+                         [('pseudoperm', 0), ('pseudoperm', 1)])
+        np.testing.assert_equal(frames[1][2]['Section'], self.resultats.get_data_pseudoperm('Cc_P02')['Section'])
+
+        # RBIN file completed
+        with open(rbin_path, 'ab') as out_rbin:
+            out_rbin.write(rbin[int(2.5 * frame_size):])
+        frames = []
+        nb_frames = live.follow(lambda calc_type, i_frame, res: frames.append(res['Casier']), emh_types=['Casier'],
+                                timeout=0.05)
+        self.assertEqual(nb_frames, 25)
+        self.assertEqual(live.nb_frames, {'pseudoperm': 2, 'trans': 25})
+        np.testing.assert_equal(np.array(frames), self.resultats.get_data_trans('Cc_T01')['Casier'])
+
+        with open(rcal_path, 'wb') as out_rcal:
+            out_rcal.write(rcal[:rcal.index(b'</StructureResultat>')])
+        with self.assertRaises(ExceptionCrue10):
+            ResultatsLive(rcal_path)
+
+    def _copy_run_with_truncated_rbin(self, nb_words):
+        """Copy the run files, the last RBIN file being truncated by `nb_words` words"""
+        run_folder = os.path.join(FOLDER_OUT, 'Etu3-6I_run_truncated')
+        if not os.path.exists(run_folder):
+            os.makedirs(run_folder)
+        for file_path in [self.resultats.rcal_path] + self.resultats.get_rbin_paths():
+            shutil.copy(file_path, run_folder)
+        rbin_path = os.path.join(run_folder, os.path.basename(self.resultats.get_rbin_paths()[-1]))
+        with open(rbin_path, 'rb+') as rbin:
+            rbin.truncate(os.path.getsize(rbin_path) - nb_words * FilePosition.FLOAT_SIZE)
+        return os.path.join(run_folder, os.path.basename(self.resultats.rcal_path))
+
+    def test_truncated_rbin(self):
+        rcal_path = self._copy_run_with_truncated_rbin(8)
+        for use_memmap in [False, True]:
+            resultats = ResultatsCalcul(rcal_path, use_memmap=use_memmap)
+            with self.assertRaisesRegex(ExceptionCrue10, 'incomplet'):
+                resultats.get_data_trans('Cc_T01')
+
+        # Values at sections are missing in the last frame
+        rcal_path = self._copy_run_with_truncated_rbin(100)
+        for use_memmap in [False, True]:
+            resultats = ResultatsCalcul(rcal_path, use_memmap=use_memmap)
+            with self.assertRaisesRegex(ExceptionCrue10, 'incomplet'):
+                resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', self.section_names)
+
+    def test_metadata_cache(self):
+        run_folder = os.path.join(FOLDER_OUT, 'Etu3-6I_run_metadata_cache')
+        if not os.path.exists(run_folder):
+            os.makedirs(run_folder)
+        for file_path in [self.resultats.rcal_path] + self.resultats.get_rbin_paths():
+            shutil.copy(file_path, run_folder)
+        rcal_path = os.path.join(run_folder, os.path.basename(self.resultats.rcal_path))
+        cache_path = rcal_path[:-len('.xml')] + '.metadata.pkl'
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+        resultats = ResultatsCalcul(rcal_path, use_metadata_cache=True)  # cache is written
+        self.assertEqual(resultats.get_metadata_cache_path(), cache_path)
+        self.assertIsNotNone(resultats.rcal_root)
+        self.assertTrue(os.path.exists(cache_path))
+
+        resultats_cache = ResultatsCalcul(rcal_path, use_metadata_cache=True)  # cache is read
+        self.assertIsNone(resultats_cache.rcal_root)
+        self.assertEqual(resultats_cache.emh, self.resultats.emh)
+        self.assertEqual(resultats_cache.variables, self.resultats.variables)
+        self.assertIsInstance(resultats_cache.get_res_calc_trans('Cc_T01'), ResCalcTransLazy)
+        np.testing.assert_equal(resultats_cache.get_data_all_pseudoperm()['Section'],
+                                self.resultats.get_data_all_pseudoperm()['Section'])
+        np.testing.assert_equal(resultats_cache.get_data_trans('Cc_T01')['Casier'],
+                                self.resultats.get_data_trans('Cc_T01')['Casier'])
+        np.testing.assert_equal(resultats_cache.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS),
+                                self.resultats.get_trans_var_at_emhs_as_array('Cc_T01', 'Z', SECTIONS))
+
+        # Cache is invalidated when a file changes
+        stat = os.stat(resultats.get_rbin_paths()[0])
+        os.utime(resultats.get_rbin_paths()[0], (stat.st_atime, stat.st_mtime + 10))
+        self.assertIsNotNone(ResultatsCalcul(rcal_path, use_metadata_cache=True).rcal_root)
+        self.assertIsNone(ResultatsCalcul(rcal_path, use_metadata_cache=True).rcal_root)
+
+        # Cache in another folder
+        cache_folder = ResultatsCalcul.METADATA_CACHE_FOLDER
+        try:
+            ResultatsCalcul.METADATA_CACHE_FOLDER = run_folder
+            resultats = ResultatsCalcul(rcal_path, use_metadata_cache=True)
+            self.assertEqual(os.path.dirname(resultats.get_metadata_cache_path()), run_folder)
+            self.assertTrue(os.path.exists(resultats.get_metadata_cache_path()))
+        finally:
+            ResultatsCalcul.METADATA_CACHE_FOLDER = cache_folder
@@ -1,10 +1,15 @@
 # coding: utf-8
+from filecmp import dircmp
 import numpy as np
-import os.path
+import os
+import pickle
 import unittest
 
 from crue10.etude import Etude
-from crue10.utils import ExceptionCrue10
+from crue10.sous_modele import read_all_sous_modeles, SousModele
+from crue10.tests import DATA_TESTS_FOLDER_ABSPATH
+from crue10.utils import ExceptionCrue10, parse_float_values
+from crue10.utils.settings import VERSION_GRAMMAIRE_COURANTE
 
 
 class SousModeleTestCase(unittest.TestCase):
@@ -91,3 +96,162 @@ class SousModeleTestCase(unittest.TestCase):
     def test_remove_sectioninterpolee(self):
         self.sous_modele.remove_sectioninterpolee()
         self.assertEqual(len(self.sous_modele.get_liste_sections_interpolees()), 0)
+
+    def test_xml_parser_lxml(self):
+        with self.assertRaises(ExceptionCrue10):
+            Etude(os.path.join('crue10', 'tests', 'data', 'in', '1.2', 'Etu3-6', 'Etu3-6.etu.xml'), xml_parser='sax')
+
+        for version_grammaire in ['1.2', '1.3']:
+            etu_path = os.path.join('crue10', 'tests', 'data', 'in', version_grammaire, 'Etu3-6', 'Etu3-6.etu.xml')
+            sous_modeles = {}
+            for xml_parser in SousModele.XML_PARSERS:
+                sous_modele = Etude(etu_path, xml_parser=xml_parser).get_sous_modele('Sm_M3-6_c10')
+                self.assertEqual(sous_modele.xml_parser, xml_parser)
+                sous_modele.read_all(ignore_shp=True)
+                sous_modeles[xml_parser] = sous_modele
+
+            # Same EMHs...
+            sm_etree, sm_lxml = sous_modeles['etree'], sous_modeles['lxml']
+            self.assertEqual(list(sm_etree.sections.keys()), list(sm_lxml.sections.keys()))
+            self.assertEqual(list(sm_etree.branches.keys()), list(sm_lxml.branches.keys()))
+            self.assertEqual(list(sm_etree.profils_casier.keys()), list(sm_lxml.profils_casier.keys()))
+            for section in sm_etree.get_liste_sections_profil():
+                section_lxml = sm_lxml.get_section(section.id)
+                self.assertTrue(np.array_equal(section.xz, section_lxml.xz))
+                self.assertEqual([(lit.id, lit.xt_min, lit.xt_max, lit.loi_frottement.id)
+                                  for lit in section.lits_numerotes],
+                                 [(lit.id, lit.xt_min, lit.xt_max, lit.loi_frottement.id)
+                                  for lit in section_lxml.lits_numerotes])
+            self.assertEqual(sm_etree.comments, sm_lxml.comments)
+
+            # ... so same written files
+            for xml_parser, sous_modele in sous_modeles.items():
+                folder_out = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', version_grammaire, 'xml_parser',
+                                          xml_parser)
+                os.makedirs(folder_out, exist_ok=True)
+                for xml_type in SousModele.FILES_XML:
+                    getattr(sous_modele, '_write_' + xml_type)(folder_out)
+            comparison = dircmp(*[os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', version_grammaire, 'xml_parser',
+                                               xml_parser) for xml_parser in SousModele.XML_PARSERS])
+            self.assertEqual(len(comparison.same_files), len(SousModele.FILES_XML))
+            self.assertEqual(comparison.diff_files, [])
+
+    def test_read_all_sous_modeles_ncsize(self):
+        etu_paths = [os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'in', VERSION_GRAMMAIRE_COURANTE, etude_folder,
+                                  'Etu3-6.etu.xml') for etude_folder in ('Etu3-6', 'Etu3-6_grammaire')]
+        for ncsize in (1, 2):
+            sous_modeles = [Etude(etu_path).get_sous_modele('Sm_M3-6_c10') for etu_path in etu_paths]
+            read_all_sous_modeles(sous_modeles, ncsize=ncsize)
+            for i, sous_modele in enumerate(sous_modeles):
+                self.assertTrue(sous_modele.was_read)
+                self.assertTrue(sous_modele.was_read_shp)
+
+                # References between EMHs are kept
+                for section in sous_modele.get_liste_sections_profil():
+                    for lit in section.lits_numerotes:
+                        self.assertIs(lit.loi_frottement, sous_modele.get_loi_frottement(lit.loi_frottement.id))
+                for branche in sous_modele.get_liste_branches():
+                    self.assertIs(branche.noeud_amont, sous_modele.get_noeud(branche.noeud_amont.id))
+                    self.assertIs(branche.get_section_amont(), sous_modele.get_section(branche.get_section_amont().id))
+
+                folder_out = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', VERSION_GRAMMAIRE_COURANTE, 'ncsize',
+                                          str(i), str(ncsize))
+                os.makedirs(folder_out, exist_ok=True)
+                for xml_type in SousModele.FILES_XML:
+                    getattr(sous_modele, '_write_' + xml_type)(folder_out)
+
+        # Same written files for serial and parallel readings
+        for i in range(len(etu_paths)):
+            comparison = dircmp(*[os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', VERSION_GRAMMAIRE_COURANTE, 'ncsize',
+                                               str(i), str(ncsize)) for ncsize in (1, 2)])
+            self.assertEqual(len(comparison.same_files), len(SousModele.FILES_XML))
+            self.assertEqual(comparison.diff_files, [])
+
+    def test_read_all_lazy(self):
+        etu_path = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'in', VERSION_GRAMMAIRE_COURANTE, 'Etu3-6', 'Etu3-6.etu.xml')
+        sous_modeles = {}
+        for lazy in (False, True):
+            sous_modele = Etude(etu_path).get_sous_modele('Sm_M3-6_c10')
+            sous_modele.read_all(lazy=lazy)
+            sous_modeles[lazy] = sous_modele
+        self.assertEqual(list(sous_modeles[False].load_timings.keys()), ['dfrt', 'drso', 'dptg', 'dcsp', 'shp'])
+        self.assertEqual(sous_modeles[False].get_lazy_components(), [])
+
+        # Only topology is read...
+        sous_modele = sous_modeles[True]
+        self.assertEqual(list(sous_modele.load_timings.keys()), ['drso'])
+        self.assertEqual(sous_modele.get_lazy_components(), ['dfrt', 'dptg', 'dcsp', 'shp'])
+        self.assertEqual(list(sous_modele.sections.keys()), list(sous_modeles[False].sections.keys()))
+        self.assertEqual([branche.noeud_aval.id for branche in sous_modele.get_liste_branches()],
+                         [branche.noeud_aval.id for branche in sous_modeles[False].get_liste_branches()])
+
+        # ... then components are read on first access
+        section = sous_modele.get_section('St_PROF10')
+        self.assertTrue(np.array_equal(section.xz, sous_modeles[False].get_section('St_PROF10').xz))
+        self.assertEqual(list(sous_modele.load_timings.keys()), ['drso', 'dfrt', 'dptg'])
+        self.assertIs(section.lits_numerotes[0].loi_frottement,
+                      sous_modele.get_loi_frottement(section.lits_numerotes[0].loi_frottement.id))
+        self.assertEqual(sous_modele.get_branche('Br_B1').geom, sous_modeles[False].get_branche('Br_B1').geom)
+        self.assertEqual(sous_modele.get_lazy_components(), ['dcsp'])
+
+        # Serialization reads all components
+        self.assertEqual(pickle.loads(pickle.dumps(sous_modele)).get_lazy_components(), [])
+        self.assertEqual(sous_modele.get_lazy_components(), [])
+
+        # Same written files
+        for lazy, sous_modele in sous_modeles.items():
+            folder_out = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', VERSION_GRAMMAIRE_COURANTE, 'lazy', str(lazy))
+            os.makedirs(folder_out, exist_ok=True)
+            for xml_type in SousModele.FILES_XML:
+                getattr(sous_modele, '_write_' + xml_type)(folder_out)
+        comparison = dircmp(*[os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', VERSION_GRAMMAIRE_COURANTE, 'lazy',
+                                           str(lazy)) for lazy in (False, True)])
+        self.assertEqual(len(comparison.same_files), len(SousModele.FILES_XML))
+        self.assertEqual(comparison.diff_files, [])
+
+    def test_read_all_lazy_missing_file(self):
+        etu_path = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'in', VERSION_GRAMMAIRE_COURANTE, 'Etu3-6', 'Etu3-6.etu.xml')
+        sous_modele = Etude(etu_path).get_sous_modele('Sm_M3-6_c10')
+        sous_modele.read_all(lazy=True)
+        dptg_path = sous_modele.files['dptg']
+        sous_modele.files['dptg'] = dptg_path + '.missing'
+        section = sous_modele.get_section('St_PROF10')
+
+        # The failed read is not considered as done: each access raises...
+        for _ in range(2):
+            with self.assertRaises(ExceptionCrue10):
+                section.xz
+            self.assertIn('dptg', sous_modele.get_lazy_components())
+        self.assertNotIn('dptg', sous_modele.load_timings)
+
+        # ... until the file can be read
+        sous_modele.files['dptg'] = dptg_path
+        self.assertEqual(section.xz.shape[1], 2)
+        self.assertNotIn('dptg', sous_modele.get_lazy_components())
+
+    def test_xml_parser_lxml_unknown_section(self):
+        etu_path = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'in', VERSION_GRAMMAIRE_COURANTE, 'Etu3-6', 'Etu3-6.etu.xml')
+        sous_modele = Etude(etu_path, xml_parser='lxml').get_sous_modele('Sm_M3-6_c10')
+        with open(sous_modele.files['drso'], 'r', encoding='utf-8') as in_drso:
+            drso = in_drso.read()
+        folder_out = os.path.join(DATA_TESTS_FOLDER_ABSPATH, 'out', VERSION_GRAMMAIRE_COURANTE, 'xml_parser')
+        os.makedirs(folder_out, exist_ok=True)
+        sous_modele.files['drso'] = os.path.join(folder_out, 'unknown_section.drso.xml')
+        with open(sous_modele.files['drso'], 'w', encoding='utf-8') as out_drso:
+            out_drso.write(drso.replace('SectionInterpolee', 'SectionInconnue', 2))
+        with self.assertRaisesRegex(ExceptionCrue10, 'SectionInconnue'):
+            sous_modele._read_drso()
+
+    def test_parse_float_values(self):
+        texts = ['0.0 1.5', '2.0   -3.25', '1.0E30 7']
+        self.assertTrue(np.array_equal(parse_float_values(texts),
+                                       np.array([[float(v) for v in text.split()] for text in texts])))
+        self.assertEqual(parse_float_values(texts, nb_columns=2).shape, (3, 2))
+        self.assertEqual(parse_float_values(['1 2 3'], nb_columns=3).shape, (1, 3))
+        self.assertEqual(parse_float_values([]).shape, (0,))
+        with self.assertRaises(ExceptionCrue10):
+            parse_float_values(texts, nb_columns=3)
+        with self.assertRaises(ExceptionCrue10):
+            parse_float_values(['1 2 3', '4'], nb_columns=2)  # same number of values but ragged lines
+        with self.assertRaises(ExceptionCrue10):
+            parse_float_values(['1 2', '3 4 5', '6'])
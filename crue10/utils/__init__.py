@@ -1,6 +1,7 @@
 # coding: utf-8
 from builtins import super  # Python2 fix
 from datetime import datetime
+from functools import lru_cache
 from io import open  # Python2 fix
 from jinja2 import Environment, FileSystemLoader
 from jinja2.filters import do_lower
@@ -37,6 +38,8 @@ PREFIX = "{http://www.fudaa.fr/xsd/crue}"
 
 XSI_SCHEMA_LOCATION = '{http://www.w3.org/2001/XMLSchema-instance}schemaLocation'
 
+XPATH_NAMESPACES = {'c': PREFIX[1:-1]}
+
 logger = logging.getLogger(__name__)
 handler = logging.StreamHandler()
 handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
@@ -123,12 +126,113 @@ def get_optional_commentaire(elt):
     return ''
 
 
-def parse_loi(elt, group='EvolutionFF', line='PointFF'):
+def parse_float_values(texts, nb_columns=None):
+    """
+    Décoder en une seule fois une liste de textes contenant chacun le même nombre de valeurs séparées par des espaces
+    (par exemple les textes des balises `PointFF` d'une loi) : les textes sont concaténés et convertis par un seul
+    appel à `np.fromstring`.
+    Une valeur sentinelle (NaN) est ajoutée après chaque texte pour vérifier que tous les textes ont bien
+    `nb_columns` valeurs.
+
+    :param texts: liste des textes (un texte par ligne du tableau)
+    :type texts: list(str)
+    :param nb_columns: nombre de valeurs par texte (si None alors il est déterminé à partir du premier texte).
+        Il est connu pour la plupart des lois (2 colonnes) et des éléments de seuil (3 ou 4 colonnes), ce qui évite
+        d'analyser un texte en Python
+    :type nb_columns: int, optional
+    :return: tableau de valeurs, shape=(nb_texts, nb_columns) (ou tableau vide si aucun texte)
+    :rtype: np.ndarray
+    """
+    if not texts:
+        return np.array([])
+    if nb_columns is None:
+        nb_columns = len(texts[0].split())
+    values = np.fromstring(' nan '.join(texts) + ' nan', sep=' ')
+    if values.size != len(texts) * (nb_columns + 1):
+        raise ExceptionCrue10("Impossible de décoder %i lignes de %i valeurs numériques (%i valeurs lues)"
+                              % (len(texts), nb_columns, values.size - len(texts)))
+    values = values.reshape(len(texts), nb_columns + 1)
+    is_ragged = ~np.isnan(values[:, -1])
+    if np.any(is_ragged):
+        raise ExceptionCrue10("La ligne `%s` ne contient pas %i valeurs numériques"
+                              % (texts[np.argmax(is_ragged)], nb_columns))
+    return np.ascontiguousarray(values[:, :-1])
+
+
+def parse_loi(elt, group='EvolutionFF', line='PointFF', nb_columns=None):
     elt_group = elt.find(PREFIX + group)
-    values = []
-    for point_ff in elt_group.findall(PREFIX + line):
-        values.append([float(v) for v in point_ff.text.split()])
-    return np.array(values)
+    return parse_float_values([point_ff.text for point_ff in elt_group.findall(PREFIX + line)], nb_columns)
+
+
+@lru_cache(maxsize=None)
+def get_xpath(expression):
+    """
+    Compiler une expression XPath (pour l'analyseur lxml) avec le préfixe `c` pour l'espace de noms Crue10
+    Chaque expression n'est compilée qu'une seule fois
+
+    :param expression: expression XPath (par exemple: `c:EvolutionFF/c:PointFF/text()`)
+    :type expression: str
+    :rtype: lxml.etree.XPath
+    """
+    return etree.XPath(expression, namespaces=XPATH_NAMESPACES, smart_strings=False)
+
+
+def get_xml_root_from_file_lxml(file_path):
+    """
+    Lire un fichier XML avec lxml (les commentaires XML sont ignorés pour être iso avec ElementTree)
+
+    :param file_path: chemin vers le fichier XML
+    :type file_path: str
+    :rtype: lxml.etree._Element
+    """
+    # A parser can not be shared between threads, so a new one is built for each file
+    tree = etree.parse(file_path, etree.XMLParser(remove_comments=True))
+    return tree.getroot()
+
+
+def parse_loi_lxml(elt, xpath_points, nb_columns=None):
+    """
+    Équivalent de `parse_loi` pour un élément lxml : tous les points sont extraits par une seule requête XPath
+    et convertis en une seule fois
+
+    :param elt: élément XML
+    :type elt: lxml.etree._Element
+    :param xpath_points: expression XPath compilée retournant le texte des points
+    :type xpath_points: lxml.etree.XPath
+    :param nb_columns: nombre de valeurs par point (voir `parse_float_values`)
+    :type nb_columns: int, optional
+    :rtype: np.ndarray
+    """
+    return parse_float_values(xpath_points(elt), nb_columns)
+
+
+XPATH_POINTFF = get_xpath('c:EvolutionFF/c:PointFF/text()')
+
+XPATH_COMMENTAIRE = get_xpath('string(c:Commentaire)')
+
+
+def get_files_signature(file_paths, ignore_missing=False):
+    """
+    Obtenir la signature (date de modification et taille) de fichiers
+
+    :param file_paths: liste des chemins vers les fichiers
+    :type file_paths: list(str)
+    :param ignore_missing: True pour associer None aux fichiers absents (au lieu de lever une exception)
+    :type ignore_missing: bool, optional
+    :return: dictionnaire avec pour chaque fichier sa date de modification et sa taille
+    :rtype: dict(tuple(float, int))
+    """
+    signature = {}
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+        except (OSError, IOError):
+            if not ignore_missing:
+                raise
+            signature[file_path] = None
+            continue
+        signature[file_path] = (stat.st_mtime, stat.st_size)
+    return signature
 
 
 def write_default_xml_file(xml_type, version_grammaire, file_path):
@@ -4,6 +4,7 @@
 Ensemble d'utilitaires mettant en œuvre divers design patterns.
 - Singleton
 - Factory
+- Lazy loading (chargement différé)
 PBa 2025-06 Création
 """
 from crue10.utils import ExceptionCrue10
@@ -81,3 +82,61 @@ def factory_make(nom_cls: str) -> type:
     :return: classe associée
     """
     return FactoryClass().make(nom_cls)
+
+
+class LazyAttributes:
+    """ Classe mixin mettant en œuvre le design pattern Lazy loading (chargement différé) sur des attributs.
+    Des attributs d'une instance sont retirés et associés à une fonction de chargement, appelée au premier accès à l'un
+    d'eux : elle doit (re)définir les attributs (par exemple en lisant un fichier).
+    Une instance est complètement chargée avant d'être copiée ou sérialisée (`copy`, `deepcopy`, `pickle`).
+    """
+
+    def __getattr__(self, name: str) -> any:
+        """ Charger un attribut différé (appelé uniquement si l'attribut n'est pas trouvé normalement).
+
+        :param name: nom de l'attribut
+        :return: valeur de l'attribut
+        """
+        loaders = self.__dict__.get('_lazy_loaders')  # not `self._lazy_loaders` to avoid an infinite recursion
+        if loaders is not None and name in loaders:
+            loaders[name]()
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
+    def __getstate__(self) -> dict:
+        """ Charger tous les attributs différés avant une copie ou une sérialisation.
+
+        :return: attributs de l'instance
+        """
+        for loader in set(self.__dict__.get('_lazy_loaders', {}).values()):
+            loader()
+        return self.__dict__
+
+    def set_lazy_attributes(self, names: list, loader: callable) -> dict:
+        """ Différer le chargement d'attributs : ils sont retirés de l'instance jusqu'à l'appel de `loader`.
+
+        :param names: noms des attributs
+        :param loader: fonction de chargement (sans argument)
+        :return: valeurs retirées (pour les attributs existants), à restaurer avant le chargement
+        """
+        loaders = self.__dict__.setdefault('_lazy_loaders', {})
+        values = {}
+        for name in names:
+            if name in self.__dict__:
+                values[name] = self.__dict__.pop(name)
+            loaders[name] = loader
+        return values
+
+    def unset_lazy_attributes(self, names: list, values: dict) -> None:
+        """ Restaurer des attributs différés (avant leur chargement effectif) et retirer leur fonction de chargement.
+
+        :param names: noms des attributs
+        :param values: valeurs retirées (renvoyées par `set_lazy_attributes`)
+        """
+        loaders = self.__dict__.get('_lazy_loaders', {})
+        for name in names:
+            loaders.pop(name, None)
+        if not loaders:
+            self.__dict__.pop('_lazy_loaders', None)
+        self.__dict__.update(values)
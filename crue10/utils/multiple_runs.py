@@ -19,86 +19,120 @@ def launch_scenario_modifications(function, modifications_liste, ncsize=NCSIZE):
         return pool.map(function, modifications_liste)
 
 
-def parse_otfa_runs(fichier_otfa):
+def _parse_otfa_campagne(args):
     """
+    Lire les deux Runs (référence et cible) d'une campagne OTFA (exécuté éventuellement dans un processus fils)
+
+    :param args: tuple avec le dossier du fichier OTFA, la campagne et s'il faut utiliser le cache des métadonnées
+    :type args: (str, Campagne, bool)
+    :return: liste des lignes (dictionnaires) à ajouter au tableau des Runs
+    :rtype: list(dict)
+    """
+    dossier_otfa, campagne, use_metadata_cache = args
+    rows = []
+
+    assert campagne.chemin_etude_ref == campagne.chemin_etude_cible
+    assert campagne.nom_scenario_ref == campagne.nom_scenario_cible
+
+    etude_dossier = os.path.basename(os.path.dirname(campagne.chemin_etude_ref))
+    logger.info(">>>>>>>>>> Dossier étude: %s <<<<<<<<<<" % etude_dossier)
+
+    for run_idx, exe_id in enumerate((COEUR_REFERENCE, COEUR_CIBLE)):
+        try:
+            if run_idx == 0:
+                etude = Etude(os.path.normpath(os.path.join(dossier_otfa, campagne.chemin_etude_ref)))
+                scenario = etude.get_scenario(campagne.nom_scenario_ref)
+                scenario.read_all(ignore_shp=True)
+                run = scenario.get_run(list(scenario.runs.keys())[0])  # old_c10m10
+            elif run_idx == 1:
+                etude = Etude(os.path.normpath(os.path.join(dossier_otfa, campagne.chemin_etude_cible)))
+                scenario = etude.get_scenario(campagne.nom_scenario_cible)
+                scenario.read_all(ignore_shp=True)
+                run = scenario.get_run(list(scenario.runs.keys())[-1])  # c10m10
+            else:
+                raise NotImplementedError
+
+            logger.info(run)
+            values = OrderedDict()
+
+            # Get nb_calc_perm
+            try:
+                resultats = run.get_resultats_calcul(use_metadata_cache=use_metadata_cache)
+                values['nb_calc_perm'] = len(resultats.res_calc_pseudoperm)
+            except IOError as e:
+                logger.warning("Aucun résultat trouvé (fichier rcal manquant) pour le Run #%s" % run.id)
+                values['nb_calc_perm'] = 0
+
+            # Compute nb_services_ok
+            nb_services_ok = 0
+            for service, traces in run.traces.items():
+                if traces and run.nb_erreurs_bloquantes([service]) == 0:
+                    if service == 'r':
+                        # Display a message to check Crue10 version
+                        logger.debug("%s: %s" % (exe_id, traces[0].get_message()))
+                    nb_services_ok += 1
+
+            # Save criteria in values
+            values.update(OrderedDict([
+                ('nb_services_ok', nb_services_ok),
+                ('nb_erreurs_calcul', run.nb_erreurs_calcul()),
+                ('nb_avertissements_calcul', run.nb_avertissements_calcul()),
+            ]))
+            for var, value in values.items():
+                rows.append({
+                    'etude_dossier': etude_dossier, 'etude_basename': os.path.basename(etude.etu_path),
+                    'scenario': scenario.id, 'exe_id': exe_id,
+                    'run_idx': run_idx, 'run_id': run.id,
+                    'variable': var, 'value': value
+                })
+
+        except ExceptionCrue10 as e:
+            logger.critical("ERREUR CRITIQUE :\n%s" % e)
+
+    return rows
+
+
+def parse_otfa_runs(fichier_otfa, ncsize=1, use_metadata_cache=False):
+    """
+    Les campagnes sont traitées en parallèle si `ncsize` est supérieur à 1 (seules les lignes du tableau sont
+    renvoyées par les processus fils)
+
     :param fichier_otfa: fichier OTFA en lecture (et qui est déjà parsé)
     :vartype fichier_otfa: FichierOtfa
+    :param ncsize: nombre de processus pour traiter les campagnes
+    :vartype ncsize: int
+    :param use_metadata_cache: utiliser le cache des métadonnées des résultats (voir `ResultatsCalcul`)
+    :vartype use_metadata_cache: bool
     :rtype: pd.DataFrame
     """
     df_runs = pd.DataFrame({'etude_dossier': [], 'etude_basename': [], 'scenario': [], 'exe_id': [],
                             'run_idx': [], 'run_id': [],
                             'variable': [], 'value': []})
-    for campagne in fichier_otfa.campagnes:  # (1) reference = old_c10m10, (2) cible = c10m10
-        dossier_otfa = os.path.dirname(fichier_otfa.files['otfa'])
-
-        assert campagne.chemin_etude_ref == campagne.chemin_etude_cible
-        assert campagne.nom_scenario_ref == campagne.nom_scenario_cible
-
-        etude_dossier = os.path.basename(os.path.dirname(campagne.chemin_etude_ref))
-        logger.info(">>>>>>>>>> Dossier étude: %s <<<<<<<<<<" % etude_dossier)
-
-        for run_idx, exe_id in enumerate((COEUR_REFERENCE, COEUR_CIBLE)):
-            try:
-                if run_idx == 0:
-                    etude = Etude(os.path.normpath(os.path.join(dossier_otfa, campagne.chemin_etude_ref)))
-                    scenario = etude.get_scenario(campagne.nom_scenario_ref)
-                    scenario.read_all(ignore_shp=True)
-                    run = scenario.get_run(list(scenario.runs.keys())[0])  # old_c10m10
-                elif run_idx == 1:
-                    etude = Etude(os.path.normpath(os.path.join(dossier_otfa, campagne.chemin_etude_cible)))
-                    scenario = etude.get_scenario(campagne.nom_scenario_cible)
-                    scenario.read_all(ignore_shp=True)
-                    run = scenario.get_run(list(scenario.runs.keys())[-1])  # c10m10
-                else:
-                    raise NotImplementedError
-
-                logger.info(run)
-                values = OrderedDict()
-
-                # Get nb_calc_perm
-                try:
-                    resultats = run.get_resultats_calcul()
-                    values['nb_calc_perm'] = len(resultats.res_calc_pseudoperm)
-                except IOError as e:
-                    logger.warning("Aucun résultat trouvé (fichier rcal manquant) pour le Run #%s" % run.id)
-                    values['nb_calc_perm'] = 0
-
-                # Compute nb_services_ok
-                nb_services_ok = 0
-                for service, traces in run.traces.items():
-                    if traces and run.nb_erreurs_bloquantes([service]) == 0:
-                        if service == 'r':
-                            # Display a message to check Crue10 version
-                            logger.debug("%s: %s" % (exe_id, traces[0].get_message()))
-                        nb_services_ok += 1
-
-                # Save criteria in values and append them in df_runs
-                values.update(OrderedDict([
-                    ('nb_services_ok', nb_services_ok),
-                    ('nb_erreurs_calcul', run.nb_erreurs_calcul()),
-                    ('nb_avertissements_calcul', run.nb_avertissements_calcul()),
-                ]))
-                for var, value in values.items():
-                    serie = pd.Series({
-                        'etude_dossier': etude_dossier, 'etude_basename': os.path.basename(etude.etu_path),
-                        'scenario': scenario.id, 'exe_id': exe_id,
-                        'run_idx': run_idx, 'run_id': run.id,
-                        'variable': var, 'value': value
-                    })
-                    df_runs.loc[len(df_runs)] = serie
-
-            except ExceptionCrue10 as e:
-                logger.critical("ERREUR CRITIQUE :\n%s" % e)
-
+    dossier_otfa = os.path.dirname(fichier_otfa.files['otfa'])
+    tasks = [(dossier_otfa, campagne, use_metadata_cache) for campagne in fichier_otfa.campagnes]
+    # (1) reference = old_c10m10, (2) cible = c10m10
+    if ncsize > 1 and len(tasks) > 1:
+        logger.info("Lecture de %i campagnes en parallèle (sur %i processeurs)" % (len(tasks), ncsize))
+        with Pool(processes=ncsize) as pool:
+            rows_by_campagne = pool.map(_parse_otfa_campagne, tasks)
+    else:
+        rows_by_campagne = [_parse_otfa_campagne(task) for task in tasks]
+
+    # Append rows in df_runs (in the order of the campaigns)
+    for rows in rows_by_campagne:
+        for row in rows:
+            df_runs.loc[len(df_runs)] = pd.Series(row)
     return df_runs
 
 
-def launch_runs(dossier, scenarios_dict=None, crue_exe_dict={'prod': CRUE10_EXE_PATH}, overwrite=True):
+def launch_runs(dossier, scenarios_dict=None, crue_exe_dict={'prod': CRUE10_EXE_PATH}, overwrite=True,
+                use_metadata_cache=False):
     """
     :param dossier: dossier contenant des sous-dossiers avec un ou plusieurs .etu.xml
     :param scenarios_dict: dictionnaire avec les scénarios à lancer (mettre None pour prendre un scénario par défaut)
     :param crue_exe_dict: dictionnaire avec les coeurs à lancer (identifiant et chemin vers crue10.exe)
     :param overwrite: écrase les Run s'ils existent déjà
+    :param use_metadata_cache: utiliser le cache des métadonnées des résultats (voir `ResultatsCalcul`)
     :rtype: pd.DataFrame
     """
     LOGGER_LEVEL = logger.level
@@ -161,7 +195,7 @@ def launch_runs(dossier, scenarios_dict=None, crue_exe_dict={'prod': CRUE10_EXE_
 
                         # Get nb_calc_perm
                         try:
-                            resultats = run.get_resultats_calcul()
+                            resultats = run.get_resultats_calcul(use_metadata_cache=use_metadata_cache)
                             values['nb_calc_perm'] = len(resultats.res_calc_pseudoperm)
                         except IOError as e:
                             logger.warning("Aucun résultat trouvé (fichier rcal manquant) pour le Run #%s" % run_id)
@@ -197,27 +231,28 @@ def launch_runs(dossier, scenarios_dict=None, crue_exe_dict={'prod': CRUE10_EXE_
     return df_runs
 
 
-def get_run_steady_results(dossier, df_runs_unique, reference, out_csv_diff_by_calc=None,
-                           variable='Z', emh_type='Section'):
+def _get_steady_diff_stat(args):
     """
-    :param dossier: dossier contenant des sous-dossiers avec un ou plusieurs .etu.xml
-    :param df_runs_unique:
-    :param reference:
-    :param variable:
-    :param emh_type:
-    :rtype: pd.DataFrame
+    Calculer les critères de comparaison des résultats permanents des Runs d'un même scénario
+    (exécuté éventuellement dans un processus fils, seuls des tableaux compacts sont renvoyés)
+
+    :param args: tuple avec le dossier, les lignes des Runs du scénario (la référence en premier), l'identifiant
+        du coeur de référence, la variable, le type d'EMH, s'il faut renvoyer les différences par calcul et s'il faut
+        utiliser le cache des métadonnées
+    :type args: (str, list(dict), str, str, str, bool, bool)
+    :return: liste des critères par Run (tuple avec la ligne et le dictionnaire des critères) et liste des
+        différences par calcul pour le coeur cible (tuple avec le dossier d'étude, le nombre de calculs en commun,
+        la liste des EMHs et le tableau des différences)
+    :rtype: tuple(list(tuple(dict, OrderedDict)), list(tuple(str, int, list(str), np.ndarray)))
     """
-    # Sort df_runs_unique to have 'prod' in first position to compute differences
-    df_runs_unique = df_runs_unique.sort_values(['etude_dossier', 'scenario', 'exe_id'],
-                                                ascending=[True, True, True])
-
+    dossier, rows, reference, variable, emh_type, with_diff_by_calc, use_metadata_cache = args
     LOGGER_LEVEL = logger.level
     res_perm = {}
-    cols = list(df_runs_unique.columns)
-    df_diff_stat = pd.DataFrame({col: [] for col in cols + ['variable', 'value']})
+    diff_stats = []
+    diffs_by_calc = []
     etude = None
     etu_path_last = ''
-    for _, row in df_runs_unique.iterrows():
+    for row in rows:
         # Build a `Etude` instance
         etude_dossier = row['etude_dossier']
         etu_path = os.path.join(dossier, etude_dossier, row['etude_basename'])
@@ -235,7 +270,7 @@ def get_run_steady_results(dossier, df_runs_unique, reference, out_csv_diff_by_c
         run = scenario.get_run(row['run_id'])
         logger.info(run)
         try:
-            resultats = run.get_resultats_calcul()
+            resultats = run.get_resultats_calcul(use_metadata_cache=use_metadata_cache)
         except IOError as e:
             logger.error("Un fichier de sortie du Run `%s` manque: %s" % (run.id, e))
             continue
@@ -264,13 +299,8 @@ def get_run_steady_results(dossier, df_runs_unique, reference, out_csv_diff_by_c
         diff = res_perm_curr - res_perm_ref
         diff_abs = np.abs(diff)
 
-        if out_csv_diff_by_calc is not None and row['exe_id'] == COEUR_CIBLE:
-            df_diff = pd.DataFrame({
-                'id_calcul': np.repeat(np.arange(nb_common_calc, dtype=int) + 1, diff.shape[1]),
-                'emh': resultats.emh[emh_type] * diff.shape[0],
-                'diff': diff.flatten()
-            })
-            df_diff.to_csv(out_csv_diff_by_calc % etude_dossier, sep=';', index=False)
+        if with_diff_by_calc and row['exe_id'] == COEUR_CIBLE:
+            diffs_by_calc.append((etude_dossier, nb_common_calc, resultats.emh[emh_type], diff))
 
         # Compute criteria
         values = OrderedDict([
@@ -279,14 +309,63 @@ def get_run_steady_results(dossier, df_runs_unique, reference, out_csv_diff_by_c
             ('DIFF_ABS_MAX', diff_abs.max()),
             ('RMSD', np.sqrt(np.mean(diff ** 2))),
         ])
-
-        # Append criteria in df_diff_stat
-        metadata = dict(row)
-        for var, value in values.items():
-            metadata.update({'variable': var, 'value': value})
-            df_diff_stat.loc[len(df_diff_stat)] = pd.Series(metadata)
+        diff_stats.append((row, values))
 
         # Save current etu_path to avoid reading again at next loop iteration
         etu_path_last = etu_path
 
+    return diff_stats, diffs_by_calc
+
+
+def get_run_steady_results(dossier, df_runs_unique, reference, out_csv_diff_by_calc=None,
+                           variable='Z', emh_type='Section', ncsize=1, use_metadata_cache=False):
+    """
+    Les Runs sont regroupés par scénario (avec la référence en premier) et les scénarios sont traités en parallèle
+    si `ncsize` est supérieur à 1 (lecture des résultats et calcul des critères dans les processus fils).
+    La référence est cherchée dans la même étude : un scénario sans Run de référence n'a pas de critères.
+
+    :param dossier: dossier contenant des sous-dossiers avec un ou plusieurs .etu.xml
+    :param df_runs_unique:
+    :param reference:
+    :param variable:
+    :param emh_type:
+    :param ncsize: nombre de processus pour traiter les scénarios
+    :param use_metadata_cache: utiliser le cache des métadonnées des résultats (voir `ResultatsCalcul`)
+    :rtype: pd.DataFrame
+    """
+    # Sort df_runs_unique to have 'prod' in first position to compute differences
+    df_runs_unique = df_runs_unique.sort_values(['etude_dossier', 'scenario', 'exe_id'],
+                                                ascending=[True, True, True])
+
+    # Group runs by scenario (keeping the order of the rows)
+    rows_by_scenario = OrderedDict()
+    for _, row in df_runs_unique.iterrows():
+        rows_by_scenario.setdefault((row['etude_dossier'], row['scenario']), []).append(dict(row))
+    tasks = [(dossier, rows, reference, variable, emh_type, out_csv_diff_by_calc is not None, use_metadata_cache)
+             for rows in rows_by_scenario.values()]
+    if ncsize > 1 and len(tasks) > 1:
+        logger.info("Comparaison de %i scénarios en parallèle (sur %i processeurs)" % (len(tasks), ncsize))
+        with Pool(processes=ncsize) as pool:
+            results = pool.map(_get_steady_diff_stat, tasks)
+    else:
+        results = [_get_steady_diff_stat(task) for task in tasks]
+
+    # Merge criteria in df_diff_stat
+    cols = list(df_runs_unique.columns)
+    df_diff_stat = pd.DataFrame({col: [] for col in cols + ['variable', 'value']})
+    for diff_stats, diffs_by_calc in results:
+        for etude_dossier, nb_common_calc, emh_names, diff in diffs_by_calc:
+            df_diff = pd.DataFrame({
+                'id_calcul': np.repeat(np.arange(nb_common_calc, dtype=int) + 1, diff.shape[1]),
+                'emh': emh_names * diff.shape[0],
+                'diff': diff.flatten()
+            })
+            df_diff.to_csv(out_csv_diff_by_calc % etude_dossier, sep=';', index=False)
+
+        for row, values in diff_stats:
+            metadata = dict(row)
+            for var, value in values.items():
+                metadata.update({'variable': var, 'value': value})
+                df_diff_stat.loc[len(df_diff_stat)] = pd.Series(metadata)
+
     return df_diff_stat
@@ -12,6 +12,12 @@ CSV_DELIMITER = ';'  # delimiter for output CSV files
 
 FMT_FLOAT_CSV = '%.6e'  # float format for output CSV files
 
+#: Dossier du cache des métadonnées des résultats de calcul (si None, le cache est écrit à côté du fichier rcal)
+RESULTS_CACHE_FOLDER = None
+
+#: Dossier des instantanés des études lues (si None, l'instantané est écrit à côté du fichier etu.xml)
+ETUDE_SNAPSHOT_FOLDER = None
+
 GRAVITE_MAX = 'FATAL'
 GRAVITE_MIN = 'DEBUG3'
 GRAVITE_AVERTISSEMENT = 'WARN'
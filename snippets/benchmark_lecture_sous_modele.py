@@ -0,0 +1,102 @@
+# coding: utf-8
+"""
+Comparaison des temps de lecture d'un sous-modèle avec les analyseurs XML `etree` (historique) et `lxml`
+
+Le sous-modèle de test Sm_M3-6_c10 est agrandi en dupliquant `NB_COPIES` fois toutes ses EMH (avec un suffixe
+ajouté à leurs noms) pour obtenir un sous-modèle de plusieurs milliers de sections.
+Les fichiers drso, dptg, dcsp et dfrt réécrits à partir des deux lectures sont comparés pour vérifier que
+les EMH obtenues sont identiques.
+"""
+from copy import deepcopy
+from filecmp import cmp
+from lxml import etree
+import os.path
+import shutil
+import sys
+import time
+
+from crue10.etude import Etude
+from crue10.sous_modele import SousModele
+from crue10.utils import ExceptionCrue10, logger, PREFIX
+
+
+DOSSIER_ETUDE = os.path.join('..', 'crue10', 'tests', 'data', 'in', '1.3', 'Etu3-6')
+NOM_ETUDE = 'Etu3-6.etu.xml'
+NOM_SOUS_MODELE = 'Sm_M3-6_c10'
+NB_COPIES = 200  # 26 sections => 5200 sections
+NB_REPETITIONS = 3
+DOSSIER_OUT = os.path.join('out', 'benchmark_lecture_sous_modele')
+
+
+def agrandir_sous_modele(sous_modele, nb_copies):
+    """Dupliquer toutes les EMH des fichiers XML du sous-modèle (les fichiers sont modifiés sur place)"""
+    for xml_type in SousModele.FILES_XML:
+        tree = etree.parse(sous_modele.files[xml_type])
+        for emh_group in tree.getroot():
+            if not isinstance(emh_group.tag, str) or emh_group.tag == PREFIX + 'Commentaire':
+                continue
+            emhs = [emh for emh in emh_group if isinstance(emh.tag, str)]
+            for i in range(1, nb_copies):
+                for emh in emhs:
+                    new_emh = deepcopy(emh)
+                    for elt in new_emh.iter():
+                        if not isinstance(elt.tag, str) or elt.tag == PREFIX + 'Etiquette':
+                            continue
+                        for attribute in ('Nom', 'NomRef'):
+                            if elt.get(attribute) is not None:
+                                elt.set(attribute, '%s_%i' % (elt.get(attribute), i))
+                    emh_group.append(new_emh)
+        tree.write(sous_modele.files[xml_type], xml_declaration=True, encoding='UTF-8')
+
+
+try:
+    # Copy and enlarge the study
+    dossier_etude = os.path.join(DOSSIER_OUT, 'in')
+    if os.path.exists(dossier_etude):
+        shutil.rmtree(dossier_etude)
+    shutil.copytree(DOSSIER_ETUDE, dossier_etude)
+    etu_path = os.path.join(dossier_etude, NOM_ETUDE)
+    agrandir_sous_modele(Etude(etu_path).get_sous_modele(NOM_SOUS_MODELE), NB_COPIES)
+
+    durations = {}
+    for xml_parser in SousModele.XML_PARSERS:
+        durations[xml_parser] = {xml_type: [] for xml_type in ['total'] + SousModele.FILES_XML}
+        for _ in range(NB_REPETITIONS):
+            sous_modele = Etude(etu_path, xml_parser=xml_parser).get_sous_modele(NOM_SOUS_MODELE)
+            start_total = time.perf_counter()
+            for xml_type in ['dfrt', 'drso', 'dptg', 'dcsp']:  # same order as `read_all`
+                start = time.perf_counter()
+                getattr(sous_modele, '_read_' + xml_type)()
+                durations[xml_parser][xml_type].append(time.perf_counter() - start)
+            sous_modele.set_active_sections()
+            durations[xml_parser]['total'].append(time.perf_counter() - start_total)
+        logger.info("%s (analyseur %s) : %i sections, %i branches"
+                    % (sous_modele, xml_parser, len(sous_modele.sections), len(sous_modele.branches)))
+
+        # Write files to compare EMHs
+        folder = os.path.join(DOSSIER_OUT, xml_parser)
+        os.makedirs(folder, exist_ok=True)
+        for xml_type in SousModele.FILES_XML:
+            getattr(sous_modele, '_write_' + xml_type)(folder)
+
+    # Display results (best time of all repetitions)
+    logger.info("%10s %10s %10s %8s" % ('Fichier', 'etree (s)', 'lxml (s)', 'Gain'))
+    for xml_type in ['total'] + SousModele.FILES_XML:
+        duration_etree = min(durations['etree'][xml_type])
+        duration_lxml = min(durations['lxml'][xml_type])
+        logger.info("%10s %10.3f %10.3f %7.1fx" % (xml_type, duration_etree, duration_lxml,
+                                                  duration_etree / duration_lxml))
+
+    for xml_type in SousModele.FILES_XML:
+        basename = os.path.basename(sous_modele.files[xml_type])
+        if not cmp(os.path.join(DOSSIER_OUT, 'etree', basename), os.path.join(DOSSIER_OUT, 'lxml', basename),
+                   shallow=False):
+            raise ExceptionCrue10("Le fichier %s diffère selon l'analyseur XML utilisé" % basename)
+    logger.info("Les fichiers réécrits sont identiques pour les deux analyseurs")
+
+except IOError as e:
+    logger.critical(e)
+    sys.exit(1)
+except ExceptionCrue10 as e:
+    logger.critical(e)
+    sys.exit(2)